@@ -1,5 +1,34 @@
-# flake8: noqa F821
 __version__ = "3.3.2"
 
-from emodpy_hiv.campaign import *
-from emodpy_hiv.demographics import *
+import importlib
+
+# The subpackages and modules are imported when they are first accessed
+# (i.e. emodpy_hiv.campaign) so that 'import emodpy_hiv' does not load
+# pandas, emod_api, or emodpy.
+_LAZY_SUBMODULES = [
+    "campaign",
+    "countries",
+    "country_model",
+    "demographics",
+    "download",
+    "migration",
+    "parameterized_call",
+    "plotting",
+    "reporters",
+    "utils"
+]
+
+__all__ = [
+    "campaign",
+    "demographics"
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SUBMODULES))
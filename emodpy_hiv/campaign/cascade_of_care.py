@@ -14,8 +14,10 @@ from emodpy_hiv.campaign.individual_intervention import (OutbreakIndividual, HIV
 
 from emodpy_hiv.campaign.common import (TargetDemographicsConfig, TargetGender, PropertyRestrictions, ValueMap,
                                         CommonInterventionParameters, RepetitionConfig)
+from emodpy_hiv.campaign.profiling import profiled
 from emodpy_hiv.campaign.distributor import (add_intervention_scheduled, add_intervention_triggered,
-                                             add_intervention_nchooser_df, add_intervention_reference_tracking)
+                                             add_intervention_nchooser_df, add_intervention_reference_tracking,
+                                             add_interventions_triggered, TriggeredInterventionSpec)
 from emodpy_hiv.utils.distributions import (UniformDistribution, ExponentialDistribution, ConstantDistribution,
                                             WeibullDistribution)
 from emodpy_hiv.utils.emod_enum import TargetDiseaseState
@@ -942,6 +944,7 @@ def add_ART_cascade(campaign: emod_api.campaign,
     add_state_LostForever(campaign=campaign, node_ids=art_cascade_node_ids, start_year=art_cascade_start_year)
 
 
+@profiled
 def add_state_TestingOnANC(campaign: emod_api.campaign,
                            disqualifying_properties: List[str],
                            coverage: float,
@@ -1126,6 +1129,7 @@ def add_state_TestingOnANC(campaign: emod_api.campaign,
     return ART_STAGING_TRIGGER_1  # return the trigger for the ARTStaging state
 
 
+@profiled
 def add_state_TestingOnChild6w(campaign: emod_api.campaign,
                                start_year: float,
                                disqualifying_properties: List[str],
@@ -1178,6 +1182,7 @@ def add_state_TestingOnChild6w(campaign: emod_api.campaign,
     return ART_STAGING_DIAGNOSTIC_TEST_TRIGGER  # return the trigger for the ARTStagingDiagnosticTest state
 
 
+@profiled
 def add_state_HCTUptakeAtDebut(campaign: emod_api.campaign,
                                disqualifying_properties: List[str],
                                node_ids: Union[List[int], None],
@@ -1231,6 +1236,7 @@ def add_state_HCTUptakeAtDebut(campaign: emod_api.campaign,
             HCT_UPTAKE_POST_DEBUT_TRIGGER_1)  # return the trigger for the HCTUpdatePostDebut state
 
 
+@profiled
 def add_state_HCTUptakePostDebut(campaign: emod_api.campaign,
                                  disqualifying_properties: List[str],
                                  node_ids: Union[List[int], None],
@@ -1364,6 +1370,7 @@ def add_state_HCTUptakePostDebut(campaign: emod_api.campaign,
     return HCT_TESTING_LOOP_TRIGGER  # return the trigger for the HCTTestingLoop state
 
 
+@profiled
 def add_state_HCTTestingLoop(campaign: emod_api.campaign,
                              disqualifying_properties: List[str],
                              node_ids: Union[List[int], None],
@@ -1479,18 +1486,23 @@ def add_state_HCTTestingLoop(campaign: emod_api.campaign,
                              "hct_delay_to_next_test_node_names must have the same length.")
     else:
         raise ValueError("hct_delay_to_next_test must be an int or a list of int.")
+    # node groups with the same delay share the intervention and therefore the event coordinator
+    delay_to_next_hct_by_period = {}
+    specs = []
     for delay_period, delay_node_ids, node_name in zip(hct_delay_to_next_test, hct_delay_to_next_test_node_ids,
                                                        hct_delay_to_next_test_node_names):
-        delay_to_next_hct = HIVMuxer(campaign,
-                                     muxer_name='HCTTestingLoop',
-                                     delay_period_distribution=ExponentialDistribution(mean=delay_period),
-                                     broadcast_delay_complete_event=diagnostic_trigger,
-                                     common_intervention_parameters=CommonInterventionParameters(disqualifying_properties=disqualifying_properties,
-                                                                                                 new_property_value=hct_testing_loop_pv))
-        add_intervention_triggered(campaign, intervention_list=[delay_to_next_hct],
-                                   triggers_list=[initial_trigger], start_year=start_year,
-                                   node_ids=delay_node_ids,
-                                   event_name=f'HCTTestingLoop: state 0 (delay to next HCT): {node_name}')
+        if delay_period not in delay_to_next_hct_by_period:
+            delay_to_next_hct_by_period[delay_period] = HIVMuxer(campaign,
+                                                                 muxer_name='HCTTestingLoop',
+                                                                 delay_period_distribution=ExponentialDistribution(mean=delay_period),
+                                                                 broadcast_delay_complete_event=diagnostic_trigger,
+                                                                 common_intervention_parameters=CommonInterventionParameters(disqualifying_properties=disqualifying_properties,
+                                                                                                                             new_property_value=hct_testing_loop_pv))
+        specs.append(TriggeredInterventionSpec(intervention_list=[delay_to_next_hct_by_period[delay_period]],
+                                               triggers_list=[initial_trigger], start_year=start_year,
+                                               node_ids=delay_node_ids,
+                                               event_name=f'HCTTestingLoop: state 0 (delay to next HCT): {node_name}'))
+    add_interventions_triggered(campaign, specs)
 
     # testing loop -- hct hiv test
     randomchoice_trigger = CustomEvent.HCT_TESTING_LOOP_2
@@ -1537,6 +1549,7 @@ def add_state_HCTTestingLoop(campaign: emod_api.campaign,
             ART_STAGING_TRIGGER_1)  # return the trigger for the ARTStaging state
 
 
+@profiled
 def add_state_TestingOnSymptomatic(campaign: emod_api.campaign,
                                    node_ids: Union[List[int], None],
                                    disqualifying_properties: List[str],
@@ -1609,6 +1622,7 @@ def add_state_TestingOnSymptomatic(campaign: emod_api.campaign,
             ART_STAGING_TRIGGER_2)  # return the trigger for the ARTStaging state
 
 
+@profiled
 def add_state_ARTStagingDiagnosticTest(campaign,
                                        node_ids: Union[List[int], None],
                                        disqualifying_properties: List[str],
@@ -1649,6 +1663,7 @@ def add_state_ARTStagingDiagnosticTest(campaign,
     return ART_STAGING_TRIGGER_1  # return the trigger for the ARTStaging state
 
 
+@profiled
 def add_state_ARTStaging(campaign: emod_api.campaign,
                          cd4_retention_rate: float,
                          pre_staging_retention: float,
@@ -1785,6 +1800,7 @@ def add_state_ARTStaging(campaign: emod_api.campaign,
             HCT_UPTAKE_POST_DEBUT_TRIGGER_3)  # return the trigger for the HCTUptakePostDebut state from lost-to-followup (LTFU)
 
 
+@profiled
 def add_state_LinkingToPreART(campaign: emod_api.campaign,
                               node_ids: Union[List[int], None],
                               disqualifying_properties: List[str],
@@ -1844,6 +1860,7 @@ def add_state_LinkingToPreART(campaign: emod_api.campaign,
             HCT_UPTAKE_POST_DEBUT_TRIGGER_3)  # return the trigger for the HCTUptakePostDebut state from people who are not eligible for ART
 
 
+@profiled
 def add_state_OnPreART(campaign: emod_api.campaign,
                        node_ids: Union[List[int], None],
                        pre_art_retention: float,
@@ -1963,6 +1980,7 @@ def add_state_OnPreART(campaign: emod_api.campaign,
             HCT_UPTAKE_POST_DEBUT_TRIGGER_3)  # return the trigger for the HCTUptakePostDebut state
 
 
+@profiled
 def add_state_LinkingToART(campaign: emod_api.campaign,
                            node_ids: Union[List[int], None],
                            disqualifying_properties: List[str],
@@ -2024,6 +2042,7 @@ def add_state_LinkingToART(campaign: emod_api.campaign,
             HCT_UPTAKE_POST_DEBUT_TRIGGER_2)  # return the trigger for the HCTUptakePostDebut state
 
 
+@profiled
 def add_state_OnART(campaign: emod_api.campaign,
                     art_reenrollment_willingness: float,
                     immediate_art_rate: float,
@@ -2189,6 +2208,7 @@ def add_state_OnART(campaign: emod_api.campaign,
             LOST_FOREVER_TRIGGER)             # return the trigger for the LostForever state
 
 
+@profiled
 def add_state_LostForever(campaign: emod_api.campaign, node_ids: Union[List[int], None], start_year: float):
     """
     Transition individuals to the 'LostForever' state in the campaign.
@@ -1,8 +1,10 @@
 from emod_api import campaign as api_campaign
-from emod_api import schema_to_class as s2c
+from emodpy_hiv.campaign import schema_lookup
 from emodpy_hiv.utils.emod_enum import TargetDiseaseState
 
 from typing import Union
+import numpy as np
+import pandas as pd
 
 # Importing necessary classes from the emodpy.campaign.common module so user can import them from the current
 # module: emodpy_hiv.campaign.common module
@@ -197,7 +199,7 @@ class NChooserTargetedDistributionHIV:
         """
         Returns the TargetedDistributionHIV object as a dictionary that match the schema and can be used in the campaign.
         """
-        self._targeted_distribution = s2c.get_class_with_defaults("idmType:TargetedDistributionHIV", schema_json=campaign.get_schema())
+        self._targeted_distribution = schema_lookup.get_class_with_defaults("idmType:TargetedDistributionHIV", schema_json=campaign.get_schema())
         self._targeted_distribution.Age_Ranges_Years = self.age_ranges_years_list
         if self.num_targeted:
             self._targeted_distribution.Num_Targeted = self.num_targeted
@@ -315,9 +317,202 @@ class NChooserTargetedDistributionHIV:
         return contains_intervention
 
 
+class NChooserTargetedDistributionTableHIV:
+    """
+    **NChooserTargetedDistributionTableHIV** class to create the distributions of a **NChooserEventCoordinatorHIV**
+    from a DataFrame with one row per year and age range.  It is the columnar version of a list of
+    **NChooserTargetedDistributionHIV** objects, one per year, for long time series: the whole DataFrame is validated
+    once with array operations and the distributions of the other years are copies of the first year's distribution
+    with their own years, age ranges, and numbers targeted.
+
+    Each year is distributed from 'year' to 'year' + 0.999999 and the rows of a year are ordered by min_age.  The
+    years are in the order they first appear in the DataFrame.
+
+    Args:
+        distribution_df (pd.DataFrame, required):
+            - A DataFrame containing the data for these columns: year, min_age, max_age, num_targeted,
+              num_targeted_female, num_targeted_male.
+            - The first three columns are required, and at least one of the last three columns is required.
+            - num_targeted: The number of individuals to be targeted, gender-agnostic. It can't be used with
+              num_targeted_female or num_targeted_male.
+            - num_targeted_female: The number of female individuals to be targeted. It can't be used with num_targeted.
+            - num_targeted_male: The number of male individuals to be targeted. It can't be used with num_targeted.
+        property_restrictions (PropertyRestrictions, optional):
+            - A PropertyRestrictions to define the individual-level property restrictions of every year.
+            - Default value: None.
+        target_disease_state (list[list[TargetDiseaseState]], optional):
+            - A two-dimensional list of disease states using the TargetDiseaseState enum for every year.
+            - Please refer to NChooserTargetedDistributionHIV for more information.
+            - Default value: None.
+        target_disease_state_has_intervention_name (str, optional):
+            - The name of the intervention to look for in an individual, it's required when using TargetDiseaseState.HAS_INTERVENTION or TargetDiseaseState.NOT_HAS_INTERVENTION in target_disease_state.
+            - Default value: None.
+
+    Examples:
+        ```
+        from emodpy_hiv.campaign.common import NChooserTargetedDistributionTableHIV
+        from emodpy_hiv.campaign.event_coordinator import NChooserEventCoordinatorHIV
+        distributions_df = pd.DataFrame({'year': [2010, 2010, 2011, 2011],
+                                         'min_age': [1, 15, 1, 15],
+                                         'max_age': [14.999, 49.999, 14.999, 49.999],
+                                         'num_targeted_male': [200, 1300, 290, 1490]})
+        targeted_distributions = NChooserTargetedDistributionTableHIV(distributions_df)
+        coordinator = NChooserEventCoordinatorHIV(campaign, intervention_list=[mc],
+                                                  targeted_distributions=targeted_distributions)
+        ```
+    """
+    YEAR_DURATION = 0.999999
+    _NUM_TARGETED_KEYS = {"num_targeted": "Num_Targeted",
+                          "num_targeted_females": "Num_Targeted_Females",
+                          "num_targeted_males": "Num_Targeted_Males"}
+
+    def __init__(self,
+                 distribution_df: pd.DataFrame,
+                 property_restrictions: PropertyRestrictions = None,
+                 target_disease_state: list[list[TargetDiseaseState]] = None,
+                 target_disease_state_has_intervention_name: str = None):
+        self.property_restrictions = property_restrictions
+        self.target_disease_state = target_disease_state
+        self.target_disease_state_has_intervention_name = target_disease_state_has_intervention_name
+
+        self.num_targeted_columns = self._validate_columns(distribution_df)
+
+        # Order the rows by year, in the order they first appear, and then by min_age
+        year_codes, years = pd.factorize(distribution_df['year'])
+        min_ages = distribution_df['min_age'].to_numpy()
+        order = np.lexsort((min_ages, year_codes))
+        self.years = np.asarray(years)
+        self.min_ages = min_ages[order]
+        self.max_ages = distribution_df['max_age'].to_numpy()[order]
+        self.num_targeted = {column: distribution_df[column].to_numpy()[order] for column in self.num_targeted_columns}
+        self._year_codes = year_codes[order]
+        self._year_slices = self._get_year_slices()
+
+        self._validate_age_ranges()
+
+        # The parameters shared by all of the years are validated once by the first year's distribution
+        self._first_distribution = self.get_distribution(0) if len(self.years) > 0 else None
+
+    @property
+    def start_year(self) -> float:
+        """
+        The first year with a distribution.
+        """
+        return float(min(self.years))
+
+    def __len__(self):
+        return len(self.years)
+
+    @staticmethod
+    def _validate_columns(distribution_df: pd.DataFrame) -> list[str]:
+        # These are the columns that are expected in the distribution dataframe
+        required_columns = {'year', 'min_age', 'max_age'}
+        if not required_columns.issubset(distribution_df.columns):
+            raise ValueError(f"Expected these columns: {required_columns} in the distribution_df "
+                             f"dataframe. Got distributions.columns: {distribution_df.columns}")
+
+        # Only one of the following names is required.
+        optional_columns = {'num_targeted', 'num_targeted_female', 'num_targeted_male'}
+        # Check if at least one optional column is present in the distribution dataframe
+        if not optional_columns.intersection(distribution_df.columns):
+            raise ValueError(f"Expected at least one of these columns: {optional_columns} in the distribution_df "
+                             f"dataframe. Got distributions.columns: {distribution_df.columns}")
+
+        if 'num_targeted' in distribution_df.columns:
+            if 'num_targeted_female' in distribution_df.columns or 'num_targeted_male' in distribution_df.columns:
+                raise ValueError("num_targeted column should not be used with num_targeted_female or num_targeted_male.")
+            return ['num_targeted']
+        return [column for column in ['num_targeted_female', 'num_targeted_male'] if column in distribution_df.columns]
+
+    def _get_year_slices(self) -> list[slice]:
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(self._year_codes)) + 1, [len(self._year_codes)]])
+        return [slice(start, end) for start, end in zip(starts[:-1], starts[1:])]
+
+    def _validate_age_ranges(self):
+        # Check if each max_age is > min_age
+        invalid = np.flatnonzero(self.max_ages < self.min_ages)
+        if len(invalid) > 0:
+            row = invalid[0]
+            raise ValueError(f"Max age: {self.max_ages[row]} should be larger than min age: {self.min_ages[row]} "
+                             f"in year {self.years[self._year_codes[row]]}.")
+
+        # Check if the age ranges of a year are overlapping
+        previous_max_ages = np.concatenate([[-1], self.max_ages[:-1]])
+        is_first_row = np.concatenate([[True], np.diff(self._year_codes) != 0])
+        previous_max_ages[is_first_row] = -1
+        invalid = np.flatnonzero(self.min_ages < previous_max_ages)
+        if len(invalid) > 0:
+            row = invalid[0]
+            raise ValueError(f"Min age: {self.min_ages[row]} should be larger than the previous max age: "
+                             f"{previous_max_ages[row]} in year {self.years[self._year_codes[row]]}."
+                             f"Your age ranges are overlapping.")
+
+    def _get_num_targeted(self, year_slice: slice) -> dict:
+        if 'num_targeted' in self.num_targeted:
+            return {"num_targeted": self.num_targeted['num_targeted'][year_slice].tolist()}
+        num_targeted_females = self.num_targeted.get('num_targeted_female')
+        num_targeted_males = self.num_targeted.get('num_targeted_male')
+        num_rows = year_slice.stop - year_slice.start
+        # If one of them is not set, it should contain 0s with the same length as the other one.
+        return {"num_targeted_females": [0] * num_rows if num_targeted_females is None else num_targeted_females[year_slice].tolist(),
+                "num_targeted_males": [0] * num_rows if num_targeted_males is None else num_targeted_males[year_slice].tolist()}
+
+    def get_distribution(self, year_index: int) -> NChooserTargetedDistributionHIV:
+        """
+        Returns the NChooserTargetedDistributionHIV object of one year.
+
+        Args:
+            year_index: The index of the year in the years attribute.
+        """
+        year = self.years[year_index]
+        year_slice = self._year_slices[year_index]
+        return NChooserTargetedDistributionHIV(age_ranges_years=[self.min_ages[year_slice].tolist(),
+                                                                 self.max_ages[year_slice].tolist()],
+                                               start_year=float(year),
+                                               end_year=year + self.YEAR_DURATION,
+                                               property_restrictions=self.property_restrictions,
+                                               target_disease_state=self.target_disease_state,
+                                               target_disease_state_has_intervention_name=self.target_disease_state_has_intervention_name,
+                                               **self._get_num_targeted(year_slice))
+
+    def _validate_years(self, campaign: api_campaign):
+        schema = schema_lookup.get_class_with_defaults("idmType:TargetedDistributionHIV", schema_json=campaign.get_schema())["schema"]
+        for key, years in [("Start_Year", self.years), ("End_Year", self.years + self.YEAR_DURATION)]:
+            if years.min() < schema[key]["min"]:
+                raise ValueError(f"{years.min()} is below minimum {schema[key]['min']} for parameter {key}.")
+            if years.max() > schema[key]["max"]:
+                raise ValueError(f"{years.max()} is above maximum {schema[key]['max']} for parameter {key}.")
+
+    def to_schema_dicts(self, campaign: api_campaign) -> list:
+        """
+        Returns the TargetedDistributionHIV objects of all of the years as a list of dictionaries that match the schema
+        and can be used in the campaign.  They are the same as calling to_schema_dict() on the distribution of each
+        year.  The property restrictions and target disease states are shared by the dictionaries.
+        """
+        if self._first_distribution is None:
+            return []
+        self._validate_years(campaign)
+
+        first = self._first_distribution.to_schema_dict(campaign)
+        distributions = [first]
+        for year_index in range(1, len(self.years)):
+            year = self.years[year_index]
+            year_slice = self._year_slices[year_index]
+            distribution = type(first)(first)
+            distribution["Age_Ranges_Years"] = [{"Max": float(max_age), "Min": float(min_age)}
+                                                for min_age, max_age in zip(self.min_ages[year_slice].tolist(),
+                                                                            self.max_ages[year_slice].tolist())]
+            for num_targeted_name, num_targeted in self._get_num_targeted(year_slice).items():
+                distribution[self._NUM_TARGETED_KEYS[num_targeted_name]] = num_targeted
+            distribution["Start_Year"] = float(year)
+            distribution["End_Year"] = year + self.YEAR_DURATION
+            distributions.append(distribution)
+        return distributions
+
+
 # __all_exports: A list of classes that are intended to be exported from this module.
 __all_exports = [CommonInterventionParameters, PropertyRestrictions, TargetGender, TargetDemographicsConfig,
-                 RepetitionConfig, ValueMap, NChooserTargetedDistributionHIV]
+                 RepetitionConfig, ValueMap, NChooserTargetedDistributionHIV, NChooserTargetedDistributionTableHIV]
 
 # The following loop sets the __module__ attribute of each class in __all_exports to the name of the current module.
 # This is done to ensure that when these classes are imported from this module, their __module__ attribute correctly
@@ -1,14 +1,22 @@
 from emod_api import campaign as api_campaign
-from emodpy.campaign.base_intervention import IndividualIntervention
+from emod_api.schema_to_class import ReadOnlyDict
+from emodpy.campaign.base_intervention import IndividualIntervention, NodeIntervention
 from emodpy.campaign.event import create_campaign_event
+from emodpy.utils.distributions import BaseDistribution
 
+from emodpy_hiv.campaign.profiling import profiled
 from emodpy_hiv.campaign.common import TargetDemographicsConfig, PropertyRestrictions, NChooserTargetedDistributionHIV, ValueMap
+from emodpy_hiv.campaign.common import NChooserTargetedDistributionTableHIV
 from emodpy_hiv.campaign.event_coordinator import NChooserEventCoordinatorHIV, ReferenceTrackingEventCoordinatorTrackingConfig
 from emodpy_hiv.utils.emod_enum import TargetDiseaseState
 from emodpy_hiv.utils.targeting_config import AbstractTargetingConfig
 
+import json
 import pandas as pd
 import warnings
+from enum import Enum
+from types import ModuleType
+from typing import Union
 
 # ported from emodpy/campaign/distributor.py
 
@@ -25,7 +33,15 @@ from emodpy.campaign.distributor import add_intervention_triggered
 
 from emodpy.campaign.distributor import add_community_health_worker
 
+# The entry points ported from emodpy are recorded by the CampaignProfiler like the ones defined here.
+# add_interventions_triggered() builds its event coordinators with the original add_intervention_triggered.
+_emodpy_add_intervention_triggered = add_intervention_triggered
+add_intervention_scheduled = profiled(add_intervention_scheduled)
+add_intervention_triggered = profiled(add_intervention_triggered)
+add_community_health_worker = profiled(add_community_health_worker)
 
+
+@profiled
 def add_intervention_nchooser_df(campaign: api_campaign,
                                  intervention_list: list[IndividualIntervention],
                                  distribution_df: pd.DataFrame,
@@ -163,61 +179,16 @@ def add_intervention_nchooser_df(campaign: api_campaign,
                                      distribution_df=distributions_df)
         ```
     """
-    # These are the columns that are expected in the distribution dataframe
-    required_columns = {'year', 'min_age', 'max_age'}
-    if not required_columns.issubset(distribution_df.columns):
-        raise ValueError(f"Expected these columns: {required_columns} in the distribution_df "
-                         f"dataframe. Got distributions.columns: {distribution_df.columns}")
-
-    # Only one of the following names is required.
-    optional_columns = {'num_targeted', 'num_targeted_female', 'num_targeted_male'}
-    # Check if at least one optional column is present in the distribution dataframe
-    if not optional_columns.intersection(distribution_df.columns):
-        raise ValueError(f"Expected at least one of these columns: {optional_columns} in the distribution_df "
-                         f"dataframe. Got distributions.columns: {distribution_df.columns}")
-
-    # Get the unique value of target years from the distribution dataframe
-    target_years = distribution_df.year.unique()
-    # Created the distribution objects for each target year
-    targeted_distributions = []
-    for year in target_years:
-        # Filter the distribution dataframe with year
-        df_cur_year = distribution_df[distribution_df['year'] == year].sort_values(by=['min_age'])
-        # Max and Min age ranges for qualifying individuals.
-        age_ranges_years = [df_cur_year['min_age'].tolist(), df_cur_year['max_age'].tolist()]
-        num_targeted = None
-        num_targeted_female = None
-        num_targeted_male = None
-        if 'num_targeted' in distribution_df.columns:
-            num_targeted = df_cur_year['num_targeted'].tolist()
-            if 'num_targeted_female' in distribution_df.columns or 'num_targeted_male' in distribution_df.columns:
-                raise ValueError("num_targeted column should not be used with num_targeted_female or num_targeted_male.")
-        else:
-            if 'num_targeted_female' in distribution_df.columns:
-                num_targeted_female = df_cur_year['num_targeted_female'].tolist()
-            if 'num_targeted_male' in distribution_df.columns:
-                num_targeted_male = df_cur_year['num_targeted_male'].tolist()
-
-            # If one of them is not set, it should contain 0s with the same length as the other one.
-            if num_targeted_female is None:
-                num_targeted_female = [0] * len(num_targeted_male)
-            if num_targeted_male is None:
-                num_targeted_male = [0] * len(num_targeted_female)
-
-        targeted_distribution = NChooserTargetedDistributionHIV(age_ranges_years=age_ranges_years,
-                                                                start_year=float(year),
-                                                                end_year=year + 0.999999,
-                                                                num_targeted=num_targeted,
-                                                                num_targeted_females=num_targeted_female,
-                                                                num_targeted_males=num_targeted_male,
-                                                                property_restrictions=property_restrictions,
-                                                                target_disease_state=target_disease_state,
-                                                                target_disease_state_has_intervention_name=target_disease_state_has_intervention_name)
-        targeted_distributions.append(targeted_distribution)
+    # Validate the whole dataframe once and create the distributions of all of the target years from it
+    targeted_distributions = NChooserTargetedDistributionTableHIV(
+        distribution_df,
+        property_restrictions=property_restrictions,
+        target_disease_state=target_disease_state,
+        target_disease_state_has_intervention_name=target_disease_state_has_intervention_name)
 
     # Call the add_intervention_nchooser function to distribute the intervention_list with target_distributions
     # Set start_year to the minimum year in the target_years
-    start_year = float(min(target_years))
+    start_year = targeted_distributions.start_year
     _add_intervention_nchooser(campaign,
                                intervention_list=intervention_list,
                                targeted_distributions=targeted_distributions,
@@ -228,7 +199,7 @@ def add_intervention_nchooser_df(campaign: api_campaign,
 
 def _add_intervention_nchooser(campaign: api_campaign,
                                intervention_list: list[IndividualIntervention],
-                               targeted_distributions: list[NChooserTargetedDistributionHIV],
+                               targeted_distributions: Union[list[NChooserTargetedDistributionHIV], NChooserTargetedDistributionTableHIV],
                                start_year: float,
                                event_name: str = None,
                                node_ids: list[int] = None) -> None:
@@ -251,6 +222,7 @@ def _add_intervention_nchooser(campaign: api_campaign,
             - Refer to the emodpy_hiv.campaign.individual_intervention module for available IndividualIntervention derived classes.
         targeted_distributions (list[NChooserTargetedDistributionHIV], required):
             - A list of NChooserTargetedDistributionHIV object specifying when, to whom, and how many interventions are distributed.
+            - Or a NChooserTargetedDistributionTableHIV with the distributions of all of the years.
             - Please refer emodpy_hiv.campaign.event_coordinator.NChooserTargetedDistributionHIV for more details.
         start_year (float, required):
             - The year when the event starts.
@@ -294,6 +266,7 @@ def _add_intervention_nchooser(campaign: api_campaign,
     campaign.add(event.to_schema_dict(campaign))
 
 
+@profiled
 def add_intervention_reference_tracking(campaign: api_campaign,
                                         intervention_list: list[IndividualIntervention],
                                         time_value_map: ValueMap,
@@ -446,9 +419,181 @@ def add_intervention_reference_tracking(campaign: api_campaign,
     campaign.add(event.to_schema_dict(campaign))
 
 
+class TriggeredInterventionSpec:
+    """
+    The arguments of one add_intervention_triggered() event for add_interventions_triggered().
+
+    Args:
+        intervention_list (Union[list[IndividualIntervention], list[NodeIntervention]], required):
+            - The interventions to distribute when one of the triggers is broadcast.
+            - Reuse the same objects (and the same triggers_list, delay_distribution, etc.) in the specs that
+              should distribute the same interventions so that they share one event coordinator.
+        triggers_list (list[str], required):
+            - The events that trigger the distribution of the interventions.
+        start_year (float, optional):
+            - The year when the event starts. Either start_year or start_day is required, but not both.
+        start_day (float, optional):
+            - The day when the event starts. Either start_year or start_day is required, but not both.
+        node_ids (list[int], optional):
+            - A list of node IDs where the event will be applied.
+            - If None, the event applies to all nodes.
+        event_name (str, optional):
+            - The name of the campaign event.
+        duration (float, optional):
+            - How long the nodes listen for the triggers. -1 (default) is forever.
+        delay_distribution (BaseDistribution, optional):
+            - The delay between the trigger and the distribution of IndividualInterventions.
+        target_demographics_config (TargetDemographicsConfig, optional):
+            - The demographics to target. Defaults to None which targets everyone with 100% coverage.
+        property_restrictions (PropertyRestrictions, optional):
+            - The Individual or Node Property_Restrictions. Defaults to None which has no restrictions.
+        targeting_config (AbstractTargetingConfig, optional):
+            - Extra targeting of individuals. Defaults to None.
+    """
+    def __init__(self,
+                 intervention_list: Union[list[IndividualIntervention], list[NodeIntervention]],
+                 triggers_list: list[str],
+                 start_year: float = None,
+                 start_day: float = None,
+                 node_ids: list[int] = None,
+                 event_name: str = None,
+                 duration: float = -1,
+                 delay_distribution: BaseDistribution = None,
+                 target_demographics_config: TargetDemographicsConfig = None,
+                 property_restrictions: PropertyRestrictions = None,
+                 targeting_config: AbstractTargetingConfig = None):
+        self.intervention_list = intervention_list
+        self.triggers_list = triggers_list
+        self.start_year = start_year
+        self.start_day = start_day
+        self.node_ids = node_ids
+        self.event_name = event_name
+        self.duration = duration
+        self.delay_distribution = delay_distribution
+        self.target_demographics_config = target_demographics_config
+        self.property_restrictions = property_restrictions
+        self.targeting_config = targeting_config
+
+    def _get_coordinator_key(self) -> str:
+        # The canonical JSON of what the event coordinator is built from, so specs with equal
+        # contents share it even when they use different objects
+        return json.dumps(_get_coordinator_key_value([self.intervention_list,
+                                                      self.triggers_list,
+                                                      self.duration,
+                                                      self.delay_distribution,
+                                                      self.target_demographics_config,
+                                                      self.property_restrictions,
+                                                      self.targeting_config]), sort_keys=True)
+
+
+def _get_coordinator_key_value(value):
+    if isinstance(value, dict):
+        # The "schema" node of a ReadOnlyDict is the same for every object of the class
+        return {str(key): _get_coordinator_key_value(item) for key, item in value.items()
+                if not (isinstance(value, ReadOnlyDict) and key == "schema")}
+    if isinstance(value, (list, tuple)):
+        return [_get_coordinator_key_value(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if (value is None) or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (IndividualIntervention, NodeIntervention)):
+        return [type(value).__qualname__, _get_coordinator_key_value(value.to_schema_dict())]
+    if isinstance(value, ModuleType) or not hasattr(value, "__dict__"):
+        return [type(value).__qualname__, repr(value)]
+    return [type(value).__qualname__, _get_coordinator_key_value(vars(value))]
+
+
+class _BuiltEventCoordinator:
+    # An event coordinator whose schema dictionary was already built and finalized.  Each event
+    # gets its own copy since campaign.add() finalizes the event in place.
+    def __init__(self, schema_json: str):
+        self._schema_json = schema_json
+
+    def to_schema_dict(self):
+        return json.loads(self._schema_json)
+
+
+class _EventCoordinatorRecorder:
+    # Stands in for the campaign while emodpy's add_intervention_triggered() builds an event.  The
+    # finalized event coordinator is kept instead of adding the event.  Everything else is passed
+    # to the campaign.
+    def __init__(self, campaign: api_campaign):
+        self._campaign = campaign
+        self.coordinator = None
+
+    def add(self, event, note: str = None):
+        event.finalize()
+        self.coordinator = _BuiltEventCoordinator(json.dumps(event["Event_Coordinator_Config"]))
+
+    def __getattr__(self, name):
+        return getattr(self._campaign, name)
+
+
+@profiled
+def add_interventions_triggered(campaign: api_campaign,
+                                specs: list[TriggeredInterventionSpec]) -> None:
+    """
+    Add one triggered event per TriggeredInterventionSpec, like calling add_intervention_triggered() for each
+    spec, but build the event coordinator only once for the specs that distribute the same interventions.
+
+    This is intended for the same intervention(s) being distributed to many groups of nodes (e.g. one event
+    per province).  Two specs share the built event coordinator when their interventions, triggers, duration,
+    delay_distribution, target_demographics_config, property_restrictions, and targeting_config have the
+    same contents.  Each event gets its own copy of the coordinator.  The events are added in the order of
+    the specs and the campaign.json is the same as calling add_intervention_triggered() for each spec.
+
+    Args:
+        campaign (api_campaign, required):
+            - The campaign object to which the events will be added.
+        specs (list[TriggeredInterventionSpec], required):
+            - The events to add.
+
+    Returns:
+        None: This function does not return anything. It modifies the campaign object in place.
+
+    Examples:
+        ```
+        from emodpy_hiv.campaign.distributor import add_interventions_triggered, TriggeredInterventionSpec
+        from emodpy_hiv.campaign.individual_intervention import HIVRapidHIVDiagnostic
+
+        hiv_test = HIVRapidHIVDiagnostic(campaign, positive_diagnosis_event="Positive",
+                                         negative_diagnosis_event="Negative")
+        specs = [TriggeredInterventionSpec(intervention_list=[hiv_test], triggers_list=["Test"],
+                                           start_year=2000, node_ids=[node_id], event_name=f"Test {node_id}")
+                 for node_id in range(1, 101)]
+        add_interventions_triggered(campaign, specs)
+        ```
+    """
+    # The keys are found before any coordinator is built since building finalizes the interventions
+    keys = [spec._get_coordinator_key() for spec in specs]
+    coordinators = {}
+    for spec, key in zip(specs, keys):
+        coordinator = coordinators.get(key)
+        if coordinator is None:
+            recorder = _EventCoordinatorRecorder(campaign)
+            _emodpy_add_intervention_triggered(recorder,
+                                               intervention_list=spec.intervention_list,
+                                               triggers_list=spec.triggers_list,
+                                               start_day=spec.start_day,
+                                               start_year=spec.start_year,
+                                               duration=spec.duration,
+                                               delay_distribution=spec.delay_distribution,
+                                               target_demographics_config=spec.target_demographics_config,
+                                               property_restrictions=spec.property_restrictions,
+                                               targeting_config=spec.targeting_config)
+            coordinator = recorder.coordinator
+            coordinators[key] = coordinator
+
+        event = create_campaign_event(campaign, coordinator=coordinator, event_name=spec.event_name,
+                                      node_ids=spec.node_ids, start_day=spec.start_day, start_year=spec.start_year)
+        campaign.add(event.to_schema_dict(campaign))
+
+
 # __all_exports: A list of classes that are intended to be exported from this module.
 __all_exports = [add_intervention_scheduled, add_intervention_triggered, _add_intervention_nchooser,
-                 add_intervention_nchooser_df, add_intervention_reference_tracking, add_community_health_worker]
+                 add_intervention_nchooser_df, add_intervention_reference_tracking, add_community_health_worker,
+                 TriggeredInterventionSpec, add_interventions_triggered]
 
 # The following loop sets the __module__ attribute of each class in __all_exports to the name of the current module.
 # This is done to ensure that when these classes are imported from this module, their __module__ attribute correctly
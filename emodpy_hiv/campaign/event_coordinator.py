@@ -1,8 +1,10 @@
 from emod_api import campaign as api_campaign
+from typing import Union
 
 from emodpy.campaign.base_intervention import IndividualIntervention
 from emodpy.campaign.event_coordinator import InterventionDistributorEventCoordinator
 from emodpy_hiv.campaign.common import TargetDemographicsConfig, ValueMap, PropertyRestrictions, NChooserTargetedDistributionHIV
+from emodpy_hiv.campaign.common import NChooserTargetedDistributionTableHIV
 from emodpy_hiv.utils.targeting_config import AbstractTargetingConfig
 
 # ported from emodpy/campaign/event_coordinator.py
@@ -25,18 +27,22 @@ class NChooserEventCoordinatorHIV(InterventionDistributorEventCoordinator):
             - The campaign object to which the event will be added.
         intervention_list (list[IndividualIntervention], required):
             - A list of individual-level interventions to be distributed.
-        targeted_distributions (list[TargetedDistributionHIV], required):
+        targeted_distributions (list[TargetedDistributionHIV] or NChooserTargetedDistributionTableHIV, required):
             - A list of TargetedDistributionHIV objects specifying when, to whom, and how many interventions are distributed.
+            - For long time series, a NChooserTargetedDistributionTableHIV with the distributions of all of the years.
     """
     def __init__(self,
                  campaign: api_campaign,
                  intervention_list: list[IndividualIntervention],
-                 targeted_distributions: list[NChooserTargetedDistributionHIV]):
+                 targeted_distributions: Union[list[NChooserTargetedDistributionHIV], NChooserTargetedDistributionTableHIV]):
 
         super().__init__(campaign, "NChooserEventCoordinatorHIV", intervention_list)
 
-        self._coordinator.Distributions = [targeted_distribution.to_schema_dict(campaign)
-                                           for targeted_distribution in targeted_distributions]
+        if isinstance(targeted_distributions, NChooserTargetedDistributionTableHIV):
+            self._coordinator.Distributions = targeted_distributions.to_schema_dicts(campaign)
+        else:
+            self._coordinator.Distributions = [targeted_distribution.to_schema_dict(campaign)
+                                               for targeted_distribution in targeted_distributions]
 
 
 class ReferenceTrackingEventCoordinatorTrackingConfig(InterventionDistributorEventCoordinator):
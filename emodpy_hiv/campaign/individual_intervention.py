@@ -25,6 +25,7 @@ from emodpy_hiv.utils.emod_enum import (SensitivityType, SettingType, Relationsh
                                         CondomUsageParametersType)
 from emodpy_hiv.utils.distributions import BaseDistribution
 from emodpy_hiv.campaign.common import ValueMap, CommonInterventionParameters
+from emodpy_hiv.campaign import schema_lookup
 from emod_api import campaign as api_campaign
 
 from typing import Union
@@ -96,7 +97,7 @@ class Sigmoid:
         """
         A function that converts the Sigmoid object to a schema dictionary.
         """
-        sigmoid = s2c.get_class_with_defaults("idmType:Sigmoid", schema_json=campaign.get_schema())
+        sigmoid = schema_lookup.get_class_with_defaults("idmType:Sigmoid", schema_json=campaign.get_schema())
         sigmoid.Min = self.min
         sigmoid.Max = self.max
         sigmoid.Mid = self.mid
@@ -144,7 +145,7 @@ class RangeThreshold:
         """
         A function that converts the Sigmoid object to a schema dictionary.
         """
-        rt = s2c.get_class_with_defaults("idmType:RangeThreshold", schema_json=campaign.get_schema())
+        rt = schema_lookup.get_class_with_defaults("idmType:RangeThreshold", schema_json=campaign.get_schema())
         rt.Low = self.low
         rt.High = self.high
         rt.Event = set_event(self.event_to_broadcast, 'event_to_broadcast', campaign, True)
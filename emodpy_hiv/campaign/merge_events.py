@@ -0,0 +1,105 @@
+"""
+Shrink a campaign by merging events that only differ by the nodes they apply to.
+
+Country models frequently add the same event once per group of nodes (e.g. one event per
+province).  EMOD reads and instantiates each of these events separately.  When the events
+are the same apart from the Nodeset_Config, one event with the combined list of nodes
+distributes the same interventions to the same people.
+
+This is only true when the event coordinator treats each person independently.  The number
+of people targeted by an NChooserEventCoordinatorHIV, a ReferenceTrackingEventCoordinator, or
+a StandardEventCoordinator using TARGET_NUM_INDIVIDUALS is shared by all of the nodes in the
+node set, so merging those events would change the simulation.  Only the coordinator classes
+in coordinator_classes are merged, only events on disjoint lists of nodes are merged, and only
+events that are next to each other in the campaign are merged so the order of the events is kept.
+"""
+import copy
+import json
+from typing import List
+
+import emod_api.campaign
+
+MERGEABLE_COORDINATOR_CLASSES = ["StandardEventCoordinator"]
+
+
+def _get_node_list(event) -> List[int]:
+    nodeset_config = event.get("Nodeset_Config", {})
+    if nodeset_config.get("class") != "NodeSetNodeList":
+        return None
+    return list(nodeset_config["Node_List"])
+
+
+def _is_mergeable(event, coordinator_classes: List[str]) -> bool:
+    coordinator = event.get("Event_Coordinator_Config", {})
+    if coordinator.get("class") not in coordinator_classes:
+        return False
+    if coordinator.get("Individual_Selection_Type") == "TARGET_NUM_INDIVIDUALS":
+        return False
+    return _get_node_list(event) is not None
+
+
+def _get_merge_key(event, merge_event_names: bool) -> str:
+    ignored_keys = ["Nodeset_Config", "Event_Name"] if merge_event_names else ["Nodeset_Config"]
+    return json.dumps({key: value for key, value in event.items() if key not in ignored_keys}, sort_keys=True)
+
+
+def merge_events_by_node_set(campaign: emod_api.campaign,
+                             merge_event_names: bool = False,
+                             coordinator_classes: List[str] = None) -> int:
+    """
+    Merge the consecutive events of the campaign that are identical except for their list of nodes
+    into one event that applies to all of their nodes.  Only consecutive events are merged so the
+    order of all of the events is kept; EMOD distributes the events that start on the same day in
+    the order they are in the campaign.  The events in the campaign are replaced, not modified, so
+    events shared with other campaigns are not affected.
+
+    Call it after the campaign is built and before it is saved.
+
+    Args:
+        campaign: The campaign object whose campaign_dict["Events"] is reduced.
+        merge_event_names: If True, events with different Event_Name values are also merged and
+            the merged event's name is the unique names joined with ", ".  If False, only events
+            with the same name are merged.
+        coordinator_classes: The classes of the event coordinators whose events can be merged.
+            Defaults to MERGEABLE_COORDINATOR_CLASSES.
+
+    Returns:
+        The number of events removed from the campaign.
+    """
+    coordinator_classes = MERGEABLE_COORDINATOR_CLASSES if coordinator_classes is None else coordinator_classes
+    events = campaign.campaign_dict["Events"]
+
+    groups = []        # the events of each output event
+    last_group = None  # (merge key, nodes) of the last group if it can still take events
+    for event in events:
+        if not _is_mergeable(event, coordinator_classes):
+            groups.append([event])
+            last_group = None
+            continue
+
+        key = _get_merge_key(event, merge_event_names)
+        node_list = _get_node_list(event)
+        if (last_group is not None) and (last_group[0] == key) and last_group[1].isdisjoint(node_list):
+            groups[-1].append(event)
+            last_group[1].update(node_list)
+            continue
+        groups.append([event])
+        last_group = (key, set(node_list))
+
+    merged_events = []
+    for group in groups:
+        if len(group) == 1:
+            merged_events.append(group[0])
+            continue
+        merged = copy.copy(group[0])
+        nodeset_config = copy.copy(group[0]["Nodeset_Config"])
+        nodeset_config["Node_List"] = [node_id for event in group for node_id in _get_node_list(event)]
+        merged["Nodeset_Config"] = nodeset_config
+        if merge_event_names and ("Event_Name" in merged):
+            names = list(dict.fromkeys(event["Event_Name"] for event in group if "Event_Name" in event))
+            merged["Event_Name"] = ", ".join(names)
+        merged_events.append(merged)
+
+    num_removed = len(events) - len(merged_events)
+    events[:] = merged_events
+    return num_removed
@@ -0,0 +1,149 @@
+"""
+Opt-in profiling of campaign (and config/demographics) generation.
+
+While a CampaignProfiler is active, every ParameterizedCall executed by a Country model and
+every function decorated with @profiled (the distributor entry points and the cascade of care
+add_state_*() functions) is recorded with its wall time, the number of campaign events it
+added, and the number of schema lookups (emod_api.schema_to_class.get_class_with_defaults)
+it made, as seen by emodpy_hiv.campaign.schema_lookup.  When no profiler is active, the decorated functions only pay for one global check.
+
+Example:
+    ```
+    from emodpy_hiv.campaign.profiling import CampaignProfiler
+
+    with CampaignProfiler() as profiler:
+        campaign = Zambia.build_campaign(campaign=api_campaign)
+    print(profiler.to_dataframe())
+    profiler.to_json("campaign_profile.json")
+    ```
+"""
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Union
+import json
+import time
+
+from emodpy_hiv.campaign import schema_lookup
+
+_active_profiler = None
+
+
+def get_active_profiler():
+    """
+    Return the CampaignProfiler that is currently recording or None.
+    """
+    return _active_profiler
+
+
+def _count_events(target) -> Union[int, None]:
+    campaign_dict = getattr(target, "campaign_dict", None)
+    return None if campaign_dict is None else len(campaign_dict["Events"])
+
+
+class CampaignProfiler:
+    """
+    Record the time, campaign events added, and schema lookups of each ParameterizedCall and
+    each profiled function.  Use it as a context manager; only one profiler can be active at
+    a time.
+
+    Each record has the following keys:
+
+    - name: The qualified name of the function (with the label for a ParameterizedCall)
+    - kind: "ParameterizedCall" or "function"
+    - depth: How deep the record is nested in other records; 0 is the outermost
+    - wall_time: The seconds spent in the call including the nested calls
+    - events_added: The number of events added to the campaign or None if the target is not a campaign
+    - schema_lookups: The number of schema lookups including the nested calls
+    """
+    def __init__(self):
+        self.records = []
+        self._depth = 0
+        self._schema_lookups = 0
+        self._lookup_counter = None
+
+    def __enter__(self):
+        global _active_profiler
+        if _active_profiler is not None:
+            raise RuntimeError("A CampaignProfiler is already active.")
+        _active_profiler = self
+
+        # Count the lookups with the schema lookup hook that also routes the lookups made in emodpy
+        self._lookup_counter = schema_lookup.lookup_counter(self._count_schema_lookup)
+        self._lookup_counter.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_profiler
+        self._lookup_counter.__exit__(None, None, None)
+        self._lookup_counter = None
+        _active_profiler = None
+        return False
+
+    def _count_schema_lookup(self, classname: str) -> None:
+        self._schema_lookups += 1
+
+    @contextmanager
+    def record(self, name: str, kind: str, target=None):
+        """
+        Record the block as one entry.  target is the object being modified (e.g. the campaign).
+        """
+        record = {"name": name, "kind": kind, "depth": self._depth}
+        self.records.append(record)
+        events_before = _count_events(target)
+        lookups_before = self._schema_lookups
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - start
+            self._depth -= 1
+            events_after = _count_events(target)
+            record["events_added"] = None if events_before is None else events_after - events_before
+            record["schema_lookups"] = self._schema_lookups - lookups_before
+
+    def to_records(self) -> List[Dict]:
+        return [dict(record) for record in self.records]
+
+    def to_dataframe(self):
+        """
+        Return the records as a pandas DataFrame, one row per record in the order they started.
+        """
+        import pandas as pd
+        columns = ["name", "kind", "depth", "wall_time", "events_added", "schema_lookups"]
+        return pd.DataFrame(self.to_records(), columns=columns)
+
+    def to_json(self, filename: Union[str, Path]) -> str:
+        """
+        Write the records to a JSON file and return the filename.
+        """
+        with open(filename, "w") as file:
+            json.dump(self.to_records(), file, indent=4)
+        return str(filename)
+
+
+def profile_call(name: str, kind: str, target=None):
+    """
+    Return a context manager that records the block in the active profiler or does nothing.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return nullcontext()
+    return profiler.record(name=name, kind=kind, target=target)
+
+
+def profiled(func):
+    """
+    Decorator that records each call of func in the active CampaignProfiler.  The campaign is
+    taken from the 'campaign' keyword argument or the first positional argument.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active_profiler
+        if profiler is None:
+            return func(*args, **kwargs)
+        target = kwargs.get("campaign", args[0] if len(args) > 0 else None)
+        with profiler.record(name=func.__qualname__, kind="function", target=target):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,96 @@
+"""
+The one place where emodpy_hiv intercepts the schema lookups made while building a campaign.
+
+The interventions, event coordinators, and campaign events of emodpy and emodpy_hiv start from
+emod_api.schema_to_class.get_class_with_defaults().  The CampaignProfiler counts these lookups
+and the schema template cache answers them from templates.  Both use this module instead of
+replacing s2c.get_class_with_defaults themselves:
+
+- get_class_with_defaults() is the hook.  It uses the template cache, if one is set, and tells
+  each registered counter about the lookups that reach emod_api.
+- lookups_routed() installs the hook as s2c.get_class_with_defaults so that the lookups made in
+  emodpy reach it.  It is reference counted, so the hook is installed by the first block that
+  needs it, removed by the last one, and the blocks can end in any order.
+"""
+from contextlib import contextmanager
+
+from emod_api import schema_to_class as s2c
+
+# What s2c.get_class_with_defaults was before the hook was installed
+_get_class_with_defaults = None
+_install_count = 0
+
+# The SchemaTemplateCache answering the lookups or None
+_template_cache = None
+
+# The callables that are called with the class name of each lookup
+_lookup_counters = []
+
+
+def _get_class_with_defaults_from_emod_api(classname, schema_path=None, schema_json=None):
+    for counter in _lookup_counters:
+        counter(classname)
+    get_from_emod_api = s2c.get_class_with_defaults if (_get_class_with_defaults is None) else _get_class_with_defaults
+    return get_from_emod_api(classname, schema_path=schema_path, schema_json=schema_json)
+
+
+def get_class_with_defaults(classname, schema_path=None, schema_json=None):
+    """
+    Look up the default object for classname like s2c.get_class_with_defaults() does.
+    """
+    if _template_cache is not None:
+        return _template_cache.get_class_with_defaults(_get_class_with_defaults_from_emod_api, classname,
+                                                       schema_path=schema_path, schema_json=schema_json)
+    return _get_class_with_defaults_from_emod_api(classname, schema_path=schema_path, schema_json=schema_json)
+
+
+@contextmanager
+def lookups_routed():
+    """
+    Route the s2c.get_class_with_defaults() calls made inside the with-block through the hook.
+    """
+    global _get_class_with_defaults, _install_count
+    if _install_count == 0:
+        _get_class_with_defaults = s2c.get_class_with_defaults
+        s2c.get_class_with_defaults = get_class_with_defaults
+    _install_count += 1
+    try:
+        yield
+    finally:
+        _install_count -= 1
+        if _install_count == 0:
+            s2c.get_class_with_defaults = _get_class_with_defaults
+            _get_class_with_defaults = None
+
+
+@contextmanager
+def lookup_counter(counter):
+    """
+    Call counter(classname) for each lookup made inside the with-block that is not answered
+    by the template cache.
+    """
+    _lookup_counters.append(counter)
+    try:
+        with lookups_routed():
+            yield
+    finally:
+        _lookup_counters.remove(counter)
+
+
+@contextmanager
+def template_cache(cache):
+    """
+    Answer the lookups made inside the with-block from cache.  A nested block keeps the outer cache.
+    """
+    global _template_cache
+    if _template_cache is not None:
+        with lookups_routed():
+            yield _template_cache
+        return
+
+    _template_cache = cache
+    try:
+        with lookups_routed():
+            yield cache
+    finally:
+        _template_cache = None
@@ -0,0 +1,91 @@
+"""
+A cache of the default-populated objects that emod_api.schema_to_class.get_class_with_defaults()
+creates from the campaign schema.
+
+Every intervention, event coordinator, and campaign event starts with a call to
+s2c.get_class_with_defaults(class_name, schema_json=campaign.get_schema()), which walks the
+schema (recursively for nested types) every time.  While the cache is in use (the lookups are
+routed through emodpy_hiv.campaign.schema_lookup), the first call
+for a class name is done normally and kept as a template; later calls return a clone of the
+template.  The clone copies the dictionaries and lists of the template but shares the "schema"
+nodes of the ReadOnlyDict objects since those are read-only pieces of the schema.
+
+The templates are only used for the schema of emod_api.campaign and are dropped when
+campaign.schema_path changes.  Calls with another schema are passed through.
+"""
+from contextlib import contextmanager
+
+from emod_api import campaign as api_campaign
+from emod_api import schema_to_class as s2c
+
+from emodpy_hiv.campaign import schema_lookup
+
+
+def _clone(value):
+    if isinstance(value, dict):
+        clone = type(value)()
+        share_schema = isinstance(value, s2c.ReadOnlyDict)
+        for key, item in value.items():
+            clone[key] = item if (share_schema and key == "schema") else _clone(item)
+        return clone
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+class SchemaTemplateCache:
+    """
+    The templates for one campaign schema, keyed by class name.
+    """
+    def __init__(self):
+        self._schema_path = None
+        self._templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def clear(self) -> None:
+        self._schema_path = None
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_class_with_defaults(self, get_class_with_defaults, classname, schema_path=None, schema_json=None):
+        if (schema_path is not None) or (schema_json is None) or (schema_json is not api_campaign.get_schema()):
+            return get_class_with_defaults(classname, schema_path=schema_path, schema_json=schema_json)
+
+        if self._schema_path != api_campaign.schema_path:
+            self.clear()
+            self._schema_path = api_campaign.schema_path
+
+        template = self._templates.get(classname)
+        if template is None:
+            self.misses += 1
+            template = get_class_with_defaults(classname, schema_json=schema_json)
+            self._templates[classname] = template
+        else:
+            self.hits += 1
+        return _clone(template)
+
+
+_cache = SchemaTemplateCache()
+
+
+def get_schema_template_cache() -> SchemaTemplateCache:
+    """
+    Return the cache shared by every use of schema_template_cache().
+    """
+    return _cache
+
+
+@contextmanager
+def schema_template_cache():
+    """
+    Use the template cache for the schema lookups made inside the with-block.  Nested blocks
+    reuse the outer cache.  The templates are kept after the block so the next block with the
+    same schema starts warm.
+    """
+    with schema_lookup.template_cache(_cache) as cache:
+        yield cache
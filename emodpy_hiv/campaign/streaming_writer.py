@@ -0,0 +1,152 @@
+"""
+Write the events of a campaign to disk while the campaign is being built.
+
+emod_api.campaign keeps every event in campaign.campaign_dict["Events"] until campaign.save()
+serializes them all at once.  For campaigns with thousands of large events (e.g. NChooser
+distributions by node, year, and age) the events dominate the memory of the build.  While a
+StreamingCampaignWriter is active, each event that is added to the campaign is written to the
+file and dropped from the campaign, so the memory stays flat and the file can be consumed as
+soon as the writer is closed.
+
+The file is byte-for-byte the same as campaign.save() would write for the same events.  If the
+with-block raises an exception, the file is deleted instead of being completed.
+
+Example:
+    ```
+    from emodpy_hiv.campaign.streaming_writer import StreamingCampaignWriter
+
+    api_campaign.set_schema(schema_path)
+    with StreamingCampaignWriter(api_campaign, "campaign.json.gz", compress=True):
+        Zambia.add_historical_vmmc_nchooser(api_campaign, historical_vmmc_data_filepath=filepath)
+    ```
+
+NOTE: Since the events are removed from the campaign, do not combine the writer with
+Country.build_campaign_incrementally() or a ParameterizedCallMemo; they read the events back
+from the campaign.
+"""
+from pathlib import Path
+from typing import Union
+import gzip
+import json
+
+import emod_api.campaign
+
+EVENTS_KEY = "Events"
+INDENT = 4
+
+
+def _dumps(value, level: int) -> str:
+    # Match json.dump(..., sort_keys=True, indent=4) for a value nested 'level' deep
+    text = json.dumps(value, sort_keys=True, indent=INDENT)
+    return text.replace("\n", "\n" + " " * (INDENT * level))
+
+
+class StreamingCampaignWriter:
+    """
+    A context manager that writes the events added to the campaign to a file as they are added.
+
+    Args:
+        campaign: The emod_api campaign object that the events are added to.
+        filename: The file to write.
+        compress: If True, the file is compressed with gzip.
+        keep_events: If True, the events also stay in the campaign.  The file is still written
+            incrementally, but the memory is not reduced.
+    """
+    def __init__(self,
+                 campaign: emod_api.campaign,
+                 filename: Union[str, Path],
+                 compress: bool = False,
+                 keep_events: bool = False):
+        self.campaign = campaign
+        self.filename = str(filename)
+        self.compress = compress
+        self.keep_events = keep_events
+        self.num_events_written = 0
+        self._file = None
+        self._add = None
+        self._num_events_kept = 0
+        self._keys_before_events = None
+
+    def __enter__(self):
+        campaign_dict = self.campaign.campaign_dict
+        self._file = gzip.open(self.filename, "wt") if self.compress else open(self.filename, "w")
+
+        # The keys are sorted so the keys before "Events" have to be known now
+        self._keys_before_events = sorted(key for key in campaign_dict if key < EVENTS_KEY)
+        self._file.write("{")
+        for key in self._keys_before_events:
+            self._file.write(f"\n{' ' * INDENT}{json.dumps(key)}: {_dumps(campaign_dict[key], level=1)},")
+        self._file.write(f"\n{' ' * INDENT}{json.dumps(EVENTS_KEY)}: ")
+
+        self._add = self.campaign.add
+        add = self._add
+
+        def streaming_add(event, *args, **kwargs):
+            add(event, *args, **kwargs)
+            self.write_pending_events()
+
+        self.campaign.add = streaming_add
+        self.write_pending_events()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write_pending_events(self) -> None:
+        """
+        Write the events in the campaign that have not been written yet.  This is called each
+        time an event is added with campaign.add(); call it directly after adding events in
+        other ways.
+        """
+        events = self.campaign.campaign_dict[EVENTS_KEY]
+        for event in events[self._num_events_kept:]:
+            separator = "[" if self.num_events_written == 0 else ","
+            self._file.write(f"{separator}\n{' ' * (INDENT * 2)}{_dumps(event, level=2)}")
+            self.num_events_written += 1
+        if self.keep_events:
+            self._num_events_kept = len(events)
+        else:
+            events.clear()
+
+    def close(self) -> None:
+        """
+        Write the remaining events and the rest of the campaign and close the file.  If this
+        fails, the file is deleted.
+        """
+        if self._file is None:
+            return
+        try:
+            self.write_pending_events()
+            self._file.write("[]" if self.num_events_written == 0 else f"\n{' ' * INDENT}]")
+
+            campaign_dict = self.campaign.campaign_dict
+            keys_before_events = sorted(key for key in campaign_dict if key < EVENTS_KEY)
+            if keys_before_events != self._keys_before_events:
+                raise ValueError(f"The campaign keys {keys_before_events} changed after the writer started.")
+            for key in sorted(key for key in campaign_dict if key > EVENTS_KEY):
+                self._file.write(f",\n{' ' * INDENT}{json.dumps(key)}: {_dumps(campaign_dict[key], level=1)}")
+            self._file.write("\n}")
+        except BaseException:
+            self.abort()
+            raise
+        self.campaign.add = self._add
+        self._file.close()
+        self._file = None
+
+    def abort(self) -> None:
+        """
+        Stop writing and delete the file.  This is done when the with-block raises an exception
+        so that a campaign that was not completely built is never left looking like a valid file.
+        """
+        if self._file is None:
+            return
+        try:
+            self.campaign.add = self._add
+            self._file.close()
+        finally:
+            self._file = None
+            Path(self.filename).unlink(missing_ok=True)
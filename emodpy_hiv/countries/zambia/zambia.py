@@ -1,13 +1,13 @@
 from importlib import resources
 from pathlib import Path
-from typing import List, Union
-import copy
+from typing import Dict, List, Tuple, Union
 
 import pandas as pd
 
 import emod_api
 from emod_api.schema_to_class import ReadOnlyDict
 
+import emodpy_hiv
 import emodpy_hiv.countries.zambia as zambia_data
 from emodpy_hiv.country_model import Country
 
@@ -16,6 +16,7 @@ import emodpy_hiv.demographics.infer_natural_mortality as infer
 from emodpy_hiv.demographics.hiv_demographics import HIVDemographics
 from emodpy_hiv.demographics.relationship_types import RelationshipTypes
 from emodpy_hiv.demographics.risk_groups import RiskGroups
+from emodpy_hiv.demographics.year_age_rate import YearAgeRate
 from emodpy_hiv.parameterized_call import ParameterizedCall
 from emodpy_hiv.reporters.reporters import (Reporters, ReportFilter, ReportHIVInfection, ReportHIVART,
                                             ReportHIVMortality, ReportHIVByAgeAndGender,
@@ -76,7 +77,8 @@ class Zambia(Country):
 
     country_name = "Zambia"
     _historical_vmmc_data_file = resources.files(zambia_data).joinpath("historical_vmmc_data.csv")
-    _inital_demog_cache = None
+    _initial_demog_inputs = None
+    _DEMOGRAPHICS_INPUTS_VERSION = 1  # increase it when the saved demographics inputs change
 
     @classmethod
     def initialize_config(cls, schema_path: Union[str, Path]) -> ReadOnlyDict:
@@ -464,34 +466,80 @@ class Zambia(Country):
 
         Constructs a multi-node HIVDemographics with 10 provincial nodes, UN World Population
         mortality data, age distributions, concurrency parameters, and risk-group assignments.
-        The result is cached after the first call to avoid re-reading large data files on
+        The data read from the large UN World Population files is cached after the first call,
+        in this process and on disk for other processes, to avoid re-reading the files on
         repeated invocations.
 
         Returns:
             HIVDemographics: Fully configured demographics object for Zambia.
         """
-        import emodpy_hiv.demographics.un_world_pop as unwp
-
         # ------------------------------------------------------------------------------------
-        # --- The spreadsheets are large and reading/loading them can take many seconds.
-        # --- Hence, we cache the initial instance of the demographics so that new versions
-        # --- don't have re-read the spreadsheets.
+        # --- Each call builds a new demographics object from the cached inputs.  This is
+        # --- cheaper than a deep copy and the YearAgeRate inputs are never modified.
         # ------------------------------------------------------------------------------------
-        if cls._inital_demog_cache:
-            return copy.deepcopy(cls._inital_demog_cache)
+        inputs = cls._get_demographics_inputs()
+
+        demog = HIVDemographics.from_year_age_rate_data(pop_df=pd.DataFrame(NODE_DATA),
+                                                        age_distribution_yar=inputs["age_distribution_yar"],
+                                                        fertility_yar=inputs["fertility_yar"],
+                                                        male_mortality_yar=inputs["male_mortality_yar"],
+                                                        female_mortality_yar=inputs["female_mortality_yar"],
+                                                        society=None)
+        return demog
 
-        # -------------------------------------------------------
-        # --- Initial population has data for different nodes so
-        # --- we can get use data from UN World Pop
-        # -------------------------------------------------------
-        pop_df = pd.DataFrame(NODE_DATA)
+    @classmethod
+    def _get_demographics_inputs(cls) -> Dict[str, YearAgeRate]:
+        """
+        Return the YearAgeRate data used to build the demographics.
+
+        The spreadsheets are large and reading them and inferring the natural mortality can take
+        many seconds.  Hence, the inputs are cached in this process and saved into the UN World
+        Pop cache directory (see emodpy_hiv.demographics.un_world_pop_cache) so that other
+        processes - i.e. the workers of a calibration - only need to load them.
+        """
+        if cls._initial_demog_inputs is not None:
+            return cls._initial_demog_inputs
+
+        import emodpy_hiv.demographics.un_world_pop as unwp
+        import emodpy_hiv.demographics.un_world_pop_cache as un_cache
 
         uwp_country = "Zambia"
         uwp_version = "2015"
+        uwp_year = 1960
+        interval_fit = (1950, 1975)
+
+        # ---------------------------------------------------------------------------------
+        # --- The key includes the content of the WPP data and the versions of the code that
+        # --- derives the inputs so a change to either does not reuse stale inputs.
+        # ---------------------------------------------------------------------------------
+        source_filenames = [unwp._get_population_filename(version=uwp_version),
+                            unwp._get_fertility_filename(version=uwp_version),
+                            unwp._get_mortality_filename(version=uwp_version, gender="male"),
+                            unwp._get_mortality_filename(version=uwp_version, gender="female")]
+        key_items = ["demographics_inputs", emodpy_hiv.__version__, str(cls._DEMOGRAPHICS_INPUTS_VERSION),
+                     f"infer_natural_mortality_v{infer.ALGORITHM_VERSION}", un_cache.get_source_hash(source_filenames),
+                     uwp_country, uwp_version, str(uwp_year), str(interval_fit)]
+        dfs = un_cache.load_entry(key_items)
+        if dfs is None:
+            inputs = cls._read_demographics_inputs(uwp_country, uwp_version, uwp_year, interval_fit)
+            un_cache.save_entry(key_items, {name: yar.df for name, yar in inputs.items()})
+        else:
+            inputs = {name: YearAgeRate(df=df) for name, df in dfs.items()}
+
+        cls._initial_demog_inputs = inputs
+        return inputs
+
+    @classmethod
+    def _read_demographics_inputs(cls,
+                                  uwp_country: str,
+                                  uwp_version: str,
+                                  uwp_year: int,
+                                  interval_fit: Tuple[float, float]) -> Dict[str, YearAgeRate]:
+        import emodpy_hiv.demographics.un_world_pop as unwp
 
         total_pop, age_distribution_yar = unwp.extract_population_by_age_and_distribution(country=uwp_country,
                                                                                           version=uwp_version,
-                                                                                          year=1960)
+                                                                                          year=uwp_year)
 
         fertility_yar = unwp.extract_fertility(country=uwp_country, version=uwp_version)
         male_mortality_yar = unwp.extract_mortality(country=uwp_country, version=uwp_version, gender="male")
@@ -500,19 +548,16 @@ class Zambia(Country):
         # -----------------------------------------------------------------------------------------
         # --- Need a longer fitting interval to flatten natural deaths under the peak in HIV deaths
         # -----------------------------------------------------------------------------------------
-        male_mortality_yar = infer.infer_natural_mortality(male_mortality_yar, interval_fit=(1950, 1975))
-        female_mortality_yar = infer.infer_natural_mortality(female_mortality_yar, interval_fit=(1950, 1975))
-
-        demog = HIVDemographics.from_year_age_rate_data(pop_df=pop_df,
-                                                        age_distribution_yar=age_distribution_yar,
-                                                        fertility_yar=fertility_yar,
-                                                        male_mortality_yar=male_mortality_yar,
-                                                        female_mortality_yar=female_mortality_yar,
-                                                        society=None)
-
-        cls._inital_demog_cache = copy.deepcopy(demog)
-
-        return demog
+        male_mortality_yar = infer.infer_natural_mortality(male_mortality_yar, interval_fit=interval_fit)
+        female_mortality_yar = infer.infer_natural_mortality(female_mortality_yar, interval_fit=interval_fit)
+
+        inputs = {
+            "age_distribution_yar": age_distribution_yar,
+            "fertility_yar": fertility_yar,
+            "male_mortality_yar": male_mortality_yar,
+            "female_mortality_yar": female_mortality_yar
+        }
+        return inputs
 
     @classmethod
     def _get_concurrency_parameterized_calls(cls,
@@ -3,21 +3,40 @@
 
 from abc import ABC
 from collections import defaultdict
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Dict, List, Union
+import copy
 import importlib
+import numpy as np
 import pandas as pd
 
 import emod_api
 from emod_api.schema_to_class import ReadOnlyDict
 
 import emodpy_hiv.campaign.cascade_of_care as coc
+from emodpy_hiv.campaign.profiling import profile_call
+from emodpy_hiv.campaign.schema_templates import schema_template_cache
 from emodpy.emod_task import EMODTask
 from emodpy_hiv.campaign.common import TargetGender
 from emodpy_hiv.demographics.hiv_demographics import HIVDemographics
-from emodpy_hiv.parameterized_call import ParameterizedCall
+from emodpy_hiv.parameterized_call import ParameterizedCall, apply_labeled_hyperparameters
+from emodpy_hiv.parameterized_call import _get_campaign_state_added, _get_campaign_state_lengths
+from emodpy_hiv.parameterized_call import _clear_campaign_state, _extend_campaign_state
 from emodpy_hiv.reporters.reporters import Reporters
 
+PARQUET_SUFFIXES = ['.parquet', '.pq']
+AGE_BIN_REGEX = r'^\s*\[?([^:\[]+):([^)]+)\)?\s*$'
+
+
+def _get_parameterized_call_key(parameterized_call: ParameterizedCall, base_year: float) -> Union[tuple, None]:
+    # The function, all of the arguments, and the base year of the campaign determine the events.
+    # The key is None if the arguments cannot be compared so the call is always executed.
+    memo_key = parameterized_call.get_memo_key()
+    if memo_key is None:
+        return None
+    return memo_key, parameterized_call.label, base_year
+
 
 def get_country_class(country_class_name: str):
     """
@@ -95,6 +114,22 @@ class Country(ABC):
     # set to 1960.5 so that there is time to burn-in the population and relationships.
     base_year = 1960.5
 
+    # Bool: If True, the objects that the ParameterizedCall objects create from the campaign schema
+    # are cloned from cached templates instead of walking the schema each time.  While the calls
+    # run, the schema lookups made in emodpy are routed through emodpy_hiv.campaign.schema_lookup.
+    # Set it to False to build the campaign with emod_api's lookups only.
+    use_schema_template_cache = True
+
+    # ParameterizedCallMemo: If not None, the ParameterizedCall objects executed by the build_*()
+    # methods are replayed from this memo when it has seen the same call before.  For example,
+    # `MyCountry.parameterized_call_memo = ParameterizedCallMemo(max_entries=256)`
+    parameterized_call_memo = None
+
+    # Dict: What build_campaign_incrementally() needs to reuse the events of the last build.
+    # It is only read from the class that set it (cls.__dict__) so a subclass does not reuse
+    # the events of its parent.
+    _campaign_build_cache = None
+
     def __init__(self):
         msg =  "You cannot create an instance of a Country.\n" # noqa: E222
         msg += "You must use the class as the object."
@@ -216,10 +251,16 @@ class Country(ABC):
 
     @classmethod
     def _execute_parameterized_calls_on(cls, obj, parameterized_calls: List[ParameterizedCall]):
-        for parameterized_call in parameterized_calls:
-            # Now modify the provided object (obj). obj is passed as context to each successive ParameterizedCall.
-            prepared_call = parameterized_call.prepare_call()
-            prepared_call(obj)
+        memo = cls.parameterized_call_memo
+        with schema_template_cache() if cls.use_schema_template_cache else nullcontext():
+            for parameterized_call in parameterized_calls:
+                # Now modify the provided object (obj). obj is passed as context to each successive ParameterizedCall.
+                with profile_call(name=parameterized_call.name, kind="ParameterizedCall", target=obj):
+                    if memo is not None:
+                        memo.execute(parameterized_call, obj)
+                        continue
+                    prepared_call = parameterized_call.prepare_call()
+                    prepared_call(obj)
 
     @classmethod
     def build_config(cls, config: ReadOnlyDict) -> ReadOnlyDict:
@@ -268,6 +309,73 @@ class Country(ABC):
         cls._execute_parameterized_calls_on(obj=campaign, parameterized_calls=calls)
         return campaign
 
+    @classmethod
+    def build_campaign_incrementally(cls,
+                                     campaign: emod_api.campaign,
+                                     hyperparameters: Dict[str, Any] = None) -> emod_api.campaign:
+        """
+        Build the campaign like **build_campaign()** but only execute the ParameterizedCall
+        objects whose hyperparameters changed since the last build of this country.
+
+        The events (and the signals and implicits) that each ParameterizedCall adds to the
+        campaign are recorded.  On the next build, copies of the recorded events of a call whose
+        function, label, arguments, and campaign base year are unchanged are spliced back into the
+        campaign in the same order instead of calling it again.  This is intended for calibrations
+        where each sample only changes a few of the hyperparameters.
+
+        Args:
+            campaign(emod_api.campaign): The emod_api campaign object to be modified.
+            hyperparameters: A dictionary of labeled hyperparameter names (see
+                ParameterizedCall.labeled_hyperparameters) to the values for this build.
+                Hyperparameters that are not given keep their default values.
+
+        Returns:
+            a campaign object
+
+        Raises:
+            ValueError: If a hyperparameter is not used by any of the campaign ParameterizedCalls.
+        """
+        cache = cls.__dict__.get("_campaign_build_cache")
+        if (cache is None) or (cache["schema_path"] != campaign.schema_path) or (campaign.get_schema() is None) \
+                or (cache["class_base_year"] != cls.base_year):
+            campaign = cls.initialize_campaign(schema_path=campaign.schema_path)
+            cache = {"schema_path": campaign.schema_path,
+                     "class_base_year": cls.base_year,
+                     "base_year": campaign.base_year,
+                     "initial_state": _get_campaign_state_added(campaign, lengths=defaultdict(int)),
+                     "records": []}
+        else:
+            # Start from the state of a freshly initialized campaign without reloading the schema
+            _clear_campaign_state(campaign)
+            _extend_campaign_state(campaign, added=cache["initial_state"])
+            campaign.base_year = cache["base_year"]
+
+        calls = cls.get_campaign_parameterized_calls(campaign=campaign)
+        unused = apply_labeled_hyperparameters(calls, {} if hyperparameters is None else hyperparameters)
+        if len(unused) > 0:
+            raise ValueError(f"The following hyperparameters are not used by the campaign of {cls.__name__}: {unused}")
+
+        records = cache["records"]
+        new_records = []
+        for index, parameterized_call in enumerate(calls):
+            # ---------------------------------------------------------------------------------
+            # --- The records are copies so that changes to the events of this build (i.e. when
+            # --- the campaign is saved) do not change the events of later builds.
+            # ---------------------------------------------------------------------------------
+            key = _get_parameterized_call_key(parameterized_call, base_year=campaign.base_year)
+            if (key is not None) and (index < len(records)) and (records[index][0] == key):
+                _extend_campaign_state(campaign, added=copy.deepcopy(records[index][1]))
+                new_records.append(records[index])
+            else:
+                lengths = _get_campaign_state_lengths(campaign)
+                cls._execute_parameterized_calls_on(obj=campaign, parameterized_calls=[parameterized_call])
+                added = _get_campaign_state_added(campaign, lengths=lengths)
+                new_records.append((key, copy.deepcopy(added)))
+
+        cache["records"] = new_records
+        cls._campaign_build_cache = cache
+        return campaign
+
     #
     # common functions used for building campaign ParameterizedCalls below
     #
@@ -278,26 +386,47 @@ class Country(ABC):
         Load target distribution data into a dataframe format that works for Nchooser and group by node_id.
 
         Args:
-            file_path: path to the csv file that contains the data
+            file_path: path to the csv file that contains the data.  Files ending in '.parquet' or '.pq'
+                are read with pandas.read_parquet(), which requires pyarrow or fastparquet.  The columns
+                are node_set, year, age_bin (e.g. '[15:50)'), and n_circumcisions.
 
         Returns:
             dict: a dictionary that has node_id as the key and a dataframe as the value. The dataframe contains the
             distribution data for Nchooser.
 
         """
-        data = pd.read_csv(file_path)
+        if Path(file_path).suffix.lower() in PARQUET_SUFFIXES:
+            data = pd.read_parquet(file_path, columns=['node_set', 'year', 'age_bin', 'n_circumcisions'])
+        else:
+            data = pd.read_csv(file_path)
         data_dict = defaultdict(pd.DataFrame)
-        for node_id in pd.unique(data['node_set']):
-            node_data = data[data['node_set'] == node_id]
-            node_dict = {'year': [], 'min_age': [], 'max_age': [], 'n_circumcisions': []}
-            for year in pd.unique(node_data['year']):
-                year_data = node_data[node_data['year'] == year]
-                for _, row in year_data.iterrows():
-                    node_dict['year'].append(year)
-                    node_dict['min_age'].append(float(row['age_bin'].split(':')[0].replace('[', '')))
-                    node_dict['max_age'].append(float(row['age_bin'].split(':')[1].replace(')', '')) - 0.00001)
-                    node_dict['n_circumcisions'].append(int(row['n_circumcisions']))
-            data_dict[int(node_id)] = pd.DataFrame(node_dict)
+        if data.empty:
+            return data_dict
+
+        # age_bin is a half-open range of ages, '[min_age:max_age)'
+        ages = data['age_bin'].astype(str).str.extract(AGE_BIN_REGEX)
+        invalid = ages.isna().any(axis=1)
+        if invalid.any():
+            raise ValueError(f"Expected age_bin values like '[15:50)' in {file_path}. "
+                             f"Got: {data.loc[invalid, 'age_bin'].unique().tolist()}")
+        min_age = ages[0].astype(float).to_numpy()
+        max_age = ages[1].astype(float).to_numpy() - 0.00001
+
+        # Order the rows by node and then year, both in the order they first appear, and keep
+        # the order of the rows within a year.
+        node_codes, node_ids = pd.factorize(data['node_set'])
+        year_codes = data.groupby(['node_set', 'year'], sort=False).ngroup().to_numpy()
+        order = np.lexsort((year_codes, node_codes))
+        years = data['year'].to_numpy()
+        n_circumcisions = data['n_circumcisions'].to_numpy().astype('int64')
+
+        node_starts = np.flatnonzero(np.diff(node_codes[order])) + 1
+        for rows in np.split(order, node_starts):
+            node_id = int(node_ids[node_codes[rows[0]]])
+            data_dict[node_id] = pd.DataFrame({'year': years[rows],
+                                               'min_age': min_age[rows],
+                                               'max_age': max_age[rows],
+                                               'n_circumcisions': n_circumcisions[rows]})
         return data_dict
 
     @classmethod
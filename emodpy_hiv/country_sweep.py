@@ -0,0 +1,129 @@
+"""
+Materialize the EMOD input files (config, campaign, and demographics) for many
+hyperparameter samples of a Country model at once.
+
+A calibration produces a long list of samples where each sample is a dictionary of
+labeled hyperparameters (see ParameterizedCall.labeled_hyperparameters).  Building
+each sample serially through Country.build_config(), build_demographics(), and
+build_campaign() repeats the parameter-independent work (reading the schema, creating
+the initial demographics) for every sample.  The functions here do that work once in
+the parent process and then fan the samples out to a pool of forked worker processes.
+"""
+import copy
+import json
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from emodpy_hiv.country_model import Country
+from emodpy_hiv.parameterized_call import apply_labeled_hyperparameters
+
+CONFIG_FILENAME       = "config.json"        # Noqa: E221
+CAMPAIGN_FILENAME     = "campaign.json"      # Noqa: E221
+DEMOGRAPHICS_FILENAME = "demographics.json"  # Noqa: E221
+
+# ------------------------------------------------------------------------------------
+# --- The parameter-independent objects shared by every sample.  They are created in
+# --- the parent before the pool is started so that forked workers inherit them.
+# ------------------------------------------------------------------------------------
+_shared_inputs = None
+
+
+class _SharedInputs:
+    def __init__(self, country: type, schema_path: Union[str, Path]):
+        self.country = country
+        self.schema_path = str(schema_path)
+        self.config = country.initialize_config(schema_path=self.schema_path)
+        self.demographics = country.initialize_demographics()
+
+        # The campaign is the emod_api.campaign module so it cannot be copied like the others.
+        # Building it once records the events of every ParameterizedCall so that the workers
+        # only need to rebuild the calls whose hyperparameters change.
+        campaign = country.initialize_campaign(schema_path=self.schema_path)
+        self.campaign = country.build_campaign_incrementally(campaign=campaign)
+
+
+def _materialize_sample(index: int, hyperparameters: Dict[str, Any], output_dir: str) -> str:
+    shared = _shared_inputs
+    country = shared.country
+
+    config = copy.deepcopy(shared.config)
+    demographics = copy.deepcopy(shared.demographics)
+
+    config_calls = country.get_config_parameterized_calls(config=config)
+    demographics_calls = country.get_demographics_parameterized_calls(demographics=demographics)
+    unused = apply_labeled_hyperparameters(config_calls + demographics_calls, hyperparameters)
+    country._execute_parameterized_calls_on(obj=config, parameterized_calls=config_calls)
+    country._execute_parameterized_calls_on(obj=demographics, parameterized_calls=demographics_calls)
+
+    # The rest belong to the campaign; unknown names raise a ValueError
+    campaign_hyperparameters = {name: hyperparameters[name] for name in unused}
+    campaign = country.build_campaign_incrementally(campaign=shared.campaign, hyperparameters=campaign_hyperparameters)
+
+    sample_dir = Path(output_dir, f"sample_{index:05d}")
+    sample_dir.mkdir(parents=True, exist_ok=True)
+    config.parameters.to_file(str(sample_dir.joinpath(CONFIG_FILENAME)))
+    campaign.save(str(sample_dir.joinpath(CAMPAIGN_FILENAME)))
+    with open(sample_dir.joinpath(DEMOGRAPHICS_FILENAME), "w") as file:
+        json.dump(demographics.to_dict(), file, indent=4, sort_keys=True)
+    return str(sample_dir)
+
+
+def _initialize_worker(country: type, schema_path: str) -> None:
+    # Forked workers already have the parent's shared inputs; spawned workers must rebuild them.
+    global _shared_inputs
+    if _shared_inputs is None:
+        _shared_inputs = _SharedInputs(country=country, schema_path=schema_path)
+
+
+def materialize_samples(country: type,
+                        schema_path: Union[str, Path],
+                        samples: List[Dict[str, Any]],
+                        output_dir: Union[str, Path],
+                        processes: int = None) -> List[str]:
+    """
+    Write the config, campaign, and demographics JSON files of a Country model for each
+    sample of hyperparameters.  Sample i is written to <output_dir>/sample_<i>/ using the
+    filenames config.json, campaign.json, and demographics.json.
+
+    The parameter-independent objects (the default config built from the schema, the
+    initial demographics, and the events of the default campaign) are created once in this process and shared with the worker processes.
+
+    Args:
+        country: The Country subclass (the class, not an instance) to build the files for.
+        schema_path: The path to the schema of the EMOD executable.
+        samples: A list of dictionaries of labeled hyperparameter names to values.  Each
+            name must be one of the labeled_hyperparameters of the config, demographics, or
+            campaign ParameterizedCall objects of the country.  Hyperparameters that are
+            not given keep their default values.
+        output_dir: The directory to write the sample directories into.
+        processes: The number of worker processes.  If None, use os.cpu_count().  If 1,
+            the samples are built in this process.
+
+    Returns:
+        The list of sample directories in the same order as samples.
+    """
+    global _shared_inputs
+    if not (isinstance(country, type) and issubclass(country, Country)):
+        raise ValueError(f"country must be a subclass of Country, not {country}")
+
+    processes = os.cpu_count() if processes is None else processes
+    processes = max(1, min(processes, len(samples)))
+    output_dir = str(output_dir)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    _shared_inputs = _SharedInputs(country=country, schema_path=schema_path)
+    try:
+        tasks = [(index, hyperparameters, output_dir) for index, hyperparameters in enumerate(samples)]
+        if processes == 1:
+            return [_materialize_sample(*task) for task in tasks]
+
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(processes=processes,
+                          initializer=_initialize_worker,
+                          initargs=(country, str(schema_path))) as pool:
+            return pool.starmap(_materialize_sample, tasks)
+    finally:
+        _shared_inputs = None
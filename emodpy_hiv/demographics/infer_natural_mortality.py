@@ -1,16 +1,14 @@
-import pandas as pd
 import numpy as np
-from functools import reduce
 import argparse
 
-from sklearn.pipeline import make_pipeline
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-
 from emodpy_hiv.demographics.year_age_rate import YearAgeRate
 import emodpy_hiv.demographics.year_age_rate as year_age_rate
 import emodpy_hiv.demographics.un_world_pop as unwp
 
+# The version of the inference algorithm.  Increase it when a change gives different rates so
+# that saved results (i.e. the cached demographics inputs of a country) are not reused.
+ALGORITHM_VERSION = 2
+
 
 def infer_natural_mortality(year_age_rate_data: YearAgeRate,
                             interval_fit: tuple[float, float] = None,
@@ -22,27 +20,21 @@ def infer_natural_mortality(year_age_rate_data: YearAgeRate,
     but shortly after the 'interval_fit' there was a spike in mortality. The algorithm uses
     the data in the 'interval_fit' and extrapolates it out over the time period.
 
-    It assumes that the input data is for only one node.
+    A log-linear trend is fit for each node and age.  All of the trends are fit at once with the
+    closed-form least-squares solution over the node x year x age array of the YearAgeRate object,
+    so data with many nodes is inferred in one call.
 
     Args:
         year_age_rate_data (YearAgeRate): This is a YearAgeRate data object containing the raw mortality data,
-            probably output from the **extract_mortality()** function
+            probably output from the **extract_mortality()** function.  It can have data for multiple nodes.
         interval_fit (tuple[float, float]): This tuple contains the range of years that we want to determine the
             mortality trend before the HIV epidemic. These years will be extrapolated
             from the end of the fit forward.
         predict_horizon (float): This determines how far out the data will be extrapolated.
 
     Returns:
-        A YearAgeRate object with the inferred mortality rates.
+        A YearAgeRate object with the inferred mortality rates for each node.
     """
-
-    if len(year_age_rate_data.df[YearAgeRate.COL_NAME_NODE_ID].unique().tolist()) != 1:
-        node_id_list = year_age_rate_data.df[YearAgeRate.COL_NAME_NODE_ID].unique().tolist()
-        msg  =  "Invalid number of nodes in the YearAgeRate object.\n"         # noqa: E221, E222
-        msg +=  "The algorithm currently only supports one node at a time.\n"  # noqa: E222
-        msg += f"The input has the following nodes: {node_id_list}"
-        raise ValueError(msg)
-
     if interval_fit is None:
         interval_fit = (1970, 1980)
     elif interval_fit[1] <= interval_fit[0]:
@@ -56,106 +48,63 @@ def infer_natural_mortality(year_age_rate_data: YearAgeRate,
         msg += f"The 'predicted_horizon' (={predict_horizon}) must be greater than\n"
         msg += f"the second value of the 'interval_fit[1]' (={interval_fit[1]})."
 
-    df_mort = year_age_rate_data.df.copy()
-
-    # ---------------------------------------------------
-    # --- Log transform the data and sort by year and age
-    # ---------------------------------------------------
-    df_mort[YearAgeRate.COL_NAME_RATE] = df_mort[YearAgeRate.COL_NAME_RATE].apply(lambda x: np.log(x))
-    df_mort.sort_values([YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE], inplace=True)
-
-    # -------------------------------------------------------------------
-    # --- Extract the data for that exists BEFORE the reference interval.
-    # --- Do not include any data from the interval
-    # --- inclusive=left means the right is not inclusive.
-    # -------------------------------------------------------------------
-    min_year_col = df_mort[YearAgeRate.COL_NAME_MIN_YEAR]
-    df_before_time = df_mort[min_year_col.between(0, interval_fit[0], inclusive='left')].copy()
-
-    # -------------------------------------------------------------------------
-    # --- Get list of ages to extrapolate the data for and setup the dataframe
-    # -------------------------------------------------------------------------
-    age_list = df_mort[YearAgeRate.COL_NAME_MIN_AGE].unique().tolist()
-    df_mort.set_index([YearAgeRate.COL_NAME_MIN_AGE], inplace=True)
-
-    df_list = []
-    for age in age_list:
-        tmp_data = df_mort.loc[age, :]
-        extrap_model = make_pipeline(StandardScaler(with_mean=False), LinearRegression())
-
-        # -------------------------------------------------------------------------------------------------
-        # --- Get the data (log(rate)) for the reference interval and from the beginning of the reference
-        # --- interval all the way to the end of the prediction.
-        # -------------------------------------------------------------------------------------------------
-        min_year_col = tmp_data[YearAgeRate.COL_NAME_MIN_YEAR]
-        first_extrap_df = tmp_data[min_year_col.between(interval_fit[0], interval_fit[1])]
-        xx              = tmp_data[min_year_col.between(interval_fit[0], predict_horizon)].values[:, 1] # noqa: E221
-
-        # ----------------------------------------------------------------------------------------
-        # --- Have the model fit the reference interval and then use that to predict the interval
-        # --- from the beginning of the reference interval to the end.
-        # ----------------------------------------------------------------------------------------
-        values = first_extrap_df.values
-        extrap_model.fit(values[:, 1].reshape(-1, 1), values[:, 2])
-        extrap_predictions = extrap_model.predict(xx.reshape(-1, 1))
-
-        # ----------------------------------------------------
-        # --- Create a new dataframe with the new predictions
-        # ----------------------------------------------------
-        extrap_dict = {
-            YearAgeRate.COL_NAME_MIN_AGE: age,
-            YearAgeRate.COL_NAME_MIN_YEAR: xx,
-            'Extrap': extrap_predictions
-        }
-        loc_df = pd.DataFrame.from_dict(extrap_dict)
-        loc_df.set_index([YearAgeRate.COL_NAME_MIN_AGE, YearAgeRate.COL_NAME_MIN_YEAR], inplace=True)
-
-        df_list.append(loc_df.copy())
-
-    # ---------------------------------------------------------------
-    # --- Concatenate the dataframes from the different ages together
-    # ---------------------------------------------------------------
-    df_e1 = pd.concat(df_list, axis=0)
-
-    # -----------------------------------------------------------
-    # --- Merge this datafame with the predictions with original
-    # -----------------------------------------------------------
-    df_list_final = [df_mort, df_e1]
-    df_total = reduce(lambda left, right: pd.merge(left, right, on=[YearAgeRate.COL_NAME_MIN_AGE, YearAgeRate.COL_NAME_MIN_YEAR]), df_list_final)
-    df_total = df_total.reset_index(inplace=False).set_index([YearAgeRate.COL_NAME_MIN_AGE], inplace=False)
-
-    # ----------------------------------------------
-    # --- Convert the data to rates from log(rates)
-    # ----------------------------------------------
-    df_total['Extrap'] = df_total['Extrap'].apply(np.exp)
-    df_total['Data'] = df_total[YearAgeRate.COL_NAME_RATE].apply(np.exp)
-
-    # ------------------------------------------------------------------
-    # --- Convert the before time data to rates from log(rates) and
-    # --- combine the data into one dataframe for the entire time period
-    # ------------------------------------------------------------------
-    df_before_time['Data'] = df_before_time[YearAgeRate.COL_NAME_RATE].apply(np.exp)
-    df_before_time.set_index([YearAgeRate.COL_NAME_MIN_AGE], inplace=True)
-    df_total = pd.concat([df_total, df_before_time], axis=0, join='outer', sort=True)
-    df_total.reset_index(inplace=True)
-    df_total.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE], inplace=True)
-
-    # ----------------
-    # --- Replace NaNs
-    # ----------------
-    def min_not_nan(x_list):
-        loc_in = list(filter(lambda x: not np.isnan(x), x_list))
-        return np.min(loc_in)
-    df_total[YearAgeRate.COL_NAME_RATE] = df_total[['Data', 'Extrap']].apply(min_not_nan, axis=1)
-
-    # ------------------------------------------------------
-    # --- Convert dataframe to one suitable for YearAgeRate
-    # ------------------------------------------------------
-    df_total.drop(columns=['Data', 'Extrap'], inplace=True)
-    df_total = df_total[YearAgeRate.COL_NAMES]
-    df_total.sort_values(by=YearAgeRate.SORT_BY_COLUMNS, inplace=True)
-
-    return YearAgeRate(df=df_total)
+    yar = year_age_rate_data
+    years = yar._min_years.astype(np.float64)
+
+    # ---------------------------------------------------------------------------------
+    # --- Select the data of each node in the reference interval (inclusive) to fit to
+    # ---------------------------------------------------------------------------------
+    in_fit = yar._has_year & ((interval_fit[0] <= years) & (years <= interval_fit[1]))[np.newaxis, :]
+    num_fit = in_fit.sum(axis=1)
+    if np.any(num_fit == 0):
+        node_id_list = yar._node_ids[num_fit == 0].tolist()
+        msg  =  "Invalid 'interval_fit' values.\n" # noqa: E221, E222
+        msg += f"The following nodes do not have data between {interval_fit[0]} and {interval_fit[1]}: {node_id_list}"
+        raise ValueError(msg)
+
+    # -----------------------------------------------------------------------------------
+    # --- The trend is fit to log(rate) so the rates in the interval must be positive.
+    # --- Rates of zero outside of the interval stay zero.
+    # -----------------------------------------------------------------------------------
+    in_fit_rates = in_fit[:, :, np.newaxis] & yar._has_age[:, np.newaxis, :]
+    is_invalid = in_fit_rates & ~(yar._rates > 0.0)
+    if np.any(is_invalid):
+        node_indexes, year_indexes, age_indexes = np.nonzero(is_invalid)
+        msg  =  "Invalid mortality rates.\n" # noqa: E221, E222
+        msg += f"The rates between {interval_fit[0]} and {interval_fit[1]} must be greater than zero.\n"
+        msg += "The following (node_id, min_year, min_age) have rates that are not: "
+        msg += f"{list(zip(yar._node_ids[node_indexes].tolist(), yar._min_years[year_indexes].tolist(), yar._min_ages[age_indexes].tolist()))}"
+        raise ValueError(msg)
+
+    with np.errstate(divide="ignore"):
+        log_rates = np.log(yar._rates)
+
+    # -----------------------------------------------------------------------------------
+    # --- Least-squares fit of log(rate) = intercept + slope * year for each node and age
+    # -----------------------------------------------------------------------------------
+    mean_x = np.where(in_fit, years[np.newaxis, :], 0.0).sum(axis=1) / num_fit
+    mean_y = np.where(in_fit[:, :, np.newaxis], log_rates, 0.0).sum(axis=1) / num_fit[:, np.newaxis]
+    dx = np.where(in_fit, years[np.newaxis, :] - mean_x[:, np.newaxis], 0.0)
+    dy = np.where(in_fit[:, :, np.newaxis], log_rates - mean_y[:, np.newaxis, :], 0.0)
+    sxx = (dx * dx).sum(axis=1)
+    sxy = np.einsum("ny,nya->na", dx, dy)
+    slope = np.divide(sxy, sxx[:, np.newaxis], out=np.zeros_like(sxy), where=(sxx > 0)[:, np.newaxis])
+    intercept = mean_y - slope * mean_x[:, np.newaxis]
+
+    # ------------------------------------------------------------------------------------
+    # --- Keep the data BEFORE the reference interval.  From the beginning of the reference
+    # --- interval to the prediction horizon, use the smaller of the data and the trend.
+    # --- Years outside of these ranges are dropped.
+    # ------------------------------------------------------------------------------------
+    data = np.exp(log_rates)
+    extrap = np.exp(intercept[:, np.newaxis, :] + slope[:, np.newaxis, :] * years[np.newaxis, :, np.newaxis])
+    is_before = (0 <= years) & (years < interval_fit[0])
+    is_predicted = (interval_fit[0] <= years) & (years <= predict_horizon)
+    rates = np.where(is_predicted[np.newaxis, :, np.newaxis], np.fmin(data, extrap), data)
+    has_year = yar._has_year & (is_before | is_predicted)[np.newaxis, :]
+
+    return YearAgeRate._from_arrays(yar._node_ids, yar._min_years, yar._min_ages,
+                                    rates, has_year, yar._has_age)
 
 
 def mortality_read_infer_plot(country: str,
@@ -2,12 +2,18 @@
 This module contains methods for extracting data from [UN World Population files](https://population.un.org/wpp/).
 
 These methods output dataframes that can be used to initialize Demographic objects in EMOD.
+The data of the packaged files is read from a binary bundle when it is available
+(see emodpy_hiv.demographics.un_world_pop_bundle).  Other files are parsed with Excel and the
+parsed sheets are cached on disk so that reading the same file again is fast
+(see emodpy_hiv.demographics.un_world_pop_cache).
 """
-from typing import Union
+from typing import Dict, List, Tuple, Union
 from pathlib import Path
 from importlib import resources
 import pandas as pd
 from emodpy_hiv.demographics.year_age_rate import YearAgeRate
+import emodpy_hiv.demographics.un_world_pop_cache as un_cache
+import emodpy_hiv.demographics.un_world_pop_bundle as un_bundle
 import emodpy_hiv.countries.un_world_pop_data as un_data
 
 
@@ -91,6 +97,8 @@ def _check_country(country, possible_countries, filename):
 
 
 def _check_filename(filename):
+    if un_bundle.contains(filename):
+        return
     if (isinstance(filename, Path) and not filename.exists()) or (isinstance(filename, str) and not Path(filename).exists()):
         raise ValueError(f"{filename} - The file does not exist.\nThe World Population files are not included in "
                          f"this package and must be downloaded from 'https://github.com/EMOD-Hub/emodpy-hiv/tree/main/emodpy_hiv/countries/un_world_pop_data' "
@@ -103,6 +111,37 @@ def _check_years(years, possible_years, filename):
             raise ValueError(f"'year'= '{year}' is not supported.\nThe file,\n{filename},\nonly supports the following years:\n{possible_years}")
 
 
+def _read_sheet(filename, sheet, cols_to_read):
+    # The WPP files have 16 rows of notes before the header row.
+    return un_cache.read_excel(filename, sheet_name=sheet, skiprows=16, usecols=cols_to_read)
+
+
+def _read_country_rows(filename: Union[str, Path],
+                       cols_to_read_by_sheet: Dict[str, List[str]],
+                       country_col: str,
+                       countries: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Read each sheet once, keep the rows for the given countries, and split them by country.
+    The rows of each country are in sheet order and then in the order they are in the sheet.
+    """
+    df_list = []
+    for sheet, cols_to_read in cols_to_read_by_sheet.items():
+        if un_bundle.contains(filename, sheet):
+            possible_countries = un_bundle.get_countries(filename, sheet)
+            df_sheet = un_bundle.read_sheet(filename, sheet, cols_to_read, countries)
+        else:
+            df_sheet = _read_sheet(filename, sheet, cols_to_read)
+            possible_countries = df_sheet[country_col].unique()
+            df_sheet = df_sheet[df_sheet[country_col].isin(countries)]
+        for country in countries:
+            _check_country(country, possible_countries, filename)
+        df_list.append(df_sheet)
+    df = pd.concat(df_list)
+
+    country_to_df = {country: df_country for country, df_country in df.groupby(country_col, sort=False)}
+    return country_to_df
+
+
 def extract_population_by_age(country: str,
                               version: str,
                               years: list[float],
@@ -136,6 +175,17 @@ def extract_population_by_age(country: str,
     Returns:
         (pandas.DataFrame): It will return a pandas DataFrame where each row is a year and the columns are for an age range.
     """
+    return _extract_population_by_age(countries=[country], version=version, years=years, filename=filename)[country]
+
+
+def _extract_population_by_age(countries: List[str],
+                               version: str,
+                               years: list[float],
+                               filename: Union[str, Path] = None) -> Dict[str, pd.DataFrame]:
+    """
+    See **extract_population_by_age()**. The data of each sheet is read once for all of the
+    countries and the returned dictionary has a dataframe for each country.
+    """
     if filename is None:
         filename = _get_population_filename(version)
     _check_filename(filename)
@@ -203,76 +253,75 @@ def extract_population_by_age(country: str,
     # --------------------------------
     # --- Extract data from the sheets
     # --------------------------------
-    df = pd.DataFrame()
+    cols_to_read_by_sheet = {}
     for sheet in sheet_list:
         cols_to_read = [COUNTRY_COL, PERIOD_COL]
         if "estimate" in sheet.lower():
             cols_to_read.extend(age_cols)
         else:
             cols_to_read.extend(medium_cols)
-
-        df_sheet = pd.read_excel(filename,
-                                 sheet_name=sheet,
-                                 skiprows=16,
-                                 usecols=cols_to_read,
-                                 engine="calamine")
-        _check_country(country, df_sheet[COUNTRY_COL].unique(), filename)
-        df_sheet = df_sheet[df_sheet[COUNTRY_COL] == country]
-        df = pd.concat([df, df_sheet])
-    df = df.drop(COUNTRY_COL, axis=1)
-
-    # -----------------------------------
-    # --- Get the rows of data we want
-    # -----------------------------------
-    _check_years(years, df[PERIOD_COL].unique(), filename)
-    df = df[df[PERIOD_COL].isin(years)]
-
-    # ---------------------------------------------------------------
-    # --- In the 2012, 2015 data, the Estimates sheet has this "80+" column
-    # --- that can be used instead of the 80-84, etc columns.
-    # --- NOTE: This is crappy logic, but I need to move on.
-    # ---------------------------------------------------------------
-    if version == "2012" or version == "2015":
-        val = df[AGE_80_PLUS].iloc[0]
-        has_80p = isinstance(val, float) or isinstance(val, int)
-        if has_80p:
-            df = df.drop([AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100], axis=1)
-            for col in [AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100]:
-                age_cols.remove(col)
-        else:
-            df = df.drop(AGE_80_PLUS, axis=1)
-            age_cols.remove(AGE_80_PLUS)
-
-    # -----------------------------------------------------------
-    # --- rename the age columns so they are just the minimum age
-    # -----------------------------------------------------------
-    new_col_names = {}
-    for col in age_cols:
-        if col == AGE_80_PLUS:
-            new_col_names[col] = "80"
-        elif len(col) == 3:
-            new_col_names[col] = col[0:1]
-        elif len(col) == 5:
-            new_col_names[col] = col[0:2]
-        else:
-            new_col_names[col] = col[0:3]
-    df.rename(columns=new_col_names, inplace=True)
-
-    # ------------------------------------------------------------------
-    # --- Some columns can have the "...".  This changes those to zeros.
-    # --- (This could go away with the 80+ handling.)
-    # ------------------------------------------------------------------
-    #  df[year] = ( pd.to_numeric(df[year], errors='coerce' ).fillna(0) )
-
-    # -----------------------------------------------------------------
-    # --- The data is in thousands of people so multiply by 1000
-    # --- and convert to integer since we want the value as an integer.
-    # -----------------------------------------------------------------
-    for column in df.columns:
-        if column != PERIOD_COL:
-            df[column] = df[column] * 1000
-
-    return df
+        cols_to_read_by_sheet[sheet] = cols_to_read
+    country_to_df = _read_country_rows(filename, cols_to_read_by_sheet, COUNTRY_COL, countries)
+
+    country_to_pop_df = {}
+    for country in countries:
+        df = country_to_df[country].drop(COUNTRY_COL, axis=1)
+        country_age_cols = age_cols.copy()
+
+        # -----------------------------------
+        # --- Get the rows of data we want
+        # -----------------------------------
+        _check_years(years, df[PERIOD_COL].unique(), filename)
+        df = df[df[PERIOD_COL].isin(years)]
+
+        # ---------------------------------------------------------------
+        # --- In the 2012, 2015 data, the Estimates sheet has this "80+" column
+        # --- that can be used instead of the 80-84, etc columns.
+        # --- NOTE: This is crappy logic, but I need to move on.
+        # ---------------------------------------------------------------
+        if version == "2012" or version == "2015":
+            val = df[AGE_80_PLUS].iloc[0]
+            has_80p = isinstance(val, float) or isinstance(val, int)
+            if has_80p:
+                df = df.drop([AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100], axis=1)
+                for col in [AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100]:
+                    country_age_cols.remove(col)
+            else:
+                df = df.drop(AGE_80_PLUS, axis=1)
+                country_age_cols.remove(AGE_80_PLUS)
+
+        # -----------------------------------------------------------
+        # --- rename the age columns so they are just the minimum age
+        # -----------------------------------------------------------
+        new_col_names = {}
+        for col in country_age_cols:
+            if col == AGE_80_PLUS:
+                new_col_names[col] = "80"
+            elif len(col) == 3:
+                new_col_names[col] = col[0:1]
+            elif len(col) == 5:
+                new_col_names[col] = col[0:2]
+            else:
+                new_col_names[col] = col[0:3]
+        df.rename(columns=new_col_names, inplace=True)
+
+        # ------------------------------------------------------------------
+        # --- Some columns can have the "...".  This changes those to zeros.
+        # --- (This could go away with the 80+ handling.)
+        # ------------------------------------------------------------------
+        #  df[year] = ( pd.to_numeric(df[year], errors='coerce' ).fillna(0) )
+
+        # -----------------------------------------------------------------
+        # --- The data is in thousands of people so multiply by 1000
+        # --- and convert to integer since we want the value as an integer.
+        # -----------------------------------------------------------------
+        for column in df.columns:
+            if column != PERIOD_COL:
+                df[column] = df[column] * 1000
+
+        country_to_pop_df[country] = df
+
+    return country_to_pop_df
 
 
 def extract_population_by_age_for_ingest_form(filename, country, version, years, gender):
@@ -329,6 +378,22 @@ def extract_population_by_age_and_distribution(country: str,
         (float): The total population for the given year
         (YearAgeRate): A YearAgeRate object where the "rate" column contains the fraction of people in that particular year and age ranges.
     """
+    country_to_year_data = _extract_population_by_age_and_distribution(countries=[country],
+                                                                       version=version,
+                                                                       years=[year],
+                                                                       filename=filename)
+    return country_to_year_data[country][year]
+
+
+def _extract_population_by_age_and_distribution(countries: List[str],
+                                                version: str,
+                                                years: List[int],
+                                                filename: Union[str, Path] = None) -> Dict[str, Dict[int, Tuple[int, YearAgeRate]]]:
+    """
+    See **extract_population_by_age_and_distribution()**. The data of the sheet is read once for
+    all of the countries. The returned dictionary has an entry for each country where the value is
+    a dictionary of year to (total population, YearAgeRate) for each of the given years.
+    """
     if filename is None:
         filename = _get_population_filename(version)
     _check_filename(filename)
@@ -391,94 +456,94 @@ def extract_population_by_age_and_distribution(country: str,
     # --------------------------------
     # --- Extract data from the sheets
     # --------------------------------
-    df = pd.DataFrame()
-    for sheet in sheet_list:
-        df_sheet = pd.read_excel(filename,
-                                 sheet_name=sheet,
-                                 skiprows=16,
-                                 usecols=cols_to_read,
-                                 engine="calamine")
-        _check_country(country, df_sheet[COUNTRY_COL].unique(), filename)
-        df_sheet = df_sheet[df_sheet[COUNTRY_COL] == country]
-        df = pd.concat([df, df_sheet])
-    df = df.drop(COUNTRY_COL, axis=1)
-
-    # -----------------------------------
-    # --- Get the one row of data we want
-    # -----------------------------------
-    df = df[df[PERIOD_COL] == year]
-
-    # ---------------------------------------------------------------
-    # --- In the 2012, 2015 data, the Estimates sheet has this "80+" column
-    # --- that can be used instead of the 80-84, etc columns.
-    # --- NOTE: This is crappy logic, but I need to move on.
-    # ---------------------------------------------------------------
-    if version == "2012" or version == "2015":
-        val = df[AGE_80_PLUS].iloc[0]
-        has_80p = isinstance(val, float) or isinstance(val, int)
-        if has_80p:
-            df = df.drop([AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100], axis=1)
-            for col in [AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100]:
-                age_cols.remove(col)
-        else:
-            df = df.drop(AGE_80_PLUS, axis=1)
-            age_cols.remove(AGE_80_PLUS)
-
-    # -----------------------------------------------------------
-    # --- rename the age columns so they are just the minimum age
-    # -----------------------------------------------------------
-    new_col_names = {}
-    for col in age_cols:
-        if col == AGE_80_PLUS:
-            new_col_names[col] = "80"
-        elif len(col) == 3:
-            new_col_names[col] = col[0:1]
-        elif len(col) == 5:
-            new_col_names[col] = col[0:2]
-        else:
-            new_col_names[col] = col[0:3]
-    df.rename(columns=new_col_names, inplace=True)
-
-    # -------------------------------------------------------------------
-    # --- Transpose the data so we have rows of min ages for our one Year
-    # -------------------------------------------------------------------
-    df = df.set_index(PERIOD_COL, inplace=False)
-    df = df.transpose()
-    df = df.rename_axis("tmp_min_age")
-
-    # ------------------------------------------------------------------
-    # --- Some columns can have the "...".  This changes those to zeros.
-    # --- (This could go away with the 80+ handling.)
-    # ------------------------------------------------------------------
-    df[year] = (pd.to_numeric(df[year], errors='coerce').fillna(0))
-
-    # ---------------------------------------------------------------
-    # --- Change the data to the fraction of people in that age range
-    # --- since this is supposed to be an age distribution.
-    # ---------------------------------------------------------------
-    total_pop = df[year].sum()
-    df = df / total_pop
-
-    # -----------------------------------------------------------------
-    # --- The data is in thousands of people so multiply by 1000
-    # --- and convert to integer since we want the value as an integer.
-    # -----------------------------------------------------------------
-    total_pop = int(1000 * total_pop)
-
-    # --------------------------------------------------
-    # --- Convert dataframe into a YearAgeRate dataframe
-    # --------------------------------------------------
-    df[YearAgeRate.COL_NAME_MIN_AGE ] = df.index.values                                 # noqa: E202
-    df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE].astype(float)  # noqa: E202
-    df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                               # noqa: E202
-    df[YearAgeRate.COL_NAME_MIN_YEAR] = year
-    df.rename({year: YearAgeRate.COL_NAME_RATE}, axis=1, inplace=True)
-
-    df[YearAgeRate.COL_NAME_RATE] = df[YearAgeRate.COL_NAME_RATE].astype(float).round(8)
-    df = df[YearAgeRate.COL_NAMES]
-    df.reset_index()
-
-    return total_pop, YearAgeRate(df)
+    cols_to_read_by_sheet = {sheet: cols_to_read for sheet in sheet_list}
+    country_to_df = _read_country_rows(filename, cols_to_read_by_sheet, COUNTRY_COL, countries)
+
+    country_to_year_data = {}
+    for country in countries:
+        country_df = country_to_df[country].drop(COUNTRY_COL, axis=1)
+        country_to_year_data[country] = {}
+        for year in years:
+            year_age_cols = age_cols.copy()
+
+            # -----------------------------------
+            # --- Get the one row of data we want
+            # -----------------------------------
+            df = country_df[country_df[PERIOD_COL] == year]
+
+            # ---------------------------------------------------------------
+            # --- In the 2012, 2015 data, the Estimates sheet has this "80+" column
+            # --- that can be used instead of the 80-84, etc columns.
+            # --- NOTE: This is crappy logic, but I need to move on.
+            # ---------------------------------------------------------------
+            if version == "2012" or version == "2015":
+                val = df[AGE_80_PLUS].iloc[0]
+                has_80p = isinstance(val, float) or isinstance(val, int)
+                if has_80p:
+                    df = df.drop([AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100], axis=1)
+                    for col in [AGE_80_84, AGE_85_89, AGE_90_94, AGE_95_99, AGE_100]:
+                        year_age_cols.remove(col)
+                else:
+                    df = df.drop(AGE_80_PLUS, axis=1)
+                    year_age_cols.remove(AGE_80_PLUS)
+
+            # -----------------------------------------------------------
+            # --- rename the age columns so they are just the minimum age
+            # -----------------------------------------------------------
+            new_col_names = {}
+            for col in year_age_cols:
+                if col == AGE_80_PLUS:
+                    new_col_names[col] = "80"
+                elif len(col) == 3:
+                    new_col_names[col] = col[0:1]
+                elif len(col) == 5:
+                    new_col_names[col] = col[0:2]
+                else:
+                    new_col_names[col] = col[0:3]
+            df.rename(columns=new_col_names, inplace=True)
+
+            # -------------------------------------------------------------------
+            # --- Transpose the data so we have rows of min ages for our one Year
+            # -------------------------------------------------------------------
+            df = df.set_index(PERIOD_COL, inplace=False)
+            df = df.transpose()
+            df = df.rename_axis("tmp_min_age")
+
+            # ------------------------------------------------------------------
+            # --- Some columns can have the "...".  This changes those to zeros.
+            # --- (This could go away with the 80+ handling.)
+            # ------------------------------------------------------------------
+            df[year] = (pd.to_numeric(df[year], errors='coerce').fillna(0))
+
+            # ---------------------------------------------------------------
+            # --- Change the data to the fraction of people in that age range
+            # --- since this is supposed to be an age distribution.
+            # ---------------------------------------------------------------
+            total_pop = df[year].sum()
+            df = df / total_pop
+
+            # -----------------------------------------------------------------
+            # --- The data is in thousands of people so multiply by 1000
+            # --- and convert to integer since we want the value as an integer.
+            # -----------------------------------------------------------------
+            total_pop = int(1000 * total_pop)
+
+            # --------------------------------------------------
+            # --- Convert dataframe into a YearAgeRate dataframe
+            # --------------------------------------------------
+            df[YearAgeRate.COL_NAME_MIN_AGE ] = df.index.values                                 # noqa: E202
+            df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE].astype(float)  # noqa: E202
+            df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                               # noqa: E202
+            df[YearAgeRate.COL_NAME_MIN_YEAR] = year
+            df.rename({year: YearAgeRate.COL_NAME_RATE}, axis=1, inplace=True)
+
+            df[YearAgeRate.COL_NAME_RATE] = df[YearAgeRate.COL_NAME_RATE].astype(float).round(8)
+            df = df[YearAgeRate.COL_NAMES]
+            df.reset_index()
+
+            country_to_year_data[country][year] = (total_pop, YearAgeRate(df))
+
+    return country_to_year_data
 
 
 def extract_fertility(country: str,
@@ -508,6 +573,16 @@ def extract_fertility(country: str,
     Returns:
         (YearAgeRate): A YearAgeRate object containing the fertility data in the given file.
     """
+    return _extract_fertility(countries=[country], version=version, filename=filename)[country]
+
+
+def _extract_fertility(countries: List[str],
+                       version: str,
+                       filename: Union[str, Path] = None) -> Dict[str, YearAgeRate]:
+    """
+    See **extract_fertility()**. The data of each sheet is read once for all of the
+    countries and the returned dictionary has a YearAgeRate object for each country.
+    """
     if filename is None:
         filename = _get_fertility_filename(version)
     _check_filename(filename)
@@ -552,48 +627,44 @@ def extract_fertility(country: str,
     # --------------------------------
     # --- Extract data from the sheets
     # --------------------------------
-    df = pd.DataFrame()
-    for sheet in sheet_list:
-        df_sheet = pd.read_excel(filename,
-                                 sheet_name=sheet,
-                                 skiprows=16,
-                                 usecols=cols_to_read,
-                                 engine="calamine")
-        _check_country(country, df_sheet[COUNTRY_COL].unique(), filename)
-        df_sheet = df_sheet[df_sheet[COUNTRY_COL] == country]
-        df = pd.concat([df, df_sheet])
-
-    df = df.drop(COUNTRY_COL, axis=1)
-
-    # ------------------------------------------------------------
-    # --- Change the Period column to only contain min value/year
-    # ------------------------------------------------------------
-    if version == "2012" or version == "2015" or version == "2019":
-        df[PERIOD_COL] = df[PERIOD_COL].str.slice_replace(4, 9, "").astype(float)
-
-    # -----------------------------------------------------------
-    # --- rename the age columns so they are just the minimum age
-    # -----------------------------------------------------------
-    new_col_names = {}
-    for col in age_cols:
-        new_col_names[col] = col[0:2]
-    df.rename(columns=new_col_names, inplace=True)
-
-    df = pd.melt(df, id_vars=[PERIOD_COL], var_name=YearAgeRate.COL_NAME_MIN_AGE, value_name=YearAgeRate.COL_NAME_RATE)
-
-    # ----------------------------------------------------------
-    # --- Convert dataframe into a YearAgeRate dataframe format
-    # ----------------------------------------------------------
-    df.rename({PERIOD_COL: YearAgeRate.COL_NAME_MIN_YEAR}, axis=1, inplace=True)
-    df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE ].astype(float)    # noqa: E202
-    df[YearAgeRate.COL_NAME_MIN_YEAR] = df[YearAgeRate.COL_NAME_MIN_YEAR].astype(float)
-    df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                                  # noqa: E202
-    df = df.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE], ascending=True)
-
-    df[YearAgeRate.COL_NAME_RATE] = df[YearAgeRate.COL_NAME_RATE].astype(float).round(1)
-    df = df[YearAgeRate.COL_NAMES]
-
-    return YearAgeRate(df=df)
+    cols_to_read_by_sheet = {sheet: cols_to_read for sheet in sheet_list}
+    country_to_df = _read_country_rows(filename, cols_to_read_by_sheet, COUNTRY_COL, countries)
+
+    country_to_yar = {}
+    for country in countries:
+        df = country_to_df[country].drop(COUNTRY_COL, axis=1)
+
+        # ------------------------------------------------------------
+        # --- Change the Period column to only contain min value/year
+        # ------------------------------------------------------------
+        if version == "2012" or version == "2015" or version == "2019":
+            df[PERIOD_COL] = df[PERIOD_COL].str.slice_replace(4, 9, "").astype(float)
+
+        # -----------------------------------------------------------
+        # --- rename the age columns so they are just the minimum age
+        # -----------------------------------------------------------
+        new_col_names = {}
+        for col in age_cols:
+            new_col_names[col] = col[0:2]
+        df.rename(columns=new_col_names, inplace=True)
+
+        df = pd.melt(df, id_vars=[PERIOD_COL], var_name=YearAgeRate.COL_NAME_MIN_AGE, value_name=YearAgeRate.COL_NAME_RATE)
+
+        # ----------------------------------------------------------
+        # --- Convert dataframe into a YearAgeRate dataframe format
+        # ----------------------------------------------------------
+        df.rename({PERIOD_COL: YearAgeRate.COL_NAME_MIN_YEAR}, axis=1, inplace=True)
+        df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE ].astype(float)    # noqa: E202
+        df[YearAgeRate.COL_NAME_MIN_YEAR] = df[YearAgeRate.COL_NAME_MIN_YEAR].astype(float)
+        df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                                  # noqa: E202
+        df = df.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE], ascending=True)
+
+        df[YearAgeRate.COL_NAME_RATE] = df[YearAgeRate.COL_NAME_RATE].astype(float).round(1)
+        df = df[YearAgeRate.COL_NAMES]
+
+        country_to_yar[country] = YearAgeRate(df=df)
+
+    return country_to_yar
 
 
 def extract_mortality(country: str,
@@ -628,6 +699,17 @@ def extract_mortality(country: str,
     Returns:
         (YearAgeRate): A YearAgeRate object containing the mortality data in the given file.
     """
+    return _extract_mortality(countries=[country], version=version, gender=gender, filename=filename)[country]
+
+
+def _extract_mortality(countries: List[str],
+                       version: str,
+                       gender: str = None,
+                       filename: Union[str, Path] = None) -> Dict[str, YearAgeRate]:
+    """
+    See **extract_mortality()**. The data of each sheet is read once for all of the
+    countries and the returned dictionary has a YearAgeRate object for each country.
+    """
     if filename is None:
         filename = _get_mortality_filename(version, gender)
     _check_filename(filename)
@@ -669,34 +751,109 @@ def extract_mortality(country: str,
     # --------------------------------
     # --- Extract data from the sheets
     # --------------------------------
-    df = pd.DataFrame()
-    for sheet in sheet_list:
-        df_sheet = pd.read_excel(filename,
-                                 sheet_name=sheet,
-                                 skiprows=16,
-                                 usecols=cols_to_read,
-                                 engine="calamine")
-        _check_country(country, df_sheet[COUNTRY_COL].unique(), filename)
-        df_sheet = df_sheet[df_sheet[COUNTRY_COL] == country]
-        df = pd.concat([df, df_sheet])
-
-    # ------------------------------------------------------------
-    # --- Change the Period column to only contain min value/year
-    # ------------------------------------------------------------
-    if version == "2012" or version == "2015" or version == "2019":
-        df[PERIOD_COL] = df[PERIOD_COL].str.slice_replace(4, 9, "").astype(float)
-
-    # ----------------------------------------------------------
-    # --- Convert dataframe into a YearAgeRate dataframe format
-    # ----------------------------------------------------------
-    df.rename(col_rename_dict, axis=1, inplace=True)
-
-    df = df.drop([COUNTRY_COL, AGE_INTERVAL_COL], axis=1)
-
-    df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                                 # noqa: E202
-    df[YearAgeRate.COL_NAME_MIN_YEAR] = df[YearAgeRate.COL_NAME_MIN_YEAR].astype(float)
-    df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE ].astype(float)   # noqa: E202
-    df[YearAgeRate.COL_NAME_RATE    ] = df[YearAgeRate.COL_NAME_RATE    ].round(8)        # noqa: E202
-    df = df[YearAgeRate.COL_NAMES]
-
-    return YearAgeRate(df=df)
+    cols_to_read_by_sheet = {sheet: cols_to_read for sheet in sheet_list}
+    country_to_df = _read_country_rows(filename, cols_to_read_by_sheet, COUNTRY_COL, countries)
+
+    country_to_yar = {}
+    for country in countries:
+        df = country_to_df[country]
+
+        # ------------------------------------------------------------
+        # --- Change the Period column to only contain min value/year
+        # ------------------------------------------------------------
+        if version == "2012" or version == "2015" or version == "2019":
+            df[PERIOD_COL] = df[PERIOD_COL].str.slice_replace(4, 9, "").astype(float)
+
+        # ----------------------------------------------------------
+        # --- Convert dataframe into a YearAgeRate dataframe format
+        # ----------------------------------------------------------
+        df.rename(col_rename_dict, axis=1, inplace=True)
+
+        df = df.drop([COUNTRY_COL, AGE_INTERVAL_COL], axis=1)
+
+        df[YearAgeRate.COL_NAME_NODE_ID ] = 0                                                 # noqa: E202
+        df[YearAgeRate.COL_NAME_MIN_YEAR] = df[YearAgeRate.COL_NAME_MIN_YEAR].astype(float)
+        df[YearAgeRate.COL_NAME_MIN_AGE ] = df[YearAgeRate.COL_NAME_MIN_AGE ].astype(float)   # noqa: E202
+        df[YearAgeRate.COL_NAME_RATE    ] = df[YearAgeRate.COL_NAME_RATE    ].round(8)        # noqa: E202
+        df = df[YearAgeRate.COL_NAMES]
+
+        country_to_yar[country] = YearAgeRate(df=df)
+
+    return country_to_yar
+
+
+def extract_for_countries(countries: List[str],
+                          version: str,
+                          years: List[int] = None,
+                          genders: List[str] = None,
+                          population_filename: Union[str, Path] = None,
+                          fertility_filename: Union[str, Path] = None,
+                          mortality_filenames: Dict[str, Union[str, Path]] = None) -> Dict[str, Dict]:
+    """
+    Extract the age distribution, fertility, and mortality data for several countries at once.
+    Each sheet of each file is read one time and the rows are split by country, so extracting
+    the data for many countries costs about the same as extracting it for one.
+
+    Args:
+        countries (List[str]):
+            The names of the countries used in the spreadsheets for which you want to extract the data.
+
+        version (str):
+            A string with the year/version of the files.  Supported versions are 2012, 2015, 2019, 2024
+
+        years (List[int]):
+            The years in the population data to get the total population and age distribution for.
+            Default is [1960].  See **extract_population_by_age_and_distribution()**.
+
+        genders (List[str]):
+            The genders to extract the mortality data for.  Default is ['male', 'female'].
+
+        population_filename (Union[str, Path]):
+            If not provided, the 'version' will be used to select from the known population files.
+
+        fertility_filename (Union[str, Path]):
+            If not provided, the 'version' will be used to select from the known fertility files.
+
+        mortality_filenames (Dict[str, Union[str, Path]]):
+            A dictionary of gender to the mortality file for that gender.  If a gender is not in the
+            dictionary, the 'version' will be used to select from the known mortality files.
+
+    Returns:
+        (Dict[str, Dict]): A dictionary with an entry for each country.  The value is a dictionary with:
+
+            - 'age_distributions': A dictionary of year to (total population, YearAgeRate) like
+            **extract_population_by_age_and_distribution()** returns.
+            - 'fertility': The YearAgeRate returned by **extract_fertility()**.
+            - 'mortality': A dictionary of gender to the YearAgeRate returned by **extract_mortality()**.
+    """
+    if years is None:
+        years = [1960]
+    if genders is None:
+        genders = KNOWN_GENDERS
+    if mortality_filenames is None:
+        mortality_filenames = {}
+    for gender in genders:
+        _check_gender(gender)
+
+    countries = list(dict.fromkeys(countries))  # remove duplicates but keep the order
+
+    country_to_year_data = _extract_population_by_age_and_distribution(countries=countries,
+                                                                       version=version,
+                                                                       years=years,
+                                                                       filename=population_filename)
+    country_to_fertility = _extract_fertility(countries=countries, version=version, filename=fertility_filename)
+    gender_to_country_to_mortality = {}
+    for gender in genders:
+        gender_to_country_to_mortality[gender] = _extract_mortality(countries=countries,
+                                                                    version=version,
+                                                                    gender=gender,
+                                                                    filename=mortality_filenames.get(gender, None))
+
+    country_to_data = {}
+    for country in countries:
+        country_to_data[country] = {
+            "age_distributions": country_to_year_data[country],
+            "fertility": country_to_fertility[country],
+            "mortality": {gender: gender_to_country_to_mortality[gender][country] for gender in genders}
+        }
+    return country_to_data
@@ -0,0 +1,475 @@
+"""
+This module contains a compact, binary bundle of the data sheets in the
+[UN World Population files](https://population.un.org/wpp/) that are packaged with emodpy-hiv.
+
+Decoding the WPP workbooks requires an Excel parser and can take several seconds per sheet.
+The bundle holds the same data in a single NumPy '.npz' file (no pickled objects) so that the
+data of a country can be loaded without parsing any workbook.  Inside the bundle, the rows of
+each sheet are sorted by country and an offset index gives the rows of each country.  Every
+column is stored with its original dtype so a sheet read from the bundle is identical to the
+same sheet read from the workbook.
+
+un_world_pop uses the bundle by default when reading a packaged workbook.  Workbooks that are
+supplied by the user, or that are not in the bundle, are read from Excel.  The bundle records
+the SHA-256 hash of each workbook it was built from, so a packaged workbook that has been
+replaced or updated since the bundle was built is also read from Excel.
+
+The bundle is created with **build_bundle()** or with:
+
+    python -m emodpy_hiv.demographics.un_world_pop_bundle
+"""
+import argparse
+import hashlib
+import json
+import os
+from importlib import resources
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.countries.un_world_pop_data as un_data
+
+BUNDLE_FILENAME = "WPP_bundle.npz"
+BUNDLE_FORMAT_VERSION = 2
+
+# The WPP files have 16 rows of notes before the header row.
+SKIP_ROWS = 16
+
+# The column with the country name in the data sheets of the different versions.
+# Sheets without one of these columns (i.e. NOTES) are not bundled.
+COUNTRY_COLS = ["Major area, region, country or area *",
+                "Region, subregion, country or area *"]
+
+# Codes of the cells in an 'object' column that are not strings
+_CODE_FLOAT = -1
+_CODE_INT   = -2   # noqa: E221
+
+_INDEX_KEY = "index"
+
+_bundle = None
+_workbook_checks = {}  # (workbook name, size, modification time, bundled hash) -> True if they match
+
+
+class _ArrayCache:
+    """
+    Give access to the arrays of an npz file like the file itself but decompress
+    each array only the first time it is accessed.
+    """
+    def __init__(self, npz):
+        self._npz = npz
+        self._arrays = {}
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        array = self._arrays.get(key)
+        if array is None:
+            array = self._npz[key]
+            self._arrays[key] = array
+        return array
+
+
+def get_bundle_filename() -> Path:
+    """
+    Return the path of the bundle packaged with emodpy-hiv.
+    """
+    return Path(resources.files(un_data), BUNDLE_FILENAME)
+
+
+def _hash_file(filename: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _load_bundle():
+    # ---------------------------------------------------------------------------
+    # --- Load the index once per process.  The arrays of the npz file are only
+    # --- decompressed when they are first accessed.  A process forked from the
+    # --- one that opened the file opens its own handle instead of sharing the
+    # --- parent's file position.  An unreadable bundle or one with a different
+    # --- format is treated as empty so the workbooks are read instead.
+    # ---------------------------------------------------------------------------
+    global _bundle
+    if (_bundle is None) or (_bundle[0] != os.getpid()):
+        _bundle = (os.getpid(), {}, {}, None)
+        bundle_filename = get_bundle_filename()
+        if bundle_filename.exists():
+            try:
+                npz = np.load(bundle_filename, allow_pickle=False)
+                index = json.loads(str(npz[_INDEX_KEY]))
+                if index["format_version"] == BUNDLE_FORMAT_VERSION:
+                    _bundle = (os.getpid(), index["workbooks"], index["sources"], _ArrayCache(npz))
+            except Exception:
+                pass
+    return _bundle[1:]
+
+
+def _is_bundled_workbook(filename: Path, sources: dict) -> bool:
+    # ---------------------------------------------------------------------------
+    # --- The workbook must be the one the bundle was built from.  It is hashed
+    # --- once per process unless its size or modification time changes.  A
+    # --- workbook that is not installed can only be read from the bundle.
+    # ---------------------------------------------------------------------------
+    source = sources.get(filename.name)
+    if source is None:
+        return False
+    try:
+        stat = filename.stat()
+    except FileNotFoundError:
+        return True
+    if stat.st_size != source["size"]:
+        return False
+    check_key = (filename.name, stat.st_size, stat.st_mtime_ns, source["sha256"])
+    if check_key not in _workbook_checks:
+        _workbook_checks[check_key] = (_hash_file(filename) == source["sha256"])
+    return _workbook_checks[check_key]
+
+
+def _get_workbook_name(filename: Union[str, Path]) -> Union[str, None]:
+    # Only the packaged workbooks are bundled so user-supplied files are always read from Excel.
+    filename = Path(filename)
+    try:
+        if filename.resolve().parent != get_bundle_filename().resolve().parent:
+            return None
+        _, sources, _ = _load_bundle()
+        if not _is_bundled_workbook(filename, sources):
+            return None
+    except OSError:
+        return None
+    return filename.name
+
+
+def _get_table(filename: Union[str, Path], sheet: str) -> Union[dict, None]:
+    workbook_name = _get_workbook_name(filename)
+    if workbook_name is None:
+        return None
+    workbooks, _, _ = _load_bundle()
+    return workbooks.get(workbook_name, {}).get(sheet, None)
+
+
+def contains(filename: Union[str, Path], sheet: str = None) -> bool:
+    """
+    Return True if the given packaged workbook - and sheet if given - is in the bundle.
+
+    Args:
+        filename (Union[str, Path]):
+            The path of the workbook.  Only workbooks in the emodpy_hiv.countries.un_world_pop_data
+            directory are bundled.
+
+        sheet (str):
+            The name of the sheet.  If None, only the workbook is checked.
+
+    Returns:
+        (bool): True if the data can be read from the bundle.
+    """
+    if sheet is not None:
+        return _get_table(filename, sheet) is not None
+
+    workbook_name = _get_workbook_name(filename)
+    if workbook_name is None:
+        return False
+    workbooks, _, _ = _load_bundle()
+    return workbook_name in workbooks
+
+
+def get_countries(filename: Union[str, Path], sheet: str) -> List[str]:
+    """
+    Return the countries in the given sheet of a bundled workbook in the order they are in the bundle.
+    """
+    table = _get_table(filename, sheet)
+    if table is None:
+        raise ValueError(f"The sheet '{sheet}' of '{filename}' is not in the bundle.")
+    return table["countries"]
+
+
+def read_sheet(filename: Union[str, Path],
+               sheet: str,
+               usecols: List[str],
+               countries: List[str] = None) -> pd.DataFrame:
+    """
+    Read the given columns of a sheet from the bundle.  The dataframe is the same as the one
+    read from the workbook with pandas.read_excel(filename, sheet, skiprows=16, usecols=usecols)
+    and then filtered to the rows of the given countries.  The index of the rows is preserved.
+
+    Args:
+        filename (Union[str, Path]):
+            The path of the packaged workbook.
+
+        sheet (str):
+            The name of the sheet in the workbook.
+
+        usecols (List[str]):
+            The names of the columns to read.
+
+        countries (List[str]):
+            The countries to read the rows of.  If None, all of the rows are read.
+
+    Returns:
+        (pandas.DataFrame): The data of the sheet for the given columns and countries.
+    """
+    table = _get_table(filename, sheet)
+    if table is None:
+        raise ValueError(f"The sheet '{sheet}' of '{filename}' is not in the bundle.")
+
+    missing_cols = [col for col in usecols if col not in table["columns"]]
+    if len(missing_cols) > 0:
+        raise ValueError(f"The sheet '{sheet}' of '{filename}' does not have the columns:\n{missing_cols}")
+
+    _, _, npz = _load_bundle()
+    prefix = table["key"]
+    row_index = npz[f"{prefix}_row_index"]
+
+    # ---------------------------------------------------------------------------
+    # --- Select the rows of each country with the offsets and then put them back
+    # --- into the order they are in the sheet.
+    # ---------------------------------------------------------------------------
+    if countries is None:
+        rows = np.arange(len(row_index))
+    else:
+        offsets = table["offsets"]
+        country_to_position = {country: i for i, country in enumerate(table["countries"])}
+        row_ranges = [np.arange(offsets[country_to_position[country]], offsets[country_to_position[country] + 1])
+                      for country in dict.fromkeys(countries) if country in country_to_position]
+        rows = np.concatenate(row_ranges) if len(row_ranges) > 0 else np.arange(0)
+    rows = rows[np.argsort(row_index[rows], kind="stable")]
+
+    data = {}
+    for col in usecols:
+        col_key = f"{prefix}_c{table['columns'].index(col)}"
+        data[col] = decode_column(npz, col_key, table["dtypes"][col], rows)
+
+    if countries is None:
+        index = pd.RangeIndex(len(rows))
+    else:
+        index = pd.Index(row_index[rows])
+    return pd.DataFrame(data, index=index)
+
+
+def decode_column(npz, col_key: str, dtype: str, rows: np.ndarray):
+    """
+    Return the given rows of a column saved with **encode_column()**.
+
+    Args:
+        npz:
+            The arrays the column was saved into, i.e. the loaded '.npz' file.
+
+        col_key (str):
+            The prefix of the names of the column's arrays.
+
+        dtype (str):
+            The dtype returned by **encode_column()**.
+
+        rows (np.ndarray):
+            The indexes of the rows to return.
+
+    Returns:
+        The values of the column with its original dtype.
+    """
+    values = npz[f"{col_key}_values"][rows]
+    if dtype == "object":
+        codes = npz[f"{col_key}_codes"][rows]
+        tokens = npz[f"{col_key}_tokens"].tolist()
+        cells = np.empty(len(rows), dtype=object)
+        for i, (code, value) in enumerate(zip(codes.tolist(), values.tolist())):
+            if code == _CODE_FLOAT:
+                cells[i] = value
+            elif code == _CODE_INT:
+                cells[i] = int(value)
+            else:
+                cells[i] = tokens[code]
+        return cells
+    elif dtype == "str":
+        cells = values.astype(object)
+        cells[npz[f"{col_key}_missing"][rows]] = np.nan
+        return pd.array(cells, dtype="str")
+    else:
+        return values
+
+
+def encode_column(arrays: Dict[str, np.ndarray], col_key: str, series: pd.Series) -> str:
+    """
+    Add the arrays that hold the given column to 'arrays'.  Only plain NumPy arrays are
+    used so the column can be saved in an '.npz' file and loaded without unpickling.
+
+    Args:
+        arrays (Dict[str, np.ndarray]):
+            The arrays to add the column's arrays to.
+
+        col_key (str):
+            The prefix of the names of the column's arrays.
+
+        series (pd.Series):
+            The column.  Its dtype must be int64, float64, bool, str, or object with
+            numbers and strings.
+
+    Returns:
+        (str): The dtype of the column that is needed to decode it.
+    """
+    dtype = str(series.dtype)
+    if dtype in ["int64", "float64", "bool"]:
+        arrays[f"{col_key}_values"] = series.to_numpy()
+    elif dtype == "str":
+        missing = series.isna().to_numpy()
+        arrays[f"{col_key}_values"] = np.array(series.fillna("").tolist(), dtype=str)
+        arrays[f"{col_key}_missing"] = missing
+    elif dtype == "object":
+        # -------------------------------------------------------------------------
+        # --- Mixed columns have numbers and strings like '…' for missing values.
+        # --- Numbers are stored as float64 and strings as codes into a token list.
+        # -------------------------------------------------------------------------
+        values = np.zeros(len(series), dtype=np.float64)
+        codes = np.zeros(len(series), dtype=np.int32)
+        tokens = []
+        for i, cell in enumerate(series.tolist()):
+            if isinstance(cell, bool):
+                raise ValueError(f"Unsupported cell type '{type(cell).__name__}' in column '{series.name}'")
+            elif isinstance(cell, float):
+                values[i] = cell
+                codes[i] = _CODE_FLOAT
+            elif isinstance(cell, int):
+                values[i] = cell
+                codes[i] = _CODE_INT
+            elif isinstance(cell, str):
+                if cell not in tokens:
+                    tokens.append(cell)
+                codes[i] = tokens.index(cell)
+            else:
+                raise ValueError(f"Unsupported cell type '{type(cell).__name__}' in column '{series.name}'")
+        arrays[f"{col_key}_values"] = values
+        arrays[f"{col_key}_codes"] = codes
+        arrays[f"{col_key}_tokens"] = np.array(tokens, dtype=str)
+    else:
+        raise ValueError(f"Unsupported dtype '{dtype}' in column '{series.name}'")
+    return dtype
+
+
+def _encode_sheet(arrays: Dict[str, np.ndarray], prefix: str, df: pd.DataFrame, country_col: str) -> dict:
+    # Stable sort so the rows of each country stay in sheet order
+    df = df.reset_index(drop=True)
+    codes, country_names = pd.factorize(df[country_col], use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    df_sorted = df.iloc[order]
+    offsets = np.searchsorted(codes[order], np.arange(len(country_names) + 1)).tolist()
+    country_names = country_names.tolist()
+
+    arrays[f"{prefix}_row_index"] = order.astype(np.int64)
+    dtypes = {}
+    for col_num, col in enumerate(df.columns):
+        dtypes[col] = encode_column(arrays, f"{prefix}_c{col_num}", df_sorted[col])
+
+    table = {
+        "key": prefix,
+        "columns": df.columns.tolist(),
+        "dtypes": dtypes,
+        "countries": country_names,
+        "offsets": offsets
+    }
+    return table
+
+
+def _get_packaged_workbook_names() -> List[str]:
+    # Imported here because un_world_pop uses this module
+    import emodpy_hiv.demographics.un_world_pop as unwp
+
+    names = []
+    for version in unwp.KNOWN_VERSIONS:
+        names.append(unwp.POPULATION_FILES[version])
+        names.append(unwp.FERTILITY_FILES[version])
+        for gender in unwp.KNOWN_GENDERS:
+            names.append(unwp.MORTALITY_FILES[version][gender])
+    return names
+
+
+def build_bundle(output_filename: Union[str, Path] = None, verbose: bool = False) -> Path:
+    """
+    Read the data sheets of the packaged WPP workbooks and save them into one bundle.
+    Workbooks that are missing or that cannot be parsed (i.e. Git LFS pointers that were
+    not pulled) are skipped.
+
+    Args:
+        output_filename (Union[str, Path]):
+            The file to save the bundle into.  If None, the bundle is saved in the
+            emodpy_hiv.countries.un_world_pop_data directory.
+
+        verbose (bool):
+            If True, print the workbooks and sheets that are bundled or skipped.
+
+    Returns:
+        (Path): The path of the bundle.
+    """
+    global _bundle
+
+    if output_filename is None:
+        output_filename = get_bundle_filename()
+    output_filename = Path(output_filename)
+
+    un_data_root = get_bundle_filename().parent
+    arrays = {}
+    workbooks = {}
+    sources = {}
+    num_tables = 0
+    for workbook_name in _get_packaged_workbook_names():
+        workbook_filename = Path(un_data_root, workbook_name)
+        try:
+            sheets = pd.read_excel(workbook_filename,
+                                   sheet_name=None,
+                                   skiprows=SKIP_ROWS,
+                                   engine="calamine")
+        except Exception as ex:
+            if verbose:
+                print(f"Skipping {workbook_name}: {ex}")
+            continue
+
+        tables = {}
+        for sheet, df in sheets.items():
+            country_cols = [col for col in COUNTRY_COLS if col in df.columns]
+            if len(country_cols) == 0:
+                continue
+            prefix = f"t{num_tables}"
+            try:
+                sheet_arrays = {}
+                tables[sheet] = _encode_sheet(sheet_arrays, prefix, df, country_cols[0])
+                arrays.update(sheet_arrays)
+                num_tables += 1
+            except ValueError as ex:
+                if verbose:
+                    print(f"Skipping {workbook_name} - {sheet}: {ex}")
+                continue
+            if verbose:
+                print(f"Bundled {workbook_name} - {sheet}")
+        if len(tables) > 0:
+            workbooks[workbook_name] = tables
+            sources[workbook_name] = {
+                "sha256": _hash_file(workbook_filename),
+                "size": workbook_filename.stat().st_size
+            }
+
+    index = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "workbooks": workbooks,
+        "sources": sources
+    }
+    arrays[_INDEX_KEY] = np.array(json.dumps(index))
+
+    with open(output_filename, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+    _bundle = None  # reload the index on the next read
+    return output_filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle the data sheets of the packaged UN World Population files.")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help=f"The bundle file to create (default: the packaged {BUNDLE_FILENAME})")
+    args = parser.parse_args()
+
+    output_filename = build_bundle(args.output, verbose=True)
+    print(f"Saved {output_filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+This module contains an on-disk cache for the sheets read from the
+[UN World Population files](https://population.un.org/wpp/).
+
+Decoding a WPP workbook can take several seconds per sheet. The first time a sheet is read,
+the parsed dataframe is saved into the cache directory so that later reads - from this process
+or from any other process sharing the directory - only need to load the saved dataframe.
+
+Entries are keyed by the absolute path of the workbook, its modification time and size, the
+sheet name, the number of rows skipped, and the columns read. If the workbook changes, a new
+entry is created. Entries are written to a temporary file and then atomically renamed so that
+many processes can safely share one directory.
+
+Other dataframes derived from the WPP files, such as the inputs of a country's demographics,
+can be stored in the same directory with **save_entry()** and **load_entry()** so that every
+process of a sweep or calibration builds them only once.
+
+The cache is off by default.  It is turned on by setting the environment variable
+EMODPY_HIV_CACHE_DIR to a directory or by calling **set_cache_dir()**.  Setting
+EMODPY_HIV_CACHE_DIR to an empty string or calling set_cache_dir(None) turns it off.
+
+Entries are NumPy '.npz' files that only hold plain arrays and are loaded with
+allow_pickle=False, so loading an entry cannot run code.  However, the data in the entries
+is used as if it had been read from the WPP files.  Only share a cache directory with
+people and processes you trust to write it.
+"""
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.demographics.un_world_pop_bundle as un_bundle
+
+CACHE_DIR_ENV_VAR = "EMODPY_HIV_CACHE_DIR"
+CACHE_SUB_DIR = "un_world_pop"
+CACHE_FORMAT_VERSION = "2"
+CACHE_FILE_EXTENSION = ".npz"
+
+_INDEX_KEY = "index"
+
+_NOT_SET = object()
+_cache_dir = _NOT_SET
+_file_hashes = {}  # (path, size, modification time) -> SHA-256 hash of the file's content
+
+
+def get_cache_dir() -> Union[Path, None]:
+    """
+    Return the directory where parsed sheets are cached or None if the cache is disabled.
+    """
+    if _cache_dir is not _NOT_SET:
+        return _cache_dir
+
+    env_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    if (env_dir is None) or (env_dir == ""):
+        return None
+    else:
+        return Path(env_dir).joinpath(CACHE_SUB_DIR)
+
+
+def set_cache_dir(cache_dir: Union[str, Path, None]) -> None:
+    """
+    Set the directory where the parsed sheets are cached. This overrides the value
+    of the EMODPY_HIV_CACHE_DIR environment variable for this process.
+
+    Args:
+        cache_dir (Union[str, Path, None]):
+            The directory to save the parsed sheets into. It is created if it does not exist.
+            Only use a directory that is written by people and processes you trust.
+            If None, the cache is disabled and every read parses the workbook.
+    """
+    global _cache_dir
+    _cache_dir = None if cache_dir is None else Path(cache_dir)
+
+
+def clear_cache() -> int:
+    """
+    Delete all of the entries in the cache directory.
+
+    Returns:
+        (int): The number of entries deleted.
+    """
+    cache_dir = get_cache_dir()
+    if (cache_dir is None) or (not cache_dir.exists()):
+        return 0
+
+    num_deleted = 0
+    for entry in cache_dir.glob("*" + CACHE_FILE_EXTENSION):
+        try:
+            entry.unlink()
+            num_deleted += 1
+        except FileNotFoundError:
+            pass  # another process deleted it
+    return num_deleted
+
+
+def _hash_file(filename: Path) -> str:
+    stat = filename.stat()
+    hash_key = (str(filename), stat.st_size, stat.st_mtime_ns)
+    if hash_key not in _file_hashes:
+        sha256 = hashlib.sha256()
+        with open(filename, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha256.update(block)
+        _file_hashes[hash_key] = sha256.hexdigest()
+    return _file_hashes[hash_key]
+
+
+def get_source_hash(filenames: List[Union[str, Path]]) -> str:
+    """
+    Return a hash of the content of the given WPP workbooks to use in the key of an entry
+    derived from them.  If a workbook is read from the bundle, the bundle is hashed too
+    (see emodpy_hiv.demographics.un_world_pop_bundle).  Each file is hashed once per process
+    unless its size or modification time changes.
+
+    Args:
+        filenames (List[Union[str, Path]]):
+            The workbooks the entry is derived from.  Workbooks that do not exist are skipped.
+
+    Returns:
+        (str): The hash of the workbooks.
+    """
+    sha256 = hashlib.sha256()
+    for filename in filenames:
+        source_filenames = [Path(filename).resolve()]
+        if un_bundle.contains(filename):
+            source_filenames.append(un_bundle.get_bundle_filename().resolve())
+        for source_filename in source_filenames:
+            if source_filename.exists():
+                sha256.update(f"{source_filename.name}:{_hash_file(source_filename)}\n".encode("utf-8"))
+    return sha256.hexdigest()
+
+
+def _get_cache_key(filename: Union[str, Path],
+                   sheet_name: str,
+                   skiprows: int,
+                   usecols: List[str]) -> str:
+    filename = Path(filename).resolve()
+    stat = filename.stat()
+    key_items = [
+        CACHE_FORMAT_VERSION,
+        str(filename),
+        str(stat.st_mtime_ns),
+        str(stat.st_size),
+        sheet_name,
+        str(skiprows),
+        "|".join(usecols)
+    ]
+    return hashlib.sha1("\n".join(key_items).encode("utf-8")).hexdigest()
+
+
+def _write_entry(entry_path: Path, dfs: Dict[str, pd.DataFrame]) -> None:
+    # -------------------------------------------------------------------------------
+    # --- Encode each column as plain arrays (see un_world_pop_bundle.encode_column())
+    # --- so that no object is pickled.  A RangeIndex is restored from the length.
+    # -------------------------------------------------------------------------------
+    arrays = {}
+    frames = {}
+    for df_num, (name, df) in enumerate(dfs.items()):
+        prefix = f"f{df_num}"
+        dtypes = [un_bundle.encode_column(arrays, f"{prefix}_c{col_num}", df[col])
+                  for col_num, col in enumerate(df.columns)]
+        has_range_index = df.index.equals(pd.RangeIndex(len(df)))
+        if not has_range_index:
+            arrays[f"{prefix}_index"] = df.index.to_numpy(dtype=np.int64)
+        frames[name] = {
+            "key": prefix,
+            "columns": df.columns.tolist(),
+            "dtypes": dtypes,
+            "num_rows": len(df),
+            "has_range_index": has_range_index
+        }
+    arrays[_INDEX_KEY] = np.array(json.dumps(frames))
+
+    # -------------------------------------------------------------------------------
+    # --- Write to a unique temporary file and then rename it.  The rename is atomic
+    # --- so another process will either not see the entry or will see all of it.
+    # -------------------------------------------------------------------------------
+    tmp_path = entry_path.with_name(f".{entry_path.stem}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, entry_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _read_entry(entry_path: Path) -> Union[Dict[str, pd.DataFrame], None]:
+    # A missing, corrupt, or incompatible entry is treated as not being in the cache
+    try:
+        with np.load(entry_path, allow_pickle=False) as npz:
+            frames = json.loads(str(npz[_INDEX_KEY]))
+            dfs = {}
+            for name, frame in frames.items():
+                prefix = frame["key"]
+                rows = np.arange(frame["num_rows"])
+                data = {col: un_bundle.decode_column(npz, f"{prefix}_c{col_num}", dtype, rows)
+                        for col_num, (col, dtype) in enumerate(zip(frame["columns"], frame["dtypes"]))}
+                if frame["has_range_index"]:
+                    index = pd.RangeIndex(frame["num_rows"])
+                else:
+                    index = pd.Index(npz[f"{prefix}_index"])
+                dfs[name] = pd.DataFrame(data, index=index, columns=frame["columns"])
+            return dfs
+    except Exception:
+        return None
+
+
+def _get_entry_path(key_items: List[str]) -> Union[Path, None]:
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    key = hashlib.sha1("\n".join([CACHE_FORMAT_VERSION] + key_items).encode("utf-8")).hexdigest()
+    return cache_dir.joinpath(key + CACHE_FILE_EXTENSION)
+
+
+def load_entry(key_items: List[str]) -> Union[Dict[str, pd.DataFrame], None]:
+    """
+    Return the dataframes saved with **save_entry()** for the given key.
+
+    Args:
+        key_items (List[str]):
+            The strings that identify the dataframes.  They should include everything
+            that the dataframes depend on (i.e. country, version, parameters).
+
+    Returns:
+        (Dict[str, pd.DataFrame]): The saved dataframes by name or None if the cache is
+        disabled or there is no valid entry.  A corrupt entry is replaced when it is saved again.
+    """
+    entry_path = _get_entry_path(key_items)
+    if (entry_path is None) or (not entry_path.exists()):
+        return None
+    return _read_entry(entry_path)
+
+
+def save_entry(key_items: List[str], dfs: Dict[str, pd.DataFrame]) -> None:
+    """
+    Save the given dataframes into the cache so that any process using the same cache
+    directory can load them with **load_entry()**.  Nothing is saved if the cache is disabled
+    or if a dataframe has a column that cannot be saved without pickling it.
+
+    Args:
+        key_items (List[str]):
+            The strings that identify the dataframes.
+
+        dfs (Dict[str, pd.DataFrame]):
+            The dataframes to save by name.  Their columns must be int64, float64, bool, str,
+            or object with numbers and strings and their index must be integers.
+    """
+    entry_path = _get_entry_path(key_items)
+    if entry_path is None:
+        return
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_entry(entry_path, dfs)
+    except (OSError, ValueError):
+        pass  # the cache is an optimization so an unwritable directory or data is not an error
+
+
+def read_excel(filename: Union[str, Path],
+               sheet_name: str,
+               skiprows: int,
+               usecols: List[str]) -> pd.DataFrame:
+    """
+    Read the given sheet and columns from a UN World Population workbook using the
+    'calamine' engine. If the cache is enabled, the parsed dataframe is returned from
+    the cache when it exists and added to the cache when it does not.
+
+    Args:
+        filename (Union[str, Path]):
+            The workbook to read.
+
+        sheet_name (str):
+            The name of the sheet in the workbook to read.
+
+        skiprows (int):
+            The number of rows at the top of the sheet to skip before the header row.
+
+        usecols (List[str]):
+            The names of the columns to read.
+
+    Returns:
+        (pandas.DataFrame): The data in the sheet for the given columns.
+    """
+    cache_dir = get_cache_dir()
+    entry_path = None
+    if cache_dir is not None:
+        entry_path = cache_dir.joinpath(_get_cache_key(filename, sheet_name, skiprows, usecols) + CACHE_FILE_EXTENSION)
+        if entry_path.exists():
+            dfs = _read_entry(entry_path)
+            if dfs is not None:
+                return dfs["sheet"]
+            # a corrupt or incompatible entry is replaced below
+
+    df = pd.read_excel(filename,
+                       sheet_name=sheet_name,
+                       skiprows=skiprows,
+                       usecols=usecols,
+                       engine="calamine")
+
+    if entry_path is not None:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_entry(entry_path, {"sheet": df})
+        except (OSError, ValueError):
+            pass  # the cache is an optimization so an unwritable directory or data is not an error
+
+    return df
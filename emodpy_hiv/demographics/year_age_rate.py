@@ -4,12 +4,65 @@ to create demographic objects.
 """
 
 from typing import List, Tuple, Dict
+import numpy as np
 import pandas as pd
 from emod_api.demographics.age_distribution import AgeDistribution
 from emod_api.demographics.fertility_distribution import FertilityDistribution
 from emod_api.demographics.mortality_distribution import MortalityDistribution
 
 
+_READ_ONLY_MESSAGE = ("YearAgeRate.df is read-only.  Change a copy, 'yar.df.copy()', "
+                      "and assign it to 'yar.df' instead.")
+
+
+class _ReadOnlyIndexer:
+    """
+    Wraps the loc, iloc, at, or iat indexer of a dataframe so that getting values works
+    but setting them raises a TypeError.
+    """
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+
+class _ReadOnlyDataFrame(pd.DataFrame):
+    """
+    The dataframe returned by YearAgeRate.df.  Assignments to it raise a TypeError instead of
+    changing a dataframe that is not the data of the YearAgeRate object.  The dataframes derived
+    from it, such as copies and selections, are regular dataframes.
+    """
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def __delitem__(self, key):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
 class YearAgeRate:
     """
     The YearAgeRate class is a wrapper around a pandas dataframe such that the dataframe
@@ -36,6 +89,13 @@ class YearAgeRate:
     of min_ages.  Different nodes can have different min_years or min_ages, but within
     a given node, they must be the same.  The format also assumes that min_year and
     min_age for a given node are not duplicated.
+
+    Internally, the rates are also kept in a dense 3-D array indexed by node x min_year x min_age
+    along with the sorted node_ids, min_years, and min_ages of the axes.  The conversions to
+    distributions, the selection of nodes and years, and the arithmetic use this array so the
+    dataframe does not need to be grouped again.  Since nodes can have different min_years and
+    min_ages, masks indicate the min_years and min_ages of each node.  The array entries outside
+    of the masks are NaN.
     """
 
     COL_NAME_NODE_ID  = "node_id"    # Noqa: E221
@@ -62,38 +122,83 @@ class YearAgeRate:
             * Number of min_ages not the same for each min_year
             * Not the exact set of min_ages for each min_year
             * If there are duplicate rows that have the same node_id, min_year, and min_age.
+
+        The checks are done on the whole dataframe at once so that datasets with many nodes
+        are fast to validate.  Only the first invalid node is checked year by year in order
+        to create the error message.
         """
-        node_group_collection = df.groupby(YearAgeRate.COL_NAME_NODE_ID)
-        for node_id, node_group in node_group_collection:
-            prev_min_year = 0
-            prev_num_min_ages = 0
-            prev_min_ages = []
-            min_year_group_collection = node_group.groupby(YearAgeRate.COL_NAME_MIN_YEAR)
-            for min_year, min_year_group in min_year_group_collection:
-                # check that there are no duplicate min_years
-                min_ages = sorted(min_year_group[YearAgeRate.COL_NAME_MIN_AGE].unique())
-                num_min_ages_unique = len(min_ages)
-                num_min_ages_total  = len(min_year_group[YearAgeRate.COL_NAME_MIN_AGE])              # Noqa: E221
-                if num_min_ages_total != num_min_ages_unique:
-                    min_year_list = min_year_group[YearAgeRate.COL_NAME_MIN_AGE].tolist()
-                    msg =  f"Invalid duplicate number of entries for {YearAgeRate.COL_NAME_MIN_AGE} "# Noqa: E222
-                    msg += f"for node_id={node_id} and min_year={min_year}.\n"
-                    msg += f"min_ages={min_year_list}"
-                    raise ValueError(msg)
-                elif prev_num_min_ages == 0:
-                    prev_num_min_ages = num_min_ages_total
-                    prev_min_ages = min_ages
-                    prev_min_year = min_year
-                elif prev_num_min_ages != num_min_ages_total:
-                    msg =  f"Invalid number of min_ages for min_year={min_year}.\n"                  # Noqa: E222
-                    msg += f"Number of min_ages={prev_num_min_ages} for min_year={prev_min_year}.\n"
-                    msg += f"Number of min_ages={num_min_ages_total} for min_year={min_year}."
-                    raise ValueError(msg)
-                elif min_ages != prev_min_ages:
-                    msg =  f"Inconsistent set of min_ages for min_year={min_year}.\n"                # Noqa: E222
-                    msg += f"Min_ages for min_year={prev_min_year} are: {prev_min_ages}.\n"
-                    msg += f"Min_ages for min_year={min_year} are: {min_ages}."
-                    raise ValueError(msg)
+        keys = df[YearAgeRate.SORT_BY_COLUMNS].dropna(subset=[YearAgeRate.COL_NAME_NODE_ID,
+                                                              YearAgeRate.COL_NAME_MIN_YEAR])
+        if len(keys) == 0:
+            return
+
+        # --------------------------------------------------------------------------------
+        # --- The first min_year of each node is the reference that the others must match
+        # --------------------------------------------------------------------------------
+        node_ids  = keys[YearAgeRate.COL_NAME_NODE_ID]                                    # Noqa: E221
+        min_years = keys[YearAgeRate.COL_NAME_MIN_YEAR]
+        first_min_years = min_years.groupby(node_ids).transform("min")
+        is_first_year = (min_years == first_min_years).to_numpy()
+
+        # -------------------------------------------------------------------
+        # --- Rows with a duplicate node_id, min_year, and min_age
+        # -------------------------------------------------------------------
+        is_bad_row = keys.duplicated(keep=False).to_numpy(copy=True)
+
+        # -------------------------------------------------------------------
+        # --- Rows whose node_id and min_age are not in the first min_year
+        # -------------------------------------------------------------------
+        node_age_pairs = pd.MultiIndex.from_frame(keys[[YearAgeRate.COL_NAME_NODE_ID, YearAgeRate.COL_NAME_MIN_AGE]])
+        is_bad_row |= ~node_age_pairs.isin(node_age_pairs[is_first_year])
+
+        # -------------------------------------------------------------------
+        # --- Years that do not have the same number of rows as the first year
+        # -------------------------------------------------------------------
+        counts = keys.groupby([YearAgeRate.COL_NAME_NODE_ID, YearAgeRate.COL_NAME_MIN_YEAR]).size()
+        first_counts = counts.groupby(level=YearAgeRate.COL_NAME_NODE_ID).transform("first")
+        bad_count_node_ids = counts.index[(counts != first_counts).to_numpy()].get_level_values(0)
+
+        bad_node_ids = set(node_ids[is_bad_row].unique()).union(bad_count_node_ids)
+        if len(bad_node_ids) > 0:
+            first_bad_node_id = min(bad_node_ids)
+            node_group = df[df[YearAgeRate.COL_NAME_NODE_ID] == first_bad_node_id]
+            YearAgeRate._validate_node_group(first_bad_node_id, node_group)
+
+    @staticmethod
+    def _validate_node_group(node_id, node_group):
+        """
+        Throws an exception for the first min_year of the node that has duplicate min_ages or
+        that does not have the same min_ages as the first min_year.
+        """
+        prev_min_year = 0
+        prev_num_min_ages = 0
+        prev_min_ages = []
+        min_year_group_collection = node_group.groupby(YearAgeRate.COL_NAME_MIN_YEAR)
+        for min_year, min_year_group in min_year_group_collection:
+            # check that there are no duplicate min_years
+            min_ages = sorted(min_year_group[YearAgeRate.COL_NAME_MIN_AGE].unique())
+            num_min_ages_unique = len(min_ages)
+            num_min_ages_total  = len(min_year_group[YearAgeRate.COL_NAME_MIN_AGE])              # Noqa: E221
+            if num_min_ages_total != num_min_ages_unique:
+                min_year_list = min_year_group[YearAgeRate.COL_NAME_MIN_AGE].tolist()
+                msg =  f"Invalid duplicate number of entries for {YearAgeRate.COL_NAME_MIN_AGE} "# Noqa: E222
+                msg += f"for node_id={node_id} and min_year={min_year}.\n"
+                msg += f"min_ages={min_year_list}"
+                raise ValueError(msg)
+            elif prev_num_min_ages == 0:
+                prev_num_min_ages = num_min_ages_total
+                prev_min_ages = min_ages
+                prev_min_year = min_year
+            elif prev_num_min_ages != num_min_ages_total:
+                msg =  f"Invalid number of min_ages for min_year={min_year}.\n"                  # Noqa: E222
+                msg += f"Number of min_ages={prev_num_min_ages} for min_year={prev_min_year}.\n"
+                msg += f"Number of min_ages={num_min_ages_total} for min_year={min_year}."
+                raise ValueError(msg)
+            elif min_ages != prev_min_ages:
+                msg =  f"Inconsistent set of min_ages for min_year={min_year}.\n"                # Noqa: E222
+                msg += f"Min_ages for min_year={prev_min_year} are: {prev_min_ages}.\n"
+                msg += f"Min_ages for min_year={min_year} are: {min_ages}."
+                raise ValueError(msg)
 
     def __init__(self,
                  df: pd.DataFrame = None,
@@ -118,9 +223,177 @@ class YearAgeRate:
             msg += f"Actual: {df.columns.tolist()}"
             raise ValueError(msg)
 
+        self.df = df
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        A read-only view of the data sorted by node_id, min_year, and min_age.  Assigning to
+        its columns or through loc, iloc, at, or iat raises a TypeError.  To change the data,
+        change a copy, 'yar.df.copy()', and assign it to 'df'.
+        """
+        return _ReadOnlyDataFrame(self._df)
+
+    @df.setter
+    def df(self, df: pd.DataFrame):
         YearAgeRate._validate_df(df)
 
-        self.df = df.sort_values(by=YearAgeRate.SORT_BY_COLUMNS, ascending=True)
+        self._df = df.sort_values(by=YearAgeRate.SORT_BY_COLUMNS, ascending=True)
+        self._build_arrays()
+
+    def _build_arrays(self):
+        """
+        Create the dense node x min_year x min_age array of rates, the sorted axis vectors,
+        and the masks of the min_years and min_ages of each node from the dataframe.
+        """
+        node_ids, node_indexes = np.unique(self._df[YearAgeRate.COL_NAME_NODE_ID ].to_numpy(), return_inverse=True) # Noqa: E202
+        min_years, year_indexes = np.unique(self._df[YearAgeRate.COL_NAME_MIN_YEAR].to_numpy(), return_inverse=True)
+        min_ages, age_indexes   = np.unique(self._df[YearAgeRate.COL_NAME_MIN_AGE ].to_numpy(), return_inverse=True) # Noqa: E202, E221
+
+        rates = np.full((len(node_ids), len(min_years), len(min_ages)), np.nan)
+        rates[node_indexes, year_indexes, age_indexes] = self._df[YearAgeRate.COL_NAME_RATE].to_numpy()
+
+        has_year = np.zeros((len(node_ids), len(min_years)), dtype=bool)
+        has_year[node_indexes, year_indexes] = True
+        has_age = np.zeros((len(node_ids), len(min_ages)), dtype=bool)
+        has_age[node_indexes, age_indexes] = True
+
+        self._set_arrays(node_ids, min_years, min_ages, rates, has_year, has_age)
+
+    def _set_arrays(self, node_ids, min_years, min_ages, rates, has_year, has_age):
+        self._node_ids  = node_ids   # Noqa: E221
+        self._min_years = min_years
+        self._min_ages  = min_ages   # Noqa: E221
+        self._rates     = rates      # Noqa: E221
+        self._has_year  = has_year   # Noqa: E221
+        self._has_age   = has_age    # Noqa: E221
+
+    @classmethod
+    def _from_arrays(cls, node_ids, min_years, min_ages, rates, has_year, has_age) -> "YearAgeRate":
+        """
+        Create a YearAgeRate object from the dense representation.  The arrays are
+        valid by construction so the dataframe is not validated again.
+        """
+        # ------------------------------------------------------------------------------
+        # --- Remove the nodes, years, and ages that are no longer used by any node
+        # ------------------------------------------------------------------------------
+        has_year = has_year & has_age.any(axis=1)[:, np.newaxis]
+        used_nodes = has_year.any(axis=1)
+        used_years = has_year[used_nodes].any(axis=0)
+        used_ages  = has_age[used_nodes].any(axis=0)                         # Noqa: E221
+        node_ids  = node_ids[used_nodes]                                     # Noqa: E221
+        min_years = min_years[used_years]
+        min_ages  = min_ages[used_ages]                                      # Noqa: E221
+        rates     = rates[used_nodes][:, used_years][:, :, used_ages]        # Noqa: E221
+        has_year  = has_year[used_nodes][:, used_years]                      # Noqa: E221
+        has_age   = has_age[used_nodes][:, used_ages]                        # Noqa: E221
+
+        # Nonzero returns the entries in node, min_year, min_age order
+        has_rate = has_year[:, :, np.newaxis] & has_age[:, np.newaxis, :]
+        node_indexes, year_indexes, age_indexes = np.nonzero(has_rate)
+        df = pd.DataFrame({
+            YearAgeRate.COL_NAME_NODE_ID:  node_ids[node_indexes],   # Noqa: E241
+            YearAgeRate.COL_NAME_MIN_YEAR: min_years[year_indexes],
+            YearAgeRate.COL_NAME_MIN_AGE:  min_ages[age_indexes],   # Noqa: E241
+            YearAgeRate.COL_NAME_RATE:     rates[has_rate]          # Noqa: E241
+        })
+
+        yar = cls.__new__(cls)
+        yar._df = df
+        yar._set_arrays(node_ids, min_years, min_ages, rates, has_year, has_age)
+        return yar
+
+    def get_node_ids(self) -> List[int]:
+        """
+        Return the sorted list of the node ids that have data.
+        """
+        return self._node_ids.tolist()
+
+    def select(self, node_ids: List[int] = None, min_years: List[float] = None) -> "YearAgeRate":
+        """
+        Return a new YearAgeRate object with only the data of the given nodes and min_years.
+        For example, select(min_years=[2000]) gives data that can be converted to age distributions.
+
+        Args:
+            node_ids (List[int]):
+                The nodes to keep.  If None, all of the nodes are kept.
+
+            min_years (List[float]):
+                The min_years to keep.  If None, all of the min_years are kept.  Nodes that
+                do not have any of these min_years are removed.
+
+        Returns:
+            (YearAgeRate): The data for the given nodes and min_years.
+        """
+        keep_nodes = np.ones(len(self._node_ids),  dtype=bool)   # Noqa: E241
+        keep_years = np.ones(len(self._min_years), dtype=bool)
+        if node_ids is not None:
+            missing_node_ids = sorted(set(node_ids) - set(self._node_ids.tolist()))
+            if len(missing_node_ids) > 0:
+                raise ValueError(f"The following node_ids are not in the YearAgeRate data: {missing_node_ids}")
+            keep_nodes = np.isin(self._node_ids, node_ids)
+        if min_years is not None:
+            keep_years = np.isin(self._min_years, min_years)
+
+        has_year = self._has_year & keep_nodes[:, np.newaxis] & keep_years[np.newaxis, :]
+        if not has_year.any():
+            raise ValueError(f"There is no data for node_ids={node_ids} and min_years={min_years}.")
+
+        return YearAgeRate._from_arrays(self._node_ids, self._min_years, self._min_ages,
+                                        self._rates, has_year, self._has_age)
+
+    def scale(self, factor: float) -> "YearAgeRate":
+        """
+        Return a new YearAgeRate object where all of the rates are multiplied by the given factor.
+
+        Args:
+            factor (float): The value to multiply the rates by.
+
+        Returns:
+            (YearAgeRate): The scaled data.
+        """
+        return YearAgeRate._from_arrays(self._node_ids, self._min_years, self._min_ages,
+                                        self._rates * factor, self._has_year, self._has_age)
+
+    def blend(self, other: "YearAgeRate", weight: float) -> "YearAgeRate":
+        """
+        Return a new YearAgeRate object whose rates are the weighted average of the rates in this
+        object and in the other object - (1 - weight) * self + weight * other.  Both objects must
+        have the same nodes and, for each node, the same min_years and min_ages.
+
+        Args:
+            other (YearAgeRate): The data to blend with this data.
+            weight (float): The weight of the other data.  It must be between 0 and 1.
+
+        Returns:
+            (YearAgeRate): The blended data.
+        """
+        if (weight < 0.0) or (1.0 < weight):
+            raise ValueError(f"The 'weight'={weight} must be between 0 and 1.")
+
+        same_layout = (np.array_equal(self._node_ids,  other._node_ids )     # Noqa: E241, E202
+                       and np.array_equal(self._min_years, other._min_years)
+                       and np.array_equal(self._min_ages,  other._min_ages )  # Noqa: E241, E202
+                       and np.array_equal(self._has_year,  other._has_year )  # Noqa: E241, E202
+                       and np.array_equal(self._has_age,   other._has_age  ))  # Noqa: E241, E202
+        if not same_layout:
+            msg = "The YearAgeRate objects cannot be blended.\n"
+            msg += "They must have the same node_ids and, for each node, the same min_years and min_ages."
+            raise ValueError(msg)
+
+        rates = (1.0 - weight) * self._rates + weight * other._rates
+        return YearAgeRate._from_arrays(self._node_ids, self._min_years, self._min_ages,
+                                        rates, self._has_year, self._has_age)
+
+    def _get_node_arrays(self, node_index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the min_years, the min_ages, and the min_year x min_age array of rates
+        of the given node (the index into the node axis).
+        """
+        min_years = self._min_years[self._has_year[node_index]]
+        min_ages  = self._min_ages[self._has_age[node_index]]   # Noqa: E221
+        rates = self._rates[node_index][self._has_year[node_index]][:, self._has_age[node_index]]
+        return min_years, min_ages, rates
 
     def to_csv(self, csv_filename):
         """
@@ -129,7 +402,7 @@ class YearAgeRate:
         Args:
             csv_filename (str): The name of the file to write the dataframe to.
         """
-        self.df.to_csv(csv_filename, index=False)
+        self._df.to_csv(csv_filename, index=False)
 
     def to_age_distributions(self) -> List[Tuple[int, AgeDistribution]]:
         """
@@ -148,7 +421,7 @@ class YearAgeRate:
         !!!THIS APPLIES ONLY TO THE OUTPUT OF THIS FUNCTION AND NOT THE INPUT!!!
         """
 
-        unique_min_year_list = self.df[YearAgeRate.COL_NAME_MIN_YEAR].unique()
+        unique_min_year_list = self._df[YearAgeRate.COL_NAME_MIN_YEAR].unique()
         if len(unique_min_year_list) != 1:
             msg = f"To be converted to an AgeDistribution, the dataframe must have only one " \
                   f"'{YearAgeRate.COL_NAME_MIN_YEAR}'.\n"
@@ -157,12 +430,12 @@ class YearAgeRate:
 
         age_distributions = []
 
-        node_group_collection = self.df.groupby(YearAgeRate.COL_NAME_NODE_ID)
-        for node_id, node_group in node_group_collection:
+        for node_index, node_id in enumerate(self._node_ids):
             # -----------------------------------------------------------------------------
             # --- Turn the collection of individual fractions into cumulative distribution
             # -----------------------------------------------------------------------------
-            fractions = node_group[YearAgeRate.COL_NAME_RATE]
+            has_age = self._has_age[node_index]
+            fractions = self._rates[node_index, 0, has_age]
             cumulative_fractions = []
             cum = 0
             total = sum(fractions)
@@ -171,7 +444,7 @@ class YearAgeRate:
                 cum += round(frac / total, 6)
                 cumulative_fractions.append(cum)
             cumulative_fractions[-1] = 1.0  # ensure last value is exactly 1
-            ages = node_group[YearAgeRate.COL_NAME_MIN_AGE].tolist()
+            ages = self._min_ages[has_age].tolist()
 
             # ------------------------------------------------------------------------
             # --- Make Ages Maximums (see above)
@@ -205,11 +478,13 @@ class YearAgeRate:
         return age_distributions
 
     @staticmethod
-    def _node_group_to_distribution_json(node_group: pd.DataFrame,
-                                         stepwise_for_year: bool = True) -> Dict:
+    def _node_to_distribution_json(min_years: np.ndarray,
+                                   min_ages: np.ndarray,
+                                   rates: np.ndarray,
+                                   stepwise_for_year: bool = True) -> Dict:
         """
-        Since fertility and mortality data is formatted the same, this method converts the dataframe
-        to an EMOD distribution dictionary. This dictionary can be used with FertilityDistribution's
+        Since fertility and mortality data is formatted the same, this method converts the data
+        of a node to an EMOD distribution dictionary. This dictionary can be used with FertilityDistribution's
         or MortalityDistribution's from_dict() method to create the appropriate distribution object.
 
         The method assumes that the user wants the data in a step-wise format. That is, for a
@@ -218,62 +493,36 @@ class YearAgeRate:
 
         For the max age of the last bin, a value of 125 is used and, for the max_year of the last bin,
         a value of 2100 is used.
-        """
-        new_node_group = pd.DataFrame()
 
+        Args:
+            min_years (np.ndarray): The sorted min_years of the node.
+            min_ages (np.ndarray): The sorted min_ages of the node.
+            rates (np.ndarray): The min_year x min_age array of the rates of the node.
+            stepwise_for_year (bool): See to_mortality_distributions().
+        """
         # ---------------------------------------------------------------------------------
-        # --- Break the collection for the node into groups by min_year
-        # --- Then, find the max age of the bin based on the next age (in the next row)
-        # --- Things should be sorted such that for the given min_year, the ages are unique
-        # --- Create a new group that has ths new/temporary column
+        # --- Each age bin has two breakpoints - the min_age and the max_age of the bin.
+        # --- The max_age is the next min_age minus a smidge and 125 for the last bin.
+        # --- The rate of the bin is repeated for both breakpoints.
         # ---------------------------------------------------------------------------------
-        min_year_group_collection = node_group.groupby(YearAgeRate.COL_NAME_MIN_YEAR)
-        for min_year, min_year_group in min_year_group_collection:
-            min_year_group["max_age"] = min_year_group[YearAgeRate.COL_NAME_MIN_AGE].shift(-1) - 0.001
-            min_year_group["max_age"] = min_year_group["max_age"].fillna(125)
-            new_node_group = pd.concat([new_node_group, min_year_group])
-        new_node_group = new_node_group.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE],
-                                                    ascending=True)
-
-        # ----------------------------------------------------------------------------------
-        # --- Duplicate the set of rows, but have the min_age be the max_age determined above
-        # ----------------------------------------------------------------------------------
-        node_group_max_age = new_node_group.copy()
-        node_group_max_age.drop([YearAgeRate.COL_NAME_MIN_AGE], axis=1, inplace=True)
-        node_group_max_age.rename({"max_age": YearAgeRate.COL_NAME_MIN_AGE}, axis=1, inplace=True)
-        new_node_group.drop(["max_age"], axis=1, inplace=True)
-        new_node_group = pd.concat([new_node_group, node_group_max_age]).reset_index()
-        new_node_group = new_node_group.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE],
-                                                    ascending=True)
+        min_ages = min_ages.astype(np.float64)
+        max_ages = np.append(min_ages[1:] - 0.001, 125.0)
+        ages = np.column_stack([min_ages, max_ages]).ravel()
+        result_values = np.repeat(rates.T, 2, axis=0)
 
         # ------------------------------------------------------------------------------------
-        # --- Do like we did for min_age, but do it for min_year.  That is, create a new
-        # --- max_year column that has the value of min_year in the next row minus a smidge.
+        # --- Do like we did for min_age, but do it for min_year.  That is, the max_year of
+        # --- the bin is the next min_year minus a smidge and 2101 for the last bin.
         # ------------------------------------------------------------------------------------
+        min_years = min_years.astype(np.float64)
         if stepwise_for_year:
-            new_node_group2 = pd.DataFrame()
-            min_age_group_collection = new_node_group.groupby(YearAgeRate.COL_NAME_MIN_AGE)
-            for min_age, min_age_group in min_age_group_collection:
-                min_age_group["max_year"] = min_age_group[YearAgeRate.COL_NAME_MIN_YEAR].shift(-1) - 0.001
-                min_age_group["max_year"] = min_age_group["max_year"].fillna(2101)
-                new_node_group2 = pd.concat([new_node_group2, min_age_group])
-            new_node_group = new_node_group2.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE],
-                                                         ascending=True)
-
-            # ----------------------------------------------------------------------------------
-            # --- Duplicate the set of rows, but have the min_year be the max_year determined above
-            # ----------------------------------------------------------------------------------
-            node_group_max_year = new_node_group.copy()
-            node_group_max_year.drop([YearAgeRate.COL_NAME_MIN_YEAR], axis=1, inplace=True)
-            node_group_max_year.rename({"max_year": YearAgeRate.COL_NAME_MIN_YEAR}, axis=1, inplace=True)
-            new_node_group.drop(["max_year"], axis=1, inplace=True)
-            new_node_group = pd.concat([new_node_group, node_group_max_year])
-            new_node_group = new_node_group.sort_values(by=[YearAgeRate.COL_NAME_MIN_YEAR, YearAgeRate.COL_NAME_MIN_AGE],
-                                                        ascending=True)
+            max_years = np.append(min_years[1:] - 0.001, 2101.0)
+            years = np.column_stack([min_years, max_years]).ravel()
+            result_values = np.repeat(result_values, 2, axis=1)
         else:
             # Not coming up with a quick way to determine that the difference between years is 5.
             difference_between_years = 5
-            new_node_group[YearAgeRate.COL_NAME_MIN_YEAR] = new_node_group[YearAgeRate.COL_NAME_MIN_YEAR] + difference_between_years / 2.0
+            years = min_years + difference_between_years / 2.0
 
         # -----------------------------------------
         # --- Create the JSON for the distribution
@@ -284,25 +533,14 @@ class YearAgeRate:
             "AxisUnits": ["years", "simulation_year"],
             "AxisScaleFactors": [365, 1],
             "PopulationGroups": [
-                [],
-                []
+                ages.tolist(),
+                years.tolist()
             ],
             "ResultScaleFactor": (1.0 / 365.0),  # 2.73972602739726e-03,
             "ResultUnits": "",
-            "ResultValues": []
+            "ResultValues": result_values.tolist()
         }
 
-        min_ages  = sorted(new_node_group[YearAgeRate.COL_NAME_MIN_AGE ].unique().tolist()) # Noqa: E221, E202
-        min_years = sorted(new_node_group[YearAgeRate.COL_NAME_MIN_YEAR].unique().tolist())
-
-        dist_dict["PopulationGroups"][0] = min_ages
-        dist_dict["PopulationGroups"][1] = min_years
-
-        min_age_group_collection = new_node_group.groupby(YearAgeRate.COL_NAME_MIN_AGE)
-        for min_age, min_age_group in min_age_group_collection:
-            rate_values = min_age_group[YearAgeRate.COL_NAME_RATE].tolist()
-            dist_dict["ResultValues"].append(rate_values)
-
         return dist_dict
 
     def to_fertility_distributions(self) -> List[Tuple[int, FertilityDistribution]]:
@@ -320,11 +558,11 @@ class YearAgeRate:
         """
         fertility_distributions = []
 
-        node_group_collection = self.df.groupby(YearAgeRate.COL_NAME_NODE_ID)
-        for node_id, node_group in node_group_collection:
+        for node_index, node_id in enumerate(self._node_ids):
+            min_years, min_ages, rates = self._get_node_arrays(node_index)
             # TODO: we should be creating and returning distribution objects in this call, not json/converting below
             #  https://github.com/InstituteforDiseaseModeling/emodpy-hiv-old/issues/316
-            dist_dict = YearAgeRate._node_group_to_distribution_json(node_group)
+            dist_dict = YearAgeRate._node_to_distribution_json(min_years, min_ages, rates)
             dist_dict["ResultUnits"] = "annual birth rate per 1000 women"
             dist_dict["ResultScaleFactor"] = dist_dict["ResultScaleFactor"] / 1000.0
 
@@ -353,11 +591,12 @@ class YearAgeRate:
         """
         mortality_distributions = {}
 
-        node_group_collection = self.df.groupby(YearAgeRate.COL_NAME_NODE_ID)
-        for node_id, node_group in node_group_collection:
+        for node_index, node_id in enumerate(self._node_ids):
+            min_years, min_ages, rates = self._get_node_arrays(node_index)
             # TODO: we should be creating and returning distribution objects in this call, not json/converting below
             #  https://github.com/InstituteforDiseaseModeling/emodpy-hiv-old/issues/316
-            dist_dict = YearAgeRate._node_group_to_distribution_json(node_group, stepwise_for_year=stepwise_for_year)
+            dist_dict = YearAgeRate._node_to_distribution_json(min_years, min_ages, rates,
+                                                               stepwise_for_year=stepwise_for_year)
             dist_dict["ResultUnits"] = "annual death rate for an individual"
 
             distribution = MortalityDistribution.from_dict(distribution_dict=dist_dict)
@@ -1,5 +1,11 @@
+from collections import OrderedDict
 from functools import partial
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+import copy
+import hashlib
+import os
+import pickle
+import types
 
 
 class ParameterizedCall:
@@ -27,6 +33,11 @@ class ParameterizedCall:
             raise ValueError(f"Cannot remove label: {self.label} from labeled hyperparameter: {labeled_hyperparameter}")
         return unlabeled_hyperparameter
 
+    @property
+    def name(self) -> str:
+        func_name = getattr(self.func, "__qualname__", repr(self.func))
+        return func_name + self._label_str
+
     @property
     def labeled_hyperparameters(self) -> Dict[str, Any]:
         return {self._label_hyperparameter(hp): value for hp, value in self.hyperparameters.items()}
@@ -46,3 +57,297 @@ class ParameterizedCall:
 
     def prepare_call(self) -> callable:
         return partial(self.func, **self._non_hyperparameters, **self._hyperparameters_none_filtered)
+
+    def get_memo_key(self):
+        # The key is None if one of the values cannot be frozen (e.g. it cannot be pickled or it is
+        # a mutable object that is only hashed by its identity)
+        try:
+            func = self.func
+            func_key = (_freeze(getattr(func, "__self__", None)), getattr(func, "__module__", None), func.__qualname__)
+            return (func_key,
+                    _freeze(self._non_hyperparameters),
+                    _freeze(self._hyperparameters_none_filtered))
+        except (AttributeError, TypeError, pickle.PicklingError):
+            return None
+
+
+def apply_labeled_hyperparameters(parameterized_calls: List[ParameterizedCall],
+                                  hyperparameters: Dict[str, Any]) -> List[str]:
+    # Set each labeled hyperparameter on the call that owns it and return the names no call owns.
+    # A name owned by more than one call is ambiguous so it is an error to set it.
+    owners = {}
+    for pc in parameterized_calls:
+        for labeled_hyperparameter in pc.labeled_hyperparameters:
+            if labeled_hyperparameter in hyperparameters:
+                owners.setdefault(labeled_hyperparameter, []).append(pc)
+
+    ambiguous = {name: [pc.name for pc in pcs] for name, pcs in owners.items() if len(pcs) > 1}
+    if len(ambiguous) > 0:
+        msg = "The following hyperparameters are used by more than one ParameterizedCall.\n"
+        msg += "Give the calls different labels so that each hyperparameter has one owner.\n"
+        msg += "\n".join(f"{name}: {pc_names}" for name, pc_names in ambiguous.items())
+        raise ValueError(msg)
+
+    for name, pcs in owners.items():
+        pcs[0].set_labeled_hyperparameter(labeled_hyperparameter=name, value=hyperparameters[name])
+    return [name for name in hyperparameters if name not in owners]
+
+
+# ------------------------------------------------------------------------------------
+# --- The lists in emod_api.campaign that grow as a ParameterizedCall adds events.
+# --- "Events" is campaign.campaign_dict["Events"] and the others are module attributes.
+# ------------------------------------------------------------------------------------
+_CAMPAIGN_STATE_LISTS = ["individual_events_listened",
+                         "individual_events_broadcast",
+                         "node_events_listened",
+                         "node_events_broadcast",
+                         "coordinator_events_listened",
+                         "coordinator_events_broadcast",
+                         "implicits"]
+
+
+def _get_campaign_state(campaign) -> dict:
+    state = {"Events": campaign.campaign_dict["Events"]}
+    for name in _CAMPAIGN_STATE_LISTS:
+        if hasattr(campaign, name):
+            state[name] = getattr(campaign, name)
+    return state
+
+
+def _get_campaign_state_lengths(campaign) -> dict:
+    return {name: len(items) for name, items in _get_campaign_state(campaign).items()}
+
+
+def _get_campaign_state_added(campaign, lengths: dict) -> dict:
+    return {name: list(items[lengths[name]:]) for name, items in _get_campaign_state(campaign).items()}
+
+
+def _extend_campaign_state(campaign, added: dict) -> None:
+    for name, items in _get_campaign_state(campaign).items():
+        items.extend(added[name])
+
+
+def _clear_campaign_state(campaign) -> None:
+    for items in _get_campaign_state(campaign).values():
+        items.clear()
+
+
+# Types whose instances are hashed by identity but cannot change, so the identity is a safe key
+_IDENTITY_HASHED_IMMUTABLES = (type(None), type(Ellipsis), type(NotImplemented), type,
+                               types.FunctionType, types.ModuleType)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(_freeze(item) for item in value)
+    value_hash = type(value).__hash__
+    if value_hash is None:
+        # e.g. a DataFrame, compare by content
+        return type(value).__name__, pickle.dumps(value)
+    if (value_hash is object.__hash__) and not isinstance(value, _IDENTITY_HASHED_IMMUTABLES):
+        # The same object could have different contents the next time the call is made
+        raise TypeError(f"Cannot freeze {type(value).__name__} because it is hashed by its identity.")
+    hash(value)
+    return value
+
+
+def _get_schema_key(schema_path) -> Union[tuple, None]:
+    # A different schema can change the objects a call creates
+    if schema_path is None:
+        return None
+    try:
+        stat = os.stat(schema_path)
+        return str(schema_path), stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return str(schema_path), None, None
+
+
+class _CampaignRecorder:
+    # Records the events, signals, and implicits that a call adds to emod_api.campaign
+    @staticmethod
+    def is_target(obj) -> bool:
+        return hasattr(obj, "campaign_dict")
+
+    @staticmethod
+    def snapshot(obj):
+        return _get_campaign_state_lengths(obj)
+
+    @staticmethod
+    def get_state_key(obj, snapshot):
+        # The events depend on the base year and the schema but not on the events already added
+        return getattr(obj, "base_year", None), _get_schema_key(getattr(obj, "schema_path", None))
+
+    @staticmethod
+    def record(obj, snapshot, call):
+        call(obj)
+        return _get_campaign_state_added(obj, lengths=snapshot)
+
+    @staticmethod
+    def replay(obj, mutation) -> None:
+        _extend_campaign_state(obj, added=mutation)
+
+
+class _ParameterWriteTracker:
+    # Mixed into the class of the config parameters while a call is executed so that every assignment
+    # is recorded, including one that sets a parameter to the value it already has.
+    def __setitem__(self, name, value):
+        writes = self.__dict__.get("_memo_writes")
+        if writes is not None:
+            writes[name] = None
+        super().__setitem__(name, value)
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+
+_write_tracker_classes = {}
+
+
+def _track_writes(parameters):
+    cls = type(parameters)
+    if cls not in _write_tracker_classes:
+        _write_tracker_classes[cls] = type(f"_WriteTracked{cls.__name__}", (_ParameterWriteTracker, cls), {})
+    tracked = _write_tracker_classes[cls](parameters)
+    object.__setattr__(tracked, "_memo_writes", {})
+    return tracked
+
+
+class _ConfigRecorder:
+    # Records the config parameters that a call assigns or deletes.  The schema is not frozen, it is
+    # part of the key through the schema path.
+    @staticmethod
+    def is_target(obj) -> bool:
+        return isinstance(obj, dict) and ("parameters" in obj)
+
+    @staticmethod
+    def snapshot(obj):
+        return {name: _freeze(value) for name, value in obj["parameters"].items() if name != "schema"}
+
+    @staticmethod
+    def get_state_key(obj, snapshot):
+        frozen = pickle.dumps(tuple(sorted(snapshot.items(), key=lambda item: item[0])))
+        return _get_schema_key(obj.get("schema_path", None)), hashlib.sha256(frozen).hexdigest()
+
+    @staticmethod
+    def _is_changed(name, value, snapshot) -> bool:
+        # Finds the parameters that were changed in place (e.g. a list that was appended to)
+        if name == "schema":
+            return False
+        if name not in snapshot:
+            return True
+        try:
+            return _freeze(value) != snapshot[name]
+        except (TypeError, pickle.PicklingError):
+            return True
+
+    @staticmethod
+    def record(obj, snapshot, call):
+        parameters = obj["parameters"]
+        tracked = _track_writes(parameters)
+        obj["parameters"] = tracked
+        try:
+            call(obj)
+        finally:
+            obj["parameters"] = parameters
+            deleted = [name for name in parameters if name not in tracked]
+            changed = [name for name in tracked
+                       if (name in tracked._memo_writes) or _ConfigRecorder._is_changed(name, tracked[name], snapshot)]
+            for name in deleted:
+                del parameters[name]
+            for name in changed:
+                parameters[name] = tracked[name]
+        return {"set": {name: copy.deepcopy(tracked[name]) for name in changed},
+                "deleted": deleted}
+
+    @staticmethod
+    def replay(obj, mutation) -> None:
+        parameters = obj["parameters"]
+        for name in mutation["deleted"]:
+            del parameters[name]
+        for name, value in mutation["set"].items():
+            parameters[name] = copy.deepcopy(value)
+
+
+_MEMO_RECORDERS = [_CampaignRecorder, _ConfigRecorder]
+
+
+class ParameterizedCallMemo:
+    """
+    An LRU cache of what ParameterizedCall objects did to their target object so that a call
+    with the same function, non-hyperparameters, and hyperparameters can be replayed instead
+    of executed again.
+
+    Only mutations of the campaign (events, signals, and implicits) and of the config
+    parameters can be recorded.  Calls on other objects (e.g. demographics) and calls with
+    values that cannot be frozen are always executed and counted as bypasses.  Mutable
+    objects that are hashed by their identity cannot be frozen.
+
+    The key of a recorded call also includes the state it was executed on: the schema file
+    and, for the campaign, the base year, or for the config, the parameters before the call.
+    A config call records every parameter it assigns or deletes.
+
+    NOTE: The recorded campaign events are shared by every replay, so they should not be
+    modified after the campaign is built.
+
+    Args:
+        max_entries: The maximum number of recorded calls.  The least recently used entry
+            is dropped when a new one would exceed this.
+    """
+    def __init__(self, max_entries: int = 1024):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, not {max_entries}")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "entries": len(self._entries)}
+
+    def execute(self, parameterized_call: ParameterizedCall, obj) -> None:
+        """
+        Replay the recorded mutation of the call on obj, or execute the call and record it.
+        """
+        recorder = next((recorder for recorder in _MEMO_RECORDERS if recorder.is_target(obj)), None)
+        key = None if recorder is None else parameterized_call.get_memo_key()
+        if key is not None:
+            try:
+                snapshot = recorder.snapshot(obj)
+                key = (recorder.__name__, key, recorder.get_state_key(obj, snapshot))
+            except (AttributeError, TypeError, pickle.PicklingError):
+                key = None
+        if key is None:
+            self.bypasses += 1
+            parameterized_call.prepare_call()(obj)
+            return
+
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            recorder.replay(obj, self._entries[key])
+            return
+
+        self.misses += 1
+        self._entries[key] = recorder.record(obj, snapshot, parameterized_call.prepare_call())
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import json
+import statistics
 from datetime import datetime
 
 
@@ -120,3 +121,170 @@ class ChannelReport:
         df = pd.DataFrame(result_dict)
 
         return df
+
+
+class _P2QuantileSketch:
+    """
+    Estimate a quantile of each element of the arrays added to it with the P-squared algorithm
+    (Jain & Chlamtac, 1985).  It keeps five markers per element so the memory does not grow
+    with the number of arrays.  The quantile is exact until five arrays have been added.
+    """
+    def __init__(self, quantile: float):
+        if not (0.0 < quantile < 1.0):
+            raise ValueError(f"The quantile ({quantile}) must be between 0 and 1.")
+        self.quantile = quantile
+        self.count = 0
+        self._first_values = []
+        # The heights and positions of the markers have the shape (5,) + the shape of the arrays
+        self._heights = None
+        self._positions = None
+        self._desired = np.array([1.0, 1.0 + 2.0 * quantile, 1.0 + 4.0 * quantile, 3.0 + 2.0 * quantile, 5.0])
+        self._increments = np.array([0.0, quantile / 2.0, quantile, (1.0 + quantile) / 2.0, 1.0])
+
+    def add(self, values: np.ndarray):
+        self.count += 1
+        if self._heights is None:
+            self._first_values.append(np.array(values, dtype=float))
+            if self.count == 5:
+                self._heights = np.sort(np.stack(self._first_values), axis=0)
+                self._positions = np.ones_like(self._heights) * np.arange(1.0, 6.0).reshape((5,) + (1,) * values.ndim)
+                self._first_values = None
+            return
+
+        q = self._heights
+        n = self._positions
+        q[0] = np.minimum(q[0], values)
+        q[4] = np.maximum(q[4], values)
+        n[1:4] += (values < q[1:4])
+        n[4] += 1
+        self._desired += self._increments
+
+        # Move the middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            move = ((d >= 1) & ((n[i + 1] - n[i]) > 1)) | ((d <= -1) & ((n[i - 1] - n[i]) < -1))
+            if not move.any():
+                continue
+            s = np.sign(d) * move
+            parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+            linear = np.where(s > 0,
+                              q[i] + (q[i + 1] - q[i]) / (n[i + 1] - n[i]),
+                              q[i] - (q[i - 1] - q[i]) / (n[i - 1] - n[i]))
+            height = np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear)
+            q[i] = np.where(move, height, q[i])
+            n[i] += s
+
+    def get_value(self) -> np.ndarray:
+        if self.count == 0:
+            raise ValueError("No values have been added.")
+        if self._heights is None:
+            return np.quantile(np.stack(self._first_values), self.quantile, axis=0)
+        return self._heights[2].copy()
+
+
+class ChannelReportStatistics:
+    """
+    Calculate the mean, variance, confidence interval, and quantiles of each channel at each
+    time step over many channel reports (e.g. the InsetChart.json files of an experiment) while
+    the reports are read one at a time.  The mean and variance are updated with Welford's
+    algorithm and the quantiles are estimated with P-squared sketches so the memory does not
+    depend on the number of reports unless keep_raw_data is True.
+
+    All of the reports must have the same channels and number of time steps.  The statistics
+    are returned as channel report dictionaries like ChannelReport creates.
+
+    Args:
+        quantiles (list[float]): The quantiles (between 0 and 1) to estimate, e.g. [0.025, 0.975].
+        keep_raw_data (bool): If True, the reports are kept in raw_data_list (e.g. for plotting
+            the individual runs) and the memory grows with the number of reports.
+    """
+    def __init__(self, quantiles: list[float] = None, keep_raw_data: bool = False):
+        self.quantiles = [] if quantiles is None else list(quantiles)
+        self.keep_raw_data = keep_raw_data
+        self.raw_data_list = []
+        self.num_reports = 0
+        self.channel_names = None
+        self._mean = None
+        self._m2 = None
+        self._sketches = [_P2QuantileSketch(quantile) for quantile in self.quantiles]
+
+    def add(self, channel_report_dict: dict):
+        """
+        Add the data of a channel report to the statistics.
+
+        Args:
+            channel_report_dict (dict): The contents of a channel report JSON file.
+        """
+        channels = channel_report_dict["Channels"]
+        if self.channel_names is None:
+            self.channel_names = list(channels.keys())
+        elif (len(channels) != len(self.channel_names)) or any(name not in channels for name in self.channel_names):
+            raise ValueError(f"The report has the channels {sorted(channels.keys())} "
+                             + f"instead of {sorted(self.channel_names)}.")
+
+        values = np.array([channels[name]["Data"] for name in self.channel_names], dtype=float)
+        if self._mean is None:
+            self._mean = np.zeros_like(values)
+            self._m2 = np.zeros_like(values)
+        elif values.shape != self._mean.shape:
+            raise ValueError(f"The report has {values.shape[1]} time steps instead of {self._mean.shape[1]}.")
+
+        self.num_reports += 1
+        delta = values - self._mean
+        self._mean += delta / self.num_reports
+        self._m2 += delta * (values - self._mean)
+        for sketch in self._sketches:
+            sketch.add(values)
+        if self.keep_raw_data:
+            self.raw_data_list.append(channel_report_dict)
+
+    def add_file(self, filename: str):
+        """
+        Read the channel report JSON file and add its data to the statistics.
+        """
+        with open(filename, "r") as file:
+            self.add(json.load(file))
+
+    def _check_num_reports(self, min_num_reports: int):
+        if self.num_reports < min_num_reports:
+            raise ValueError(f"At least {min_num_reports} report(s) must be added; {self.num_reports} were added.")
+
+    def _to_channel_report(self, values: np.ndarray) -> dict:
+        df = pd.DataFrame(dict(zip(self.channel_names, values)))
+        return ChannelReport(df=df).json_data
+
+    def get_mean(self) -> dict:
+        """
+        Return the mean of each channel at each time step.
+        """
+        self._check_num_reports(1)
+        return self._to_channel_report(self._mean)
+
+    def get_variance(self, ddof: int = 1) -> dict:
+        """
+        Return the variance of each channel at each time step.  By default, it is the sample
+        variance like pandas calculates (ddof=1).
+        """
+        self._check_num_reports(ddof + 1)
+        return self._to_channel_report(self._m2 / (self.num_reports - ddof))
+
+    def get_confidence_interval(self, confidence: float = 0.95) -> tuple[dict, dict]:
+        """
+        Return the lower and upper bounds of the normal confidence interval of the mean of each
+        channel at each time step: mean +/- z * standard deviation / sqrt(number of reports).
+        """
+        self._check_num_reports(2)
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        half_width = z * np.sqrt(self._m2 / (self.num_reports - 1) / self.num_reports)
+        return self._to_channel_report(self._mean - half_width), self._to_channel_report(self._mean + half_width)
+
+    def get_quantile(self, quantile: float) -> dict:
+        """
+        Return the estimate of the given quantile of each channel at each time step.  The
+        quantile must be one of the quantiles given to the constructor.
+        """
+        if quantile not in self.quantiles:
+            raise ValueError(f"The quantile ({quantile}) is not one of the quantiles being estimated {self.quantiles}.")
+        self._check_num_reports(1)
+        return self._to_channel_report(self._sketches[self.quantiles.index(quantile)].get_value())
@@ -1,3 +1,5 @@
+import functools
+import multiprocessing
 import os
 
 
@@ -70,3 +72,56 @@ def get_filenames(dir_or_filename: str,
 
     dir_filenames = sorted(dir_filenames)
     return dir_filenames
+
+
+def imap_files(function,
+               filenames: list[str],
+               workers: int = 1,
+               **kwargs):
+    """
+    Like map_files() but yield the results one at a time, in the order of the filenames, so the
+    caller can combine them without keeping all of them in memory.
+    """
+    call = functools.partial(function, **kwargs)
+    workers = os.cpu_count() if workers is None else workers
+    workers = max(1, min(workers, len(filenames)))
+    if workers == 1:
+        for filename in filenames:
+            yield call(filename)
+        return
+
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    context = multiprocessing.get_context(start_method)
+    with context.Pool(processes=workers) as pool:
+        yield from pool.imap(call, filenames, chunksize=1)
+
+
+def map_files(function,
+              filenames: list[str],
+              workers: int = 1,
+              **kwargs) -> list:
+    """
+    Call function(filename, **kwargs) for each of the filenames and return the results in the
+    order of the filenames.  With more than one worker, the files are processed by a pool of
+    processes so the function and its arguments must be picklable (e.g. a module-level function).
+    Since the results are returned in the same order, combining them gives the same result for
+    any number of workers.
+
+    Args:
+        function (callable, required):
+            The function to call for each file.  Its first argument is the name of the file.
+
+        filenames (list[str], required):
+            The files to process - typically from get_filenames().
+
+        workers (int, optional):
+            The number of processes to use.  If 1, the files are processed in this process.
+            If None, use os.cpu_count().
+
+        kwargs:
+            The other arguments of the function.
+
+    Returns:
+        (list): The result of the function for each file.
+    """
+    return list(imap_files(function, filenames, workers=workers, **kwargs))
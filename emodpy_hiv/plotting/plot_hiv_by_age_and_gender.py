@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import pandas as pd
 from typing import Union
 
@@ -6,6 +7,7 @@ import emodpy_hiv.demographics.un_world_pop as unwp
 
 import emodpy_hiv.plotting.xy_plot as xy_plot
 import emodpy_hiv.plotting.helpers as helpers
+from emodpy_hiv.plotting.report_hiv_by_age_and_gender import read_report_hiv_by_age_and_gender, gender_to_id
 
 
 TEST_include_dir_or_filename = True
@@ -184,7 +186,11 @@ def extract_population_data(filename: str,
 
     It is assumed that the file has ages every 5 years from 0 to 100.
     """
-    df = pd.read_csv(filename)
+    genders = None if gender is None else [gender_to_id(gender)]
+    df = read_report_hiv_by_age_and_gender(filename,
+                                           columns=[COL_NAME_YEAR, COL_NAME_ON_ART, COL_NAME_AGE,
+                                                    COL_NAME_POP, other_strat_column_name],
+                                           genders=genders)
 
     # -------------------------------------------
     # Verify the CSV file has the correct columns
@@ -218,7 +224,8 @@ def extract_population_data(filename: str,
     pv = df.pivot_table(index=COL_NAME_YEAR,
                         columns=pv_columns,
                         values=COL_NAME_POP,
-                        aggfunc="sum")
+                        aggfunc="sum",
+                        observed=True)
 
     # ------------------------------------------------------------
     # Extract data from pivot table and put in dataframe.
@@ -258,6 +265,54 @@ def extract_population_data(filename: str,
     return df2
 
 
+def _sum_by_year_and_age_bin(df: pd.DataFrame,
+                             data_column_names: list[str],
+                             age_bin_list: list[float] = None,
+                             group_column_name: str = None,
+                             years: np.ndarray = None) -> pd.DataFrame:
+    """
+    Sum the data columns for each year, each age bin, and each value of the group column with one
+    groupby.  Age bin i holds the ages in [age_bin_list[i], age_bin_list[i+1]).
+
+    Returns:
+        (pd.DataFrame): Indexed by the sorted years (default: the years in df) and with a column for
+        each combination (data column name, group value, age bin index) that has data.  The group
+        value and the age bin index are left out when group_column_name or age_bin_list is None.
+    """
+    years = np.sort(df[COL_NAME_YEAR].unique() if years is None else years)
+
+    keys = [df[COL_NAME_YEAR]]
+    if group_column_name is not None:
+        keys.append(df[group_column_name])
+    if age_bin_list:
+        bin_indexes = np.digitize(df[COL_NAME_AGE].to_numpy(), age_bin_list) - 1
+        in_bins = (bin_indexes >= 0) & (bin_indexes < len(age_bin_list) - 1)
+        df = df[in_bins]
+        keys = [key[in_bins] for key in keys]
+        keys.append(pd.Series(bin_indexes[in_bins], index=df.index, name="age_bin"))
+
+    sums = df.groupby(keys, observed=True)[data_column_names].sum()
+    if len(keys) > 1:
+        sums = sums.unstack(list(range(1, len(keys))))
+    return sums.reindex(years, fill_value=0)
+
+
+def _get_sum(sums: pd.DataFrame, column_tuple) -> pd.Series:
+    # Combinations without data did not have any people
+    if column_tuple in sums.columns:
+        return sums[column_tuple]
+    return pd.Series(0.0, index=sums.index)
+
+
+def _validate_age_bin_list(age_bin_list: list[float]):
+    if age_bin_list and (len(age_bin_list) > 1) and not np.all(np.diff(age_bin_list) > 0):
+        raise ValueError(f"The ages in 'age_bin_list' ({age_bin_list}) must be increasing.")
+
+
+def _get_age_label(age_bin_list: list[float], age_index: int) -> str:
+    return ":" + str(age_bin_list[age_index]) + " - " + str(age_bin_list[age_index + 1])
+
+
 def extract_population_data_multiple_ages(filename: str,
                                           node_id: int = None,
                                           gender: str = None,
@@ -269,7 +324,15 @@ def extract_population_data_multiple_ages(filename: str,
     """
     Extract population data for multiple ages for a specific node and gender.
     """
-    df = pd.read_csv(filename)
+    _validate_age_bin_list(age_bin_list)
+
+    columns = [COL_NAME_YEAR, COL_NAME_AGE, COL_NAME_HAS_HIV, COL_NAME_POP, other_strat_column_name]
+    if other_data_column_names is not None:
+        columns.extend(other_data_column_names)
+    df = read_report_hiv_by_age_and_gender(filename,
+                                           columns=columns,
+                                           node_ids=None if node_id is None else [node_id],
+                                           genders=None if gender is None else [gender_to_id(gender)])
 
     # -----------------------------------------
     # Verify the report had the correct columns
@@ -286,100 +349,48 @@ def extract_population_data_multiple_ages(filename: str,
     if other_data_column_names is None:
         other_data_column_names = []
 
-    # -----------------------------------------------------
-    # Determine what data to put in to the pivot table and
-    # create pivot table
-    # -----------------------------------------------------
-    pv_columns = []
-    age_data_list = []
-    if node_id is not None:
-        pv_columns.append(COL_NAME_NODE_ID)
-    if gender is not None:
-        pv_columns.append(COL_NAME_GENDER)
-    if other_strat_column_name is not None:
-        pv_columns.append(other_strat_column_name)
-    if age_bin_list is not None:
-        pv_columns.append(COL_NAME_AGE)
-        age_data_list = df[COL_NAME_AGE].unique()
-
     data_is_for_hiv_negative = False
     if filter_by_hiv_negative:
         if COL_NAME_HAS_HIV in df.columns:
             df = df[df[COL_NAME_HAS_HIV] == 0]
             data_is_for_hiv_negative = True
 
-    data_columns = COL_NAME_POP
-    if len(other_data_column_names) > 0:
-        data_columns = []
-        data_columns.append(COL_NAME_POP)
-        for col_name in other_data_column_names:
-            if col_name is not None and col_name not in df.columns:
-                raise ValueError(f"'{col_name}' column does not exist in the file({filename}).")
-            data_columns.append(col_name)
-
-    gender_id = 1
-    if gender == "Male":
-        gender_id = 0
-
-    pv = df.pivot_table(index=COL_NAME_YEAR,
-                        columns=pv_columns,
-                        values=data_columns,
-                        aggfunc="sum")
-
-    # -------------------------------------------------------
-    # Move the data from the pivot table to a new dataframe.
-    # If doing ages, we need to create labels for the columns
-    # that includes the age ranges.
-    # -------------------------------------------------------
-    df2 = pd.DataFrame()
-    df2.index = pv.index.values
-
     new_column_names = []
     new_column_names.append(COL_NAME_POP)
     for col_name in other_data_column_names:
+        if col_name is not None and col_name not in df.columns:
+            raise ValueError(f"'{col_name}' column does not exist in the file({filename}).")
         new_column_names.append(col_name)
 
-    list_for_tuple = []
-    if node_id is not None:
-        list_for_tuple.append(node_id)
-    if gender is not None:
-        list_for_tuple.append(gender_id)
+    # ------------------------------------------------------------
+    # The reader already selected the node and gender so select
+    # the other stratification and sum the data by year and age bin.
+    # Keep the years of the other values of the stratification.
+    # ------------------------------------------------------------
+    years = df[COL_NAME_YEAR].unique()
     if other_strat_column_name is not None:
-        list_for_tuple.append(other_strat_value)
+        df = df[df[other_strat_column_name] == other_strat_value]
+    sums = _sum_by_year_and_age_bin(df=df,
+                                    data_column_names=new_column_names,
+                                    age_bin_list=age_bin_list,
+                                    years=years)
+
+    # -------------------------------------------------------
+    # Move the data to a new dataframe.  If doing ages, we
+    # need to create labels for the columns that includes the
+    # age ranges.
+    # -------------------------------------------------------
+    data = {}
     if age_bin_list:
         for age_index in range(len(age_bin_list) - 1):
-            age_min = age_bin_list[age_index]
-            age_max = age_bin_list[age_index + 1]
-            age_label = ":" + str(age_min) + " - " + str(age_max)
+            age_label = _get_age_label(age_bin_list, age_index)
             for col_name in new_column_names:
-                df2[col_name + age_label] = 0
-            for age in age_data_list:
-                if (age_min <= age) and (age < age_max):
-                    for col_name in new_column_names:
-                        list_for_tuple_with_age = []
-                        if len(other_data_column_names) > 0:
-                            list_for_tuple_with_age.append(col_name)
-                        list_for_tuple_with_age.extend(list_for_tuple)
-                        list_for_tuple_with_age.append(float(age))
-                        if len(list_for_tuple_with_age) == 1:
-                            column_tuple = list_for_tuple_with_age[0]
-                        else:
-                            column_tuple = tuple(list_for_tuple_with_age)
-                        df2[col_name + age_label] = df2[col_name + age_label] + pv[column_tuple]
+                data[col_name + age_label] = _get_sum(sums, (col_name, age_index))
     else:
         for col_name in new_column_names:
-            column_tuple = col_name
-            if len(list_for_tuple) > 0:
-                list_for_tuple_copy = []
-                if len(other_data_column_names) > 0:
-                    list_for_tuple_copy.append(col_name)
-                list_for_tuple_copy.extend(list_for_tuple)
-                if len(list_for_tuple_copy) == 1:
-                    column_tuple = list_for_tuple_copy[0]
-                else:
-                    column_tuple = tuple(list_for_tuple_copy)
-            df2[col_name] = pv[column_tuple]
+            data[col_name] = _get_sum(sums, col_name)
 
+    df2 = pd.DataFrame(data, index=sums.index.values)
     return df2, data_is_for_hiv_negative
 
 
@@ -395,8 +406,12 @@ def extract_population_data_by_stratification(filename: str,
     if age_bin_list is not None and len(age_bin_list) < 2:
         raise ValueError("'age_bin_list' must have at least two values.\n"
                          + "The second value is the max of the i-th bin and the min of the (i+1)-th bin.")
+    _validate_age_bin_list(age_bin_list)
 
-    df = pd.read_csv(filename)
+    df = read_report_hiv_by_age_and_gender(filename,
+                                           columns=[COL_NAME_YEAR, COL_NAME_AGE, COL_NAME_POP, start_column_name],
+                                           node_ids=None if node_id is None else [node_id],
+                                           genders=None if gender is None else [gender_to_id(gender)])
 
     # --------------------------------------------
     # Verify the CSV file has the expected columns
@@ -410,94 +425,66 @@ def extract_population_data_by_stratification(filename: str,
         strat_values = df[start_column_name].unique()
         strat_values = [x for x in strat_values if str(x) != 'nan']
 
-    # -----------------------------------------------------
-    # Determine what data to put in to the pivot table and
-    # create pivot table
-    # -----------------------------------------------------
-    pv_columns = []
-    age_data_list = []
-    pv_columns.append(start_column_name)
-    if node_id is not None:
-        pv_columns.append(COL_NAME_NODE_ID)
-    if gender is not None:
-        pv_columns.append(COL_NAME_GENDER)
-    if age_bin_list is not None:
-        pv_columns.append(COL_NAME_AGE)
-        age_data_list = df[COL_NAME_AGE].unique()
-
-    data_columns = COL_NAME_POP
-
-    gender_id = 1
-    if gender == "Male":
-        gender_id = 0
-
-    pv = df.pivot_table(index=COL_NAME_YEAR,
-                        columns=pv_columns,
-                        values=data_columns,
-                        aggfunc="sum")
+    # ------------------------------------------------------------
+    # The reader already selected the node and gender so sum the
+    # population of each stratification by year and age bin.
+    # ------------------------------------------------------------
+    sums = _sum_by_year_and_age_bin(df=df,
+                                    data_column_names=[COL_NAME_POP],
+                                    age_bin_list=age_bin_list,
+                                    group_column_name=start_column_name)
 
     # -------------------------------------------------------
-    # Move the data from the pivot table to a new dataframe.
-    # If doing ages, we need to create labels for the columns
-    # that includes the age ranges.
+    # Move the data to a new dataframe.  If doing ages, we
+    # need to create labels for the columns that includes the
+    # age ranges.
     # -------------------------------------------------------
-    df2 = pd.DataFrame()
-    df2.index = pv.index.values
-
+    data = {}
     for strat_value in strat_values:
-        list_for_tuple = []
-        list_for_tuple.append(strat_value)
-        if node_id is not None:
-            list_for_tuple.append(node_id)
-        if gender is not None:
-            list_for_tuple.append(gender_id)
         if age_bin_list:
             for age_index in range(len(age_bin_list) - 1):
-                age_min = age_bin_list[age_index]
-                age_max = age_bin_list[age_index + 1]
-                age_label = ":" + str(age_min) + " - " + str(age_max)
-                df2[strat_value + age_label] = 0
-                for age in age_data_list:
-                    if (age_min <= age) and (age < age_max):
-                        list_for_tuple_with_age = list_for_tuple.copy()
-                        list_for_tuple_with_age.append(float(age))
-                        column_tuple = tuple(list_for_tuple_with_age)
-                        df2[strat_value + age_label] = df2[strat_value + age_label] + pv[column_tuple]
+                age_label = _get_age_label(age_bin_list, age_index)
+                data[strat_value + age_label] = _get_sum(sums, (COL_NAME_POP, strat_value, age_index))
         else:
-            column_tuple = strat_value
-            if len(list_for_tuple) > 0:
-                list_for_tuple_copy = list_for_tuple.copy()
-                if len(list_for_tuple_copy) == 1:
-                    column_tuple = list_for_tuple_copy[0]
-                else:
-                    column_tuple = tuple(list_for_tuple_copy)
-            df2[strat_value] = pv[column_tuple]
+            data[strat_value] = _get_sum(sums, (COL_NAME_POP, strat_value))
 
+    df2 = pd.DataFrame(data, index=sums.index.values)
     return df2
 
 
+def _extract_population_data_by_stratification_for_file(filename: str, **kwargs):
+    print(f"Extracting data from {filename}")
+    return extract_population_data_by_stratification(filename=filename, **kwargs)
+
+
 def extract_population_data_by_stratification_for_dir(dir_or_filename: str,
                                                       node_id: int = None,
                                                       gender: str = None,
                                                       age_bin_list: list[float] = None,
                                                       start_column_name: str = None,
                                                       strat_values: list[str] = None,
-                                                      show_avg_per_run: bool = False):
+                                                      show_avg_per_run: bool = False,
+                                                      workers: int = 1):
+    """
+    Extract the population for each stratification from each ReportHIVByAgeAndGender.csv file
+    in the directory and combine them.  See helpers.map_files() for 'workers'.
+    """
     combined_df = pd.DataFrame()
 
     dir_filenames = helpers.get_filenames(dir_or_filename=dir_or_filename,
                                           file_prefix="ReportHIVByAgeAndGender",
                                           file_extension=".csv")
 
-    for fn in dir_filenames:
-        print(f"Extracting data from {fn}")
-        df = extract_population_data_by_stratification(filename=fn,
-                                                       node_id=node_id,
-                                                       gender=gender,
-                                                       age_bin_list=age_bin_list,
-                                                       start_column_name=start_column_name,
-                                                       strat_values=strat_values)
+    df_list = helpers.map_files(_extract_population_data_by_stratification_for_file,
+                                dir_filenames,
+                                workers=workers,
+                                node_id=node_id,
+                                gender=gender,
+                                age_bin_list=age_bin_list,
+                                start_column_name=start_column_name,
+                                strat_values=strat_values)
 
+    for fn, df in zip(dir_filenames, df_list):
         if len(combined_df.columns) == 0:
             combined_df.index = df.index
             for column_name in df.columns:
@@ -711,7 +698,7 @@ def plot_population_by_gender(filename: str,
     if not os.path.isfile(filename):
         raise ValueError(f"The filename, '{filename}' given does not appear to be a file.")
 
-    df = pd.read_csv(filename)
+    df = read_report_hiv_by_age_and_gender(filename, columns=[COL_NAME_YEAR, COL_NAME_GENDER, COL_NAME_POP])
 
     if COL_NAME_GENDER not in df.columns:
         raise ValueError(f"'{COL_NAME_GENDER}' column does not exist in the file({filename}).")
@@ -910,7 +897,7 @@ def plot_columns(filename: str,
     if not os.path.isfile(filename):
         raise ValueError(f"The filename, '{filename}' given does not appear to be a file.")
 
-    df = pd.read_csv(filename)
+    df = read_report_hiv_by_age_and_gender(filename, columns=[COL_NAME_YEAR, COL_NAME_POP] + column_names)
 
     for name in column_names:
         if name not in df.columns:
@@ -969,10 +956,11 @@ def plot_circumcision_by_age(filename: str,
     if not os.path.isfile(filename):
         raise ValueError(f"The filename, '{filename}' given does not appear to be a file.")
 
-    df = pd.read_csv(filename)
+    # Only men can be circumcised
+    df = read_report_hiv_by_age_and_gender(filename,
+                                           columns=[COL_NAME_YEAR, COL_NAME_AGE, COL_NAME_IS_CIRC, COL_NAME_POP],
+                                           genders=[gender_to_id("Male")])
 
-    if COL_NAME_GENDER not in df.columns:
-        raise ValueError(f"'{COL_NAME_GENDER}' column does not exist in the file({filename}).")
     if COL_NAME_AGE not in df.columns:
         raise ValueError(f"'{COL_NAME_AGE}' column does not exist in the file({filename}).")
 
@@ -1015,6 +1003,26 @@ def plot_circumcision_by_age(filename: str,
                     y_axis_as_log_scale=False)
 
 
+def _extract_population_data_multiple_ages_for_file(filename: str,
+                                                    other_strat_column_name: str = None,
+                                                    other_strat_value_a: Union[int, float, str] = None,
+                                                    other_strat_value_b: Union[int, float, str] = None,
+                                                    **kwargs):
+    print("extracting data from " + filename)
+    df_a, hiv_neg_a = extract_population_data_multiple_ages(filename,
+                                                            other_strat_column_name=other_strat_column_name,
+                                                            other_strat_value=other_strat_value_a,
+                                                            **kwargs)
+    df_b = None
+    hiv_neg_b = None
+    if other_strat_column_name is not None and other_strat_value_b is not None:
+        df_b, hiv_neg_b = extract_population_data_multiple_ages(filename,
+                                                                other_strat_column_name=other_strat_column_name,
+                                                                other_strat_value=other_strat_value_b,
+                                                                **kwargs)
+    return df_a, hiv_neg_a, df_b, hiv_neg_b
+
+
 def extract_population_data_multiple_ages_for_dir(dir_or_filename: str,
                                                   node_id: int = None,
                                                   gender: str = None,
@@ -1024,35 +1032,30 @@ def extract_population_data_multiple_ages_for_dir(dir_or_filename: str,
                                                   other_strat_column_name: str = None,
                                                   other_strat_value_a: Union[int, float, str] = None,
                                                   other_strat_value_b: Union[int, float, str] = None,
-                                                  other_data_column_names: list[str] = None):
+                                                  other_data_column_names: list[str] = None,
+                                                  workers: int = 1):
+    """
+    Extract the population data by age from each ReportHIVByAgeAndGender.csv file in the directory
+    and combine them.  See helpers.map_files() for 'workers'.
+    """
     combined_df = pd.DataFrame()
 
     data_is_for_hiv_negative = False
     dir_filenames = helpers.get_filenames(dir_or_filename=dir_or_filename,
                                           file_prefix="ReportHIVByAgeAndGender",
                                           file_extension=".csv")
-    for fn in dir_filenames:
-        print("extracting data from " + fn)
-        df_a, hiv_neg_a = extract_population_data_multiple_ages(fn,
-                                                                node_id=node_id,
-                                                                gender=gender,
-                                                                age_bin_list=age_bin_list,
-                                                                filter_by_hiv_negative=filter_by_hiv_negative,
-                                                                other_strat_column_name=other_strat_column_name,
-                                                                other_strat_value=other_strat_value_a,
-                                                                other_data_column_names=other_data_column_names)
-        df_b = None
-        hiv_neg_b = None
-        if other_strat_column_name is not None and other_strat_value_b is not None:
-            df_b, hiv_neg_b = extract_population_data_multiple_ages(fn,
-                                                                    node_id=node_id,
-                                                                    gender=gender,
-                                                                    age_bin_list=age_bin_list,
-                                                                    filter_by_hiv_negative=filter_by_hiv_negative,
-                                                                    other_strat_column_name=other_strat_column_name,
-                                                                    other_strat_value=other_strat_value_b,
-                                                                    other_data_column_names=other_data_column_names)
-
+    results = helpers.map_files(_extract_population_data_multiple_ages_for_file,
+                                dir_filenames,
+                                workers=workers,
+                                node_id=node_id,
+                                gender=gender,
+                                age_bin_list=age_bin_list,
+                                filter_by_hiv_negative=filter_by_hiv_negative,
+                                other_strat_column_name=other_strat_column_name,
+                                other_strat_value_a=other_strat_value_a,
+                                other_strat_value_b=other_strat_value_b,
+                                other_data_column_names=other_data_column_names)
+    for fn, (df_a, hiv_neg_a, df_b, hiv_neg_b) in zip(dir_filenames, results):
         if hiv_neg_b is not None and hiv_neg_a != hiv_neg_b:
             raise ValueError("The two dataframes for the two stratifications do not have the same HIV negative status. "
                              + "This is likely because you are trying to extract data for a stratification that does not exist in the file.")
@@ -1467,7 +1470,8 @@ def plot_population_by_age_vs_unworld_pop(filename: str,
     if not os.path.isfile(filename):
         raise ValueError(f"The filename, '{filename}' given does not appear to be a file.")
 
-    df = pd.read_csv(filename)
+    df = read_report_hiv_by_age_and_gender(filename,
+                                           columns=[COL_NAME_YEAR, COL_NAME_GENDER, COL_NAME_AGE, COL_NAME_POP])
 
     if COL_NAME_GENDER not in df.columns:
         raise ValueError(f"'{COL_NAME_GENDER}' column does not exist in the file({filename}).")
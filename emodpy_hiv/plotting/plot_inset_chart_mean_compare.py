@@ -1,21 +1,68 @@
 import sys
 import argparse
-import pandas as pd
 import json
 
 import emodpy_hiv.plotting.helpers as helpers
 import emodpy_hiv.plotting.plot_inset_chart as pic
-from emodpy_hiv.plotting.channel_report import ChannelReport
+from emodpy_hiv.plotting.channel_report import ChannelReport, ChannelReportStatistics
 
 
-def calculate_mean(dir_name: str):
+def _read_inset_chart(filename: str):
+    with open(filename, "r") as test_file:
+        return json.loads(test_file.read())
+
+
+def calculate_statistics(dir_name: str,
+                         quantiles: list[float] = None,
+                         keep_raw_data: bool = False,
+                         workers: int = 1) -> ChannelReportStatistics:
+    """
+    Calculate the statistics of the InsetChart.json files in the given directory while reading
+    them one at a time.  Only the statistics are kept unless keep_raw_data is True.
+
+    Args:
+        dir_name (str):
+            Directory with InsetChart.json files
+
+        quantiles (list[float]):
+            The quantiles to estimate, e.g. [0.025, 0.5, 0.975].
+
+        keep_raw_data (bool):
+            If true, the data of each file is kept in the raw_data_list of the result.
+
+        workers (int):
+            The number of processes used to read the files.  See helpers.map_files().
+
+    Returns:
+        (ChannelReportStatistics): The mean, variance, confidence intervals, and quantiles of the channels.
     """
-    Calculate the mean of the InsetChart.json files in the given directory.
+    test_filenames = helpers.get_filenames(dir_or_filename=dir_name,
+                                           file_prefix="InsetChart",
+                                           file_extension="json")
+
+    channel_statistics = ChannelReportStatistics(quantiles=quantiles, keep_raw_data=keep_raw_data)
+    for test_json in helpers.imap_files(_read_inset_chart, test_filenames, workers=workers):
+        channel_statistics.add(test_json)
+    return channel_statistics
+
+
+def calculate_mean(dir_name: str, workers: int = 1, keep_raw_data: bool = True):
+    """
+    Calculate the mean of the InsetChart.json files in the given directory.  Each channel is
+    averaged at each Time over the files that have that channel and Time, so the files can
+    have different channels and numbers of time steps.  The files are read one at a time and
+    only the sums and counts are kept unless keep_raw_data is True.
 
     Args:
         dir_name (str):
             Directory with InsetChart.json files
 
+        workers (int):
+            The number of processes used to read the files.  See helpers.map_files().
+
+        keep_raw_data (bool):
+            If false, the data of the files is not kept and raw_data_list is empty.
+
     Returns:
         mean_cr (ChannelReport): Mean ChannelReport object
         raw_data_list (list): List of raw data dictionaries from the InsetChart.json files
@@ -25,15 +72,25 @@ def calculate_mean(dir_name: str):
                                            file_extension="json")
 
     raw_data_list = []
-    total_df = pd.DataFrame()
-    for test_fn in test_filenames:
-        with open(test_fn, "r") as test_file:
-            test_json = json.loads(test_file.read())
+    sum_df = None
+    count_df = None
+    for test_json in helpers.imap_files(_read_inset_chart, test_filenames, workers=workers):
+        if keep_raw_data:
             raw_data_list.append(test_json)
-        df = ChannelReport.convert_to_df(test_json)
-        total_df = pd.concat([total_df, df])
-
-    mean_df = total_df.groupby("Time").mean().reset_index()
+        df = ChannelReport.convert_to_df(test_json).set_index("Time").astype(float)
+        if sum_df is None:
+            sum_df = df
+            count_df = df.notna().astype(int)
+            continue
+        # the channels stay in the order they are first seen like pd.concat() keeps them
+        columns = sum_df.columns.union(df.columns, sort=False)
+        sum_df = sum_df.add(df, fill_value=0.0)[columns]
+        count_df = count_df.add(df.notna().astype(int), fill_value=0)[columns]
+
+    if sum_df is None:
+        raise ValueError(f"There are no InsetChart.json files in '{dir_name}'.")
+
+    mean_df = (sum_df / count_df).sort_index().reset_index()
     mean_cr = ChannelReport(df=mean_df)
     mean_cr = mean_cr.convert_df_to_channel_report(df=mean_df)
 
@@ -84,19 +141,19 @@ def plot_mean(dir1: str,
 
     if dir1 is not None:
         dir_names.append(dir1)
-        mean_cr_1, raw_data_list_1 = calculate_mean(dir1)
+        mean_cr_1, raw_data_list_1 = calculate_mean(dir1, keep_raw_data=show_raw_data)
         mean_data.append(mean_cr_1)
         raw_data_lists.append(raw_data_list_1)
 
     if dir2 is not None:
         dir_names.append(dir2)
-        mean_cr_2, raw_data_list_2 = calculate_mean(dir2)
+        mean_cr_2, raw_data_list_2 = calculate_mean(dir2, keep_raw_data=show_raw_data)
         mean_data.append(mean_cr_2)
         raw_data_lists.append(raw_data_list_2)
 
     if dir3 is not None:
         dir_names.append(dir3)
-        mean_cr_3, raw_data_list_3 = calculate_mean(dir3)
+        mean_cr_3, raw_data_list_3 = calculate_mean(dir3, keep_raw_data=show_raw_data)
         mean_data.append(mean_cr_3)
         raw_data_lists.append(raw_data_list_3)
 
@@ -2,6 +2,7 @@ import pandas as pd
 
 import emodpy_hiv.plotting.xy_plot as xy_plot
 import emodpy_hiv.plotting.helpers as helpers
+import emodpy_hiv.plotting.report_store as report_store
 
 COL_NAME_REL_ID       = "Rel_ID"                 # noqa: E221
 COL_NAME_NODE_ID      = "Node_ID"                # noqa: E221
@@ -47,7 +48,7 @@ def extract_data_for_relationship(filename: str,
         (pd.DataFrame): Dataframe where the rows must be of the given relationship type and with the extra column
             of the actual relationship duration.
     """
-    df = pd.read_csv(filename)
+    df = report_store.read_report(filename)
 
     if COL_NAME_REL_TYPE not in df.columns:
         raise ValueError(f"'{COL_NAME_REL_TYPE}' column does not exist in the file({filename}).")
@@ -63,6 +64,31 @@ def extract_data_for_relationship(filename: str,
     return df
 
 
+def _calculate_duration_histogram(filename: str,
+                                  relationship_type: int,
+                                  bins: list[float]):
+    # Return the sum of the durations, the number of relationships, and the fraction of them in each bin
+    df = extract_data_for_relationship(filename=filename,
+                                       relationship_type=relationship_type)
+    total = 0
+    count_sum = 0
+    count_histogram = []
+    for this_bin in bins:
+        count_histogram.append(0)
+
+    for item in df[TMP_COL_NAME_DURATION]:
+        total = total + item
+        for bin_index, this_bin in enumerate(bins):
+            if (item < this_bin) or (this_bin == bins[len(bins) - 1]):
+                count_histogram[bin_index] = count_histogram[bin_index] + 1
+                count_sum = count_sum + 1
+                break
+    histogram = []
+    for count in count_histogram:
+        histogram.append(count / count_sum)
+    return total, count_sum, histogram
+
+
 def plot_relationship_duration_histogram(dir_or_filename: str,
                                          relationship_type: int,
                                          bin_size: float,
@@ -71,7 +97,8 @@ def plot_relationship_duration_histogram(dir_or_filename: str,
                                          heterogeneity: float = None,
                                          scale: float = None,
                                          show_avg_per_run: bool = False,
-                                         img_dir: str = None):
+                                         img_dir: str = None,
+                                         workers: int = 1):
     """
     Plot the relationship duration histogram for the given relationship type and
     show information in the title about the expected Weibull distribution.
@@ -106,6 +133,9 @@ def plot_relationship_duration_histogram(dir_or_filename: str,
 
         img_dir (str, optional):
             Directory to save the images. If None, the images will not be saved and a window will be opened.
+
+        workers (int, optional):
+            The number of processes used to read the files.  See helpers.map_files().
     """
 
     # -------------------------------------------------------
@@ -150,24 +180,13 @@ def plot_relationship_duration_histogram(dir_or_filename: str,
     total = 0
     total_count = 0
     histogram_list = []
-    for fn in dir_filenames:
-        df = extract_data_for_relationship(filename=fn,
-                                           relationship_type=relationship_type)
-        count_sum = 0
-        count_histogram = []
-        for this_bin in bins:
-            count_histogram.append(0)
-
-        for item in df[TMP_COL_NAME_DURATION]:
-            total = total + item
-            for bin_index, this_bin in enumerate(bins):
-                if (item < this_bin) or (this_bin == bins[len(bins) - 1]):
-                    count_histogram[bin_index] = count_histogram[bin_index] + 1
-                    count_sum = count_sum + 1
-                    break
-        histogram = []
-        for count in count_histogram:
-            histogram.append(count / count_sum)
+    results = helpers.map_files(_calculate_duration_histogram,
+                                dir_filenames,
+                                workers=workers,
+                                relationship_type=relationship_type,
+                                bins=bins)
+    for file_total, count_sum, histogram in results:
+        total = total + file_total
         histogram_list.append(histogram)
         total_count = total_count + count_sum
 
@@ -1,9 +1,10 @@
 import os
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 
 import emodpy_hiv.plotting.xy_plot as xy_plot
 import emodpy_hiv.plotting.helpers as helpers
+import emodpy_hiv.plotting.report_store as report_store
 
 COL_NAME_REL_ID             = "Rel_ID"           # noqa: E221
 COL_NAME_START_TIME         = "Rel_start_time"   # noqa: E221
@@ -84,7 +85,7 @@ def extract_assortivity_risk(start_rel_filename: str,
             created of that time and risk value pairing. There is no guarantee that
             relationships are created each time step.
     """
-    df = pd.read_csv(start_rel_filename)
+    df = report_store.read_report(start_rel_filename)
 
     if COL_NAME_REL_TYPE not in df.columns:
         raise ValueError(f"'{COL_NAME_REL_TYPE}' column does not exist in the file({start_rel_filename}).")
@@ -244,14 +245,12 @@ def plot_relationship_assortivity_risk(dir_or_filename: str,
     if show_regression:
         expected_df = pd.DataFrame()
         expected_df.index = combined_df.index
-        x = combined_df.index.values
-        x = x.reshape(len(x), 1)
+        x = combined_df.index.values.astype(float)
+        a = np.column_stack([x, np.ones(len(x))])  # slope and intercept
         for col_name in combined_df.columns:
             y = combined_df[col_name].values      # Dependent variable
-            y = y.reshape(len(y), 1)
-            model = LinearRegression()
-            model.fit(x, y)
-            expected_df["Regression-" + col_name] = model.predict(x)
+            coefficients = np.linalg.lstsq(a, y, rcond=None)[0]
+            expected_df["Regression-" + col_name] = a @ coefficients
 
     # convert relationship type to a string
     rel_str = "TRANSITORY"
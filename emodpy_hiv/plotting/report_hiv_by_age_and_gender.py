@@ -0,0 +1,178 @@
+"""
+Read ReportHIVByAgeAndGender.csv files into compact dataframes.
+
+The report has one row per year, node, gender, age, and combination of the stratification
+columns (IP keys, interventions, circumcision, HIV status) and a column for each count.  At
+production scale the files are hundreds of megabytes, so reading all of them with the types
+that pandas infers (int64, float64, and Python strings for the IP values) takes much more
+memory and time than the plots need.  read_report_hiv_by_age_and_gender() reads only the
+columns that are asked for, declares their types from the report's schema, and filters the
+rows by node, gender, and year while the file is read in chunks.  If the file has been
+converted to the experiment's Parquet store (see report_store), the Parquet file is read
+instead and the filters are applied by the Parquet reader.
+"""
+from typing import Union
+import pandas as pd
+
+import emodpy_hiv.plotting.report_store as report_store
+
+COL_NAME_YEAR    = "Year"         # noqa: E221
+COL_NAME_NODE_ID = " NodeId"      # noqa: E221
+COL_NAME_GENDER  = " Gender"      # noqa: E221
+COL_NAME_AGE     = " Age"         # noqa: E221
+
+GENDER_MALE   = 0                 # noqa: E221
+GENDER_FEMALE = 1
+
+DEFAULT_CHUNKSIZE = 500_000
+
+# The stratification columns have a few distinct values.  The counts (Population,
+# Infected, ...) stay float64 because they are summed by the plots.  Age stays float64
+# because it is compared to the age bins; as float32 an age like 14.99 is just below 14.99.
+_COLUMN_DTYPES = {
+    COL_NAME_YEAR:      "float64",   # noqa: E241
+    COL_NAME_NODE_ID:   "int32",     # noqa: E241
+    COL_NAME_GENDER:    "int8",      # noqa: E241
+    COL_NAME_AGE:       "float64",   # noqa: E241
+    " IsCircumcised":   "int8",      # noqa: E241
+    " HasHIV":          "int8",      # noqa: E241
+}
+_COLUMN_PREFIX_DTYPES = {
+    " IP_Key:":          "category",  # noqa: E241
+    " HasIntervention:": "int8",
+}
+
+
+def get_column_dtype(column_name: str) -> Union[str, None]:
+    """
+    Return the type that read_report_hiv_by_age_and_gender() uses for the given column of the
+    report or None if pandas should infer it.
+    """
+    if column_name in _COLUMN_DTYPES:
+        return _COLUMN_DTYPES[column_name]
+    for prefix, dtype in _COLUMN_PREFIX_DTYPES.items():
+        if column_name.startswith(prefix):
+            return dtype
+    if column_name.startswith(" ") and not column_name.startswith(" IP_Key"):
+        return "float64"
+    return None
+
+
+def gender_to_id(gender: str) -> int:
+    """
+    Return the value of the Gender column for 'Male' or 'Female'.  Like the plotting
+    functions, anything other than 'Male' is female.
+    """
+    return GENDER_MALE if gender == "Male" else GENDER_FEMALE
+
+
+def read_report_hiv_by_age_and_gender(filename: str,
+                                      columns: list[str] = None,
+                                      node_ids: list[int] = None,
+                                      genders: list[int] = None,
+                                      min_year: float = None,
+                                      max_year: float = None,
+                                      chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Read a ReportHIVByAgeAndGender.csv file with compact types, only the given columns, and only
+    the rows for the given nodes, genders, and years.
+
+    Args:
+        filename (str, required):
+            The name and path of the ReportHIVByAgeAndGender.csv file.
+
+        columns (list[str], optional):
+            The columns to read.  The report has a space before each column name except Year.
+            Columns that are not in the file are ignored so the caller can report them.  The
+            columns needed by the filters are always read.  If None, all of the columns are read.
+
+        node_ids (list[int], optional):
+            Only read the rows of these nodes.  If None, the rows of all nodes are read.
+
+        genders (list[int], optional):
+            Only read the rows of these genders: GENDER_MALE (0) and/or GENDER_FEMALE (1).
+            If None, the rows of both genders are read.
+
+        min_year (float, optional):
+            Only read the rows whose Year is greater than or equal to this year.
+
+        max_year (float, optional):
+            Only read the rows whose Year is less than or equal to this year.
+
+        chunksize (int, optional):
+            The number of rows to parse at a time when reading the CSV file.
+
+    Returns:
+        (pd.DataFrame): The rows and columns of the report, in the order of the file, with a
+        RangeIndex.  The IP_Key columns are categorical.
+    """
+    stored_report = report_store.find_stored_report(filename)
+    if stored_report is None:
+        header = pd.read_csv(filename, nrows=0).columns.tolist()
+    else:
+        header = stored_report["columns"]
+
+    filter_columns = []
+    if node_ids is not None:
+        filter_columns.append(COL_NAME_NODE_ID)
+    if genders is not None:
+        filter_columns.append(COL_NAME_GENDER)
+    if (min_year is not None) or (max_year is not None):
+        filter_columns.append(COL_NAME_YEAR)
+    for col_name in filter_columns:
+        if col_name not in header:
+            raise ValueError(f"'{col_name}' column does not exist in the file({filename}).")
+
+    if columns is None:
+        usecols = header
+    else:
+        wanted = set(columns).union(filter_columns)
+        usecols = [col_name for col_name in header if col_name in wanted]
+
+    dtypes = {}
+    for col_name in usecols:
+        dtype = get_column_dtype(col_name)
+        if dtype is not None:
+            dtypes[col_name] = dtype
+
+    if stored_report is not None:
+        report_store.check_pyarrow()
+        filters = []
+        if node_ids is not None:
+            filters.append((COL_NAME_NODE_ID, "in", list(node_ids)))
+        if genders is not None:
+            filters.append((COL_NAME_GENDER, "in", list(genders)))
+        if min_year is not None:
+            filters.append((COL_NAME_YEAR, ">=", min_year))
+        if max_year is not None:
+            filters.append((COL_NAME_YEAR, "<=", max_year))
+        # The store has the columns in the declared types
+        return pd.read_parquet(stored_report["parquet"], columns=usecols, filters=filters if filters else None)
+
+    chunks = []
+    for chunk in pd.read_csv(filename, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        keep = None
+        if node_ids is not None:
+            keep = chunk[COL_NAME_NODE_ID].isin(node_ids)
+        if genders is not None:
+            keep = _and(keep, chunk[COL_NAME_GENDER].isin(genders))
+        if min_year is not None:
+            keep = _and(keep, chunk[COL_NAME_YEAR] >= min_year)
+        if max_year is not None:
+            keep = _and(keep, chunk[COL_NAME_YEAR] <= max_year)
+        chunks.append(chunk if keep is None else chunk[keep])
+
+    if len(chunks) == 0:
+        df = pd.DataFrame({col_name: pd.Series(dtype=dtypes.get(col_name, "object")) for col_name in usecols})
+    else:
+        df = pd.concat(chunks, ignore_index=True)
+
+    # Chunks with different categories are concatenated as objects
+    for col_name, dtype in dtypes.items():
+        if (dtype == "category") and not isinstance(df[col_name].dtype, pd.CategoricalDtype):
+            df[col_name] = df[col_name].astype("category")
+    return df
+
+
+def _and(keep: Union[pd.Series, None], other: pd.Series) -> pd.Series:
+    return other if keep is None else (keep & other)
@@ -0,0 +1,258 @@
+"""
+Convert the CSV reports of an experiment to Parquet once and read them from there afterwards.
+
+Analysis scripts call several plotting functions on the same experiment directory and each
+of them parses every ReportHIVByAgeAndGender.csv, RelationshipStart.csv, and RelationshipEnd.csv
+again.  convert_reports_to_parquet() writes each of these reports to a store in the experiment
+directory that is partitioned by report type and simulation:
+
+    <experiment dir>/parquet_store/manifest.json
+    <experiment dir>/parquet_store/report=ReportHIVByAgeAndGender/sim=<sim id>/<report>.parquet
+
+The manifest records, for each CSV file, its Parquet file, its columns and their types, the
+SHA-256 hash of the CSV file, and the tags of its simulation.  The ReportHIVByAgeAndGender
+columns are stored with the compact types that read_report_hiv_by_age_and_gender() declares
+(see report_hiv_by_age_and_gender.get_column_dtype()).  Once the store exists, the readers used
+by the plotting functions read the Parquet file instead of the CSV file.  A CSV file that changed
+since it was converted (different size or modification time) is read from the CSV file again
+until the store is updated by calling convert_reports_to_parquet() again; unchanged files are
+neither hashed nor converted again.
+
+Writing and reading the store requires pyarrow: pip install emodpy-hiv[parquet]
+
+Example:
+    ```
+    from emodpy_hiv.plotting.report_store import convert_reports_to_parquet
+    import emodpy_hiv.plotting.plot_hiv_by_age_and_gender as pang
+
+    convert_reports_to_parquet("experiment_dir")
+    pang.plot_population_by_age("experiment_dir", age_bin_list=[15, 25, 35, 50])
+    ```
+"""
+import hashlib
+import importlib.util
+import json
+import os
+from typing import Union
+
+import pandas as pd
+
+import emodpy_hiv.plotting.helpers as helpers
+
+STORE_DIR_NAME    = "parquet_store"    # noqa: E221
+MANIFEST_FILENAME = "manifest.json"
+TAGS_FILENAME     = "tags.json"        # noqa: E221
+REPORT_PREFIXES   = ["ReportHIVByAgeAndGender", "RelationshipStart", "RelationshipEnd"]  # noqa: E221
+
+_manifest_cache = {}  # manifest filename -> (modification time, manifest)
+
+
+def check_pyarrow() -> None:
+    """
+    Raise an ImportError that says how to install pyarrow if it is not installed.  pyarrow is
+    an optional dependency that is only needed to write and read the store.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("The Parquet report store requires pyarrow.  "
+                          + "Install it with: pip install emodpy-hiv[parquet]")
+
+
+def _hash_file(filename: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _get_column_dtypes(report_prefix: str, columns: list[str]) -> dict[str, str]:
+    # The types of the columns that are declared instead of inferred by pandas
+    if report_prefix != "ReportHIVByAgeAndGender":
+        return {}
+    # Imported here because report_hiv_by_age_and_gender imports this module
+    from emodpy_hiv.plotting.report_hiv_by_age_and_gender import get_column_dtype
+    dtypes = {}
+    for col_name in columns:
+        dtype = get_column_dtype(col_name)
+        if dtype is not None:
+            dtypes[col_name] = dtype
+    return dtypes
+
+
+def _get_sim_id(relative_filename: str, report_prefix: str) -> str:
+    # The directories of the simulation (e.g. <sim dir>/output) and anything after the prefix
+    # in the file's name (e.g. _sample00000_run00001 from emodpy_workflow's download command)
+    sim_dir, base_name = os.path.split(relative_filename)
+    parts = [part for part in sim_dir.split(os.sep) if part]
+    suffix = os.path.splitext(base_name)[0][len(report_prefix):].strip("_")
+    if suffix:
+        parts.append(suffix)
+    return "__".join(parts) if parts else "sim"
+
+
+def _read_tags(filename: str, dir_name: str) -> dict:
+    # Use the closest tags.json file between the report's directory and the experiment directory
+    tags_dir = os.path.dirname(os.path.abspath(filename))
+    dir_name = os.path.abspath(dir_name)
+    while True:
+        tags_filename = os.path.join(tags_dir, TAGS_FILENAME)
+        if os.path.isfile(tags_filename):
+            with open(tags_filename, "r") as file:
+                return json.load(file)
+        if (tags_dir == dir_name) or (os.path.dirname(tags_dir) == tags_dir):
+            return {}
+        tags_dir = os.path.dirname(tags_dir)
+
+
+def read_manifest(store_dir: str) -> dict:
+    """
+    Return the manifest of the store: a dictionary with an entry for each CSV file, keyed by the
+    file's path relative to the experiment directory.  Each entry has the 'report', 'sim_id',
+    'parquet' (relative to the store), 'columns', 'dtypes', 'sha256', 'size', 'mtime_ns', and 'tags'
+    of the file.
+    """
+    manifest_filename = os.path.join(store_dir, MANIFEST_FILENAME)
+    if not os.path.isfile(manifest_filename):
+        return {}
+    mtime_ns = os.stat(manifest_filename).st_mtime_ns
+    cached = _manifest_cache.get(manifest_filename)
+    if (cached is None) or (cached[0] != mtime_ns):
+        with open(manifest_filename, "r") as file:
+            cached = (mtime_ns, json.load(file))
+        _manifest_cache[manifest_filename] = cached
+    return cached[1]
+
+
+def convert_reports_to_parquet(dir_name: str,
+                               report_prefixes: list[str] = None,
+                               sim_tags: dict[str, dict] = None) -> str:
+    """
+    Convert the CSV reports in the experiment directory to Parquet files in the directory's
+    store.  Files that were converted before and have not changed are skipped.  A file whose size
+    and modification time are the ones in the manifest is not hashed again.
+
+    Args:
+        dir_name (str, required):
+            The experiment directory.  It is searched like the plotting functions search
+            it (see helpers.get_filenames()) so it can contain the reports of each simulation
+            in its own subdirectory or all the reports in one directory.
+
+        report_prefixes (list[str], optional):
+            The prefixes of the names of the reports to convert.  Defaults to REPORT_PREFIXES.
+
+        sim_tags (dict[str, dict], optional):
+            The tags of each simulation, keyed by the simulation's ID in the store.  By default,
+            the tags are read from the tags.json file closest to the report, if any.
+
+    Returns:
+        (str): The directory of the store.
+    """
+    if not os.path.isdir(dir_name):
+        raise ValueError(f"'{dir_name}' is not a directory.")
+    check_pyarrow()
+    report_prefixes = REPORT_PREFIXES if report_prefixes is None else report_prefixes
+    sim_tags = {} if sim_tags is None else sim_tags
+
+    store_dir = os.path.join(dir_name, STORE_DIR_NAME)
+    old_manifest = read_manifest(store_dir)
+    manifest = {}
+    partitions = {}
+    for report_prefix in report_prefixes:
+        filenames = helpers.get_filenames(dir_or_filename=dir_name,
+                                          file_prefix=report_prefix,
+                                          file_extension=".csv")
+        for filename in filenames:
+            relative_filename = os.path.relpath(filename, dir_name)
+            if relative_filename.split(os.sep)[0] == STORE_DIR_NAME:
+                continue
+            sim_id = _get_sim_id(relative_filename, report_prefix)
+            partition = os.path.join(f"report={report_prefix}", f"sim={sim_id}")
+            if partition in partitions:
+                raise ValueError(f"'{relative_filename}' and '{partitions[partition]}' are both "
+                                 + f"the '{report_prefix}' report of simulation '{sim_id}'.")
+            partitions[partition] = relative_filename
+
+            stat = os.stat(filename)
+            entry = {
+                "report": report_prefix,
+                "sim_id": sim_id,
+                "parquet": os.path.join(partition, report_prefix + ".parquet"),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "tags": sim_tags.get(sim_id, _read_tags(filename, dir_name))
+            }
+            parquet_filename = os.path.join(store_dir, entry["parquet"])
+            old_entry = old_manifest.get(relative_filename, {})
+            is_stored = (old_entry.get("parquet") == entry["parquet"]) and os.path.isfile(parquet_filename) \
+                and (old_entry.get("dtypes") == _get_column_dtypes(report_prefix, old_entry.get("columns", [])))
+            if is_stored and (old_entry.get("size") == entry["size"]) and (old_entry.get("mtime_ns") == entry["mtime_ns"]):
+                entry["sha256"] = old_entry["sha256"]
+            else:
+                entry["sha256"] = _hash_file(filename)
+                is_stored = is_stored and (old_entry.get("sha256") == entry["sha256"])
+
+            if is_stored:
+                entry["columns"] = old_entry["columns"]
+                entry["dtypes"] = old_entry["dtypes"]
+            else:
+                columns = pd.read_csv(filename, nrows=0).columns.tolist()
+                dtypes = _get_column_dtypes(report_prefix, columns)
+                df = pd.read_csv(filename, dtype=dtypes)
+                os.makedirs(os.path.dirname(parquet_filename), exist_ok=True)
+                df.to_parquet(parquet_filename, index=False)
+                entry["columns"] = columns
+                entry["dtypes"] = dtypes
+            manifest[relative_filename] = entry
+
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=4)
+    return store_dir
+
+
+def find_stored_report(filename: str) -> Union[dict, None]:
+    """
+    Return the manifest entry of the given CSV file if it is in the store of an experiment
+    directory that contains it and has not changed since it was converted.  The 'parquet'
+    value of the returned entry is the path of the Parquet file.
+    """
+    filename = os.path.abspath(filename)
+    dir_name = os.path.dirname(filename)
+    while True:
+        store_dir = os.path.join(dir_name, STORE_DIR_NAME)
+        entry = read_manifest(store_dir).get(os.path.relpath(filename, dir_name))
+        if entry is not None:
+            stat = os.stat(filename)
+            if (stat.st_size != entry["size"]) or (stat.st_mtime_ns != entry["mtime_ns"]):
+                return None
+            return dict(entry, parquet=os.path.join(store_dir, entry["parquet"]))
+        if os.path.dirname(dir_name) == dir_name:
+            return None
+        dir_name = os.path.dirname(dir_name)
+
+
+def read_report(filename: str, columns: list[str] = None) -> pd.DataFrame:
+    """
+    Read a CSV report from the store if it has been converted, else from the CSV file.
+
+    Args:
+        filename (str, required):
+            The name and path of the CSV report.
+
+        columns (list[str], optional):
+            The columns to read.  Columns that are not in the report are ignored.  If None,
+            all of the columns are read.
+
+    Returns:
+        (pd.DataFrame): The report.
+    """
+    entry = find_stored_report(filename)
+    if entry is None:
+        if columns is None:
+            return pd.read_csv(filename)
+        return pd.read_csv(filename, usecols=lambda col_name: col_name in columns)
+
+    check_pyarrow()
+    if columns is not None:
+        columns = [col_name for col_name in entry["columns"] if col_name in columns]
+    return pd.read_parquet(entry["parquet"], columns=columns)
@@ -45,6 +45,29 @@ class TestZambia(unittest.TestCase):
                              "The campaign did not match the regression file.")
         helpers.delete_existing_file(filename_act)
 
+    def test_zambia_build_campaign_incrementally(self):
+        filename_full = Path(__file__).parent.joinpath('outputs', "zambia_campaign_full.json")
+        filename_incr = Path(__file__).parent.joinpath('outputs', "zambia_campaign_incremental.json")
+        hyperparameters = {'art_reenrollment_willingness': 0.5}
+
+        # build once with the defaults so that the second build reuses most of the events
+        api_campaign.schema_path = manifest.schema_path
+        Zambia.build_campaign_incrementally(campaign=api_campaign)
+        camp = Zambia.build_campaign_incrementally(campaign=api_campaign, hyperparameters=hyperparameters)
+        camp.save(filename_incr)
+
+        camp = Zambia.initialize_campaign(schema_path=manifest.schema_path)
+        calls = Zambia.get_campaign_parameterized_calls(campaign=camp)
+        for pc in calls:
+            if 'art_reenrollment_willingness' in pc.labeled_hyperparameters:
+                pc.set_labeled_hyperparameter('art_reenrollment_willingness', 0.5)
+        Zambia._execute_parameterized_calls_on(obj=camp, parameterized_calls=calls)
+        camp.save(filename_full)
+
+        self.assertDictEqual(self.load_json(filename_full), self.load_json(filename_incr))
+        helpers.delete_existing_file(filename_full)
+        helpers.delete_existing_file(filename_incr)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,13 @@
+import gc
+import itertools
 import os
 import shutil
 from pathlib import Path
 import time
 
+import numpy as np
+import pandas as pd
+
 from emodpy_hiv.demographics.hiv_demographics import HIVDemographics
 from emodpy_hiv.campaign.individual_intervention import CommonInterventionParameters, SimpleVaccine, \
     AntiretroviralTherapy
@@ -56,6 +61,46 @@ def create_failed_tests_folder():
         os.makedirs(manifest.failed_tests)
 
 
+def create_report_hiv_by_age_and_gender(filename: str, seed: int = 42) -> pd.DataFrame:
+    """
+    Write a small report with the same columns and formatting as ReportHIVByAgeAndGender.csv
+    and return it as pandas reads it.
+    """
+    rng = np.random.default_rng(seed)
+    rows = list(itertools.product([1990.5, 1991.5, 1992.5],  # Year
+                                  [1, 2, 3],                 # NodeId
+                                  [0, 1],                    # Gender
+                                  [0.0, 15.0, 20.0, 25.0],   # Age
+                                  [0, 1],                    # IsCircumcised
+                                  [0, 1],                    # HasHIV
+                                  ["LOW", "MEDIUM", "HIGH"]))  # IP_Key:Risk
+    df = pd.DataFrame(rows, columns=["Year", " NodeId", " Gender", " Age", " IsCircumcised", " HasHIV", " IP_Key:Risk"])
+    df[" Population"] = rng.integers(0, 1000, len(df)) / 4.0
+    df[" Infected"] = df[" Population"] * df[" HasHIV"]
+    df[" On_ART"] = rng.integers(0, 100, len(df)) * df[" HasHIV"]
+    df.to_csv(filename, index=False)
+    return pd.read_csv(filename)
+
+
+def time_it(func, num_repeats: int = 3) -> float:
+    """
+    Return the fastest time, in seconds, of calling the function.  Like timeit, the garbage
+    collector is disabled while timing so its passes over the results do not skew the times.
+    """
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(num_repeats):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return min(times)
+
+
 # ----------------------------------------
 # need to add hiv-specific stuff to these
 # ----------------------------------------
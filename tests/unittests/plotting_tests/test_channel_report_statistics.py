@@ -0,0 +1,143 @@
+import unittest
+import pytest
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.plotting.plot_inset_chart_mean_compare as picmc
+from emodpy_hiv.plotting.channel_report import ChannelReport, ChannelReportStatistics
+
+parent = Path(__file__).resolve().parent
+
+
+def create_channel_report(values: np.ndarray, channel_names: list[str]) -> dict:
+    report = ChannelReport(df=pd.DataFrame(dict(zip(channel_names, values)))).json_data
+    report["Header"]["Timesteps"] = values.shape[1]
+    return report
+
+
+def get_data(channel_report: dict) -> np.ndarray:
+    return np.array([channel["Data"] for channel in channel_report["Channels"].values()])
+
+
+@pytest.mark.unit
+class TestChannelReportStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.channel_names = ["Births", "Infected", "Statistical Population"]
+        self.values = np.random.default_rng(42).normal(loc=100.0, scale=10.0, size=(2000, 3, 12))
+
+    def add_reports(self, channel_statistics: ChannelReportStatistics, num_reports: int):
+        for values in self.values[:num_reports]:
+            channel_statistics.add(create_channel_report(values, self.channel_names))
+
+    def test_mean_and_variance(self):
+        channel_statistics = ChannelReportStatistics()
+        self.add_reports(channel_statistics, 50)
+        values = self.values[:50]
+
+        mean = channel_statistics.get_mean()
+        self.assertEqual(self.channel_names, list(mean["Channels"].keys()))
+        np.testing.assert_allclose(values.mean(axis=0), get_data(mean), rtol=1e-12)
+        np.testing.assert_allclose(values.var(axis=0, ddof=1), get_data(channel_statistics.get_variance()), rtol=1e-10)
+        np.testing.assert_allclose(values.var(axis=0), get_data(channel_statistics.get_variance(ddof=0)), rtol=1e-10)
+
+        lower, upper = channel_statistics.get_confidence_interval(confidence=0.95)
+        half_width = 1.959963984540054 * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+        np.testing.assert_allclose(values.mean(axis=0) - half_width, get_data(lower), rtol=1e-10)
+        np.testing.assert_allclose(values.mean(axis=0) + half_width, get_data(upper), rtol=1e-10)
+        self.assertEqual([], channel_statistics.raw_data_list)
+
+    def test_quantiles(self):
+        quantiles = [0.025, 0.5, 0.975]
+
+        # exact with five or fewer reports
+        channel_statistics = ChannelReportStatistics(quantiles=quantiles)
+        self.add_reports(channel_statistics, 4)
+        for quantile in quantiles:
+            np.testing.assert_allclose(np.quantile(self.values[:4], quantile, axis=0),
+                                       get_data(channel_statistics.get_quantile(quantile)))
+
+        # estimated with more, like the P-squared algorithm (Jain & Chlamtac, 1985) as published
+        # and close to the quantiles of all of the values
+        expected_estimates = {
+            0.025: [78.75331227055574, 80.27431150244192, 79.55219277673466],
+            0.5:   [100.04982915499163, 100.13441372728312, 100.30491492656815],   # noqa: E241
+            0.975: [120.41136089681972, 120.41578017870681, 119.1930737813445]
+        }
+        channel_statistics = ChannelReportStatistics(quantiles=quantiles)
+        self.add_reports(channel_statistics, len(self.values))
+        for quantile in quantiles:
+            actual = get_data(channel_statistics.get_quantile(quantile))
+            actual_estimates = [actual[channel_index, time_index] for channel_index, time_index in [(0, 0), (1, 5), (2, 11)]]
+            self.assertEqual(expected_estimates[quantile], actual_estimates)
+            rms_error = np.sqrt(np.mean(np.square(actual - np.quantile(self.values, quantile, axis=0))))
+            self.assertLess(rms_error, 1.0)  # the standard deviation of the values is 10
+
+        with self.assertRaisesRegex(ValueError, "is not one of the quantiles"):
+            channel_statistics.get_quantile(0.25)
+
+    def test_invalid_reports(self):
+        channel_statistics = ChannelReportStatistics(keep_raw_data=True)
+        with self.assertRaisesRegex(ValueError, "At least 1 report"):
+            channel_statistics.get_mean()
+
+        self.add_reports(channel_statistics, 1)
+        self.assertEqual(1, len(channel_statistics.raw_data_list))
+        with self.assertRaisesRegex(ValueError, "At least 2 report"):
+            channel_statistics.get_variance()
+
+        with self.assertRaisesRegex(ValueError, "instead of"):
+            channel_statistics.add(create_channel_report(self.values[1, :2], self.channel_names[:2]))
+        with self.assertRaisesRegex(ValueError, "time steps"):
+            channel_statistics.add(create_channel_report(self.values[1, :, :6], self.channel_names))
+
+    def test_calculate_mean_of_inset_charts(self):
+        input_dir = os.path.join(parent, "testdata", "InsetChart_data")
+        dfs = []
+        for filename in sorted(os.listdir(input_dir)):
+            with open(os.path.join(input_dir, filename), "r") as file:
+                dfs.append(ChannelReport.convert_to_df(json.load(file)))
+        expected_df = pd.concat(dfs).groupby("Time").mean().reset_index()
+
+        mean_cr, raw_data_list = picmc.calculate_mean(input_dir, keep_raw_data=False)
+        self.assertEqual([], raw_data_list)
+        self.assertEqual(list(expected_df.columns[1:]), list(mean_cr["Channels"].keys()))
+        for name, channel in mean_cr["Channels"].items():
+            np.testing.assert_allclose(expected_df[name].to_numpy(), channel["Data"], rtol=1e-12)
+
+        channel_statistics = picmc.calculate_statistics(input_dir, quantiles=[0.5], keep_raw_data=True)
+        self.assertEqual(len(dfs), channel_statistics.num_reports)
+        self.assertEqual(len(dfs), len(channel_statistics.raw_data_list))
+
+    def test_calculate_mean_of_different_reports(self):
+        # the reports have different numbers of time steps and channels and are averaged by Time
+        reports = [create_channel_report(self.values[0], self.channel_names),
+                   create_channel_report(self.values[1, :, :8], self.channel_names),
+                   create_channel_report(self.values[2, :2, :10], self.channel_names[:2]),
+                   create_channel_report(self.values[3, 1:], ["Infected", "New Channel"])]
+        with tempfile.TemporaryDirectory() as input_dir:
+            for index, report in enumerate(reports):
+                with open(os.path.join(input_dir, f"InsetChart_{index}.json"), "w") as file:
+                    json.dump(report, file)
+            mean_cr, raw_data_list = picmc.calculate_mean(input_dir)
+
+        expected_df = pd.concat([ChannelReport.convert_to_df(report) for report in reports]).groupby("Time").mean().reset_index()
+        self.assertEqual(len(reports), len(raw_data_list))
+        self.assertEqual(self.channel_names + ["New Channel"], list(mean_cr["Channels"].keys()))
+        for name, channel in mean_cr["Channels"].items():
+            np.testing.assert_allclose(expected_df[name].to_numpy(), channel["Data"], rtol=1e-12)
+        self.assertEqual(12, len(mean_cr["Channels"]["Births"]["Data"]))
+        np.testing.assert_allclose(self.values[0, 0, 10:], mean_cr["Channels"]["Births"]["Data"][10:], rtol=1e-12)
+
+        with tempfile.TemporaryDirectory() as input_dir:
+            with self.assertRaisesRegex(ValueError, "no InsetChart.json files"):
+                picmc.calculate_mean(input_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
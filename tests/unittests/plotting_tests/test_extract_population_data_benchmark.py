@@ -0,0 +1,105 @@
+import unittest
+import pytest
+import itertools
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.plotting.plot_hiv_by_age_and_gender as pang
+
+parent = Path(__file__).resolve().parent
+manifest_directory = parent.parent.parent
+sys.path.append(str(manifest_directory))
+from helpers import time_it
+
+AGE_BIN_LIST = [15, 20, 25, 30, 35, 40, 45, 50]
+
+
+def create_realistic_report(filename: str):
+    """
+    Create a report with 21 ages x 10 nodes x 2 genders x 80 years and the
+    circumcision, HIV, and risk stratifications.
+    """
+    rng = np.random.default_rng(42)
+    rows = list(itertools.product(1960.5 + np.arange(80),          # Year
+                                  np.arange(1, 11),                # NodeId
+                                  [0, 1],                          # Gender
+                                  5.0 * np.arange(21),             # Age
+                                  [0, 1],                          # IsCircumcised
+                                  [0, 1],                          # HasHIV
+                                  ["LOW", "MEDIUM", "HIGH"]))      # IP_Key:Risk
+    df = pd.DataFrame(rows, columns=["Year", " NodeId", " Gender", " Age", " IsCircumcised", " HasHIV", " IP_Key:Risk"])
+    df[" Population"] = rng.integers(0, 1000, len(df)) / 4.0
+    df[" Infected"] = df[" Population"] * df[" HasHIV"]
+    df[" On_ART"] = rng.integers(0, 100, len(df)) * df[" HasHIV"]
+    df.to_csv(filename, index=False)
+
+
+@pytest.mark.unit
+class TestExtractPopulationData(unittest.TestCase):
+    """
+    Verify that the extracted data is the same as the expected data in
+    testdata/test_extract_population_data/expected.json.  The expected frames were created from
+    the ReportHIVByAgeAndGender.csv in the same directory by the pivot table implementations of
+    the functions that the groupby implementations replaced.
+    """
+
+    def setUp(self):
+        self.data_dir = parent.joinpath("testdata", "test_extract_population_data")
+        self.filename = str(self.data_dir.joinpath("ReportHIVByAgeAndGender.csv"))
+        with open(self.data_dir.joinpath("expected.json"), "r") as file:
+            self.cases = json.load(file)
+
+    def run_cases(self, function_name: str):
+        cases = [case for case in self.cases if case["function"] == function_name]
+        self.assertLess(0, len(cases))
+        for case in cases:
+            with self.subTest(**case["args"]):
+                expected = case["expected"]
+                exp_df = pd.DataFrame(expected["data"], index=expected["index"], columns=expected["columns"])
+                act_df = getattr(pang, function_name)(self.filename, **case["args"])
+                if "hiv_negative" in case:
+                    act_df, act_hiv_neg = act_df
+                    self.assertEqual(case["hiv_negative"], act_hiv_neg)
+                pd.testing.assert_frame_equal(exp_df, act_df, check_dtype=False)
+
+    def test_multiple_ages(self):
+        self.run_cases("extract_population_data_multiple_ages")
+
+    def test_by_stratification(self):
+        self.run_cases("extract_population_data_by_stratification")
+
+    def test_age_bins_must_increase(self):
+        with self.assertRaisesRegex(ValueError, "must be increasing"):
+            pang.extract_population_data_multiple_ages(self.filename, age_bin_list=[15, 50, 25])
+
+
+@pytest.mark.benchmark
+class TestExtractPopulationDataBenchmark(unittest.TestCase):
+    """
+    Time extracting the data by age bin from a realistic report.  The times are only printed so
+    they can be seen with 'pytest -s -m benchmark'.
+    """
+
+    def test_extract_population_data(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "ReportHIVByAgeAndGender.csv")
+            create_realistic_report(filename)
+
+            for function, args in [
+                    (pang.extract_population_data_multiple_ages,
+                     dict(node_id=5, gender="Female", other_strat_column_name=" IP_Key:Risk", other_strat_value="HIGH",
+                          other_data_column_names=[" Infected", " On_ART"])),
+                    (pang.extract_population_data_by_stratification,
+                     dict(node_id=5, gender="Female", start_column_name=" IP_Key:Risk"))]:
+                seconds = time_it(lambda: function(filename, age_bin_list=AGE_BIN_LIST, **args))
+                print(f"{function.__name__}: {seconds:.4f} seconds")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import pytest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+parent = Path(__file__).resolve().parent
+manifest_directory = parent.parent.parent
+sys.path.append(str(manifest_directory))
+from helpers import create_report_hiv_by_age_and_gender
+
+import emodpy_hiv.plotting.helpers as helpers
+import emodpy_hiv.plotting.plot_hiv_by_age_and_gender as pang
+import emodpy_hiv.plotting.plot_inset_chart_mean_compare as picmc
+
+
+def get_size(filename: str, offset: int = 0):
+    return os.path.getsize(filename) + offset
+
+
+@pytest.mark.unit
+class TestMapFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.exp_dir = self.temp_dir.name
+        for sim_index in range(3):
+            create_report_hiv_by_age_and_gender(os.path.join(self.exp_dir, f"ReportHIVByAgeAndGender_run{sim_index:05d}.csv"), seed=sim_index)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_results_are_in_order(self):
+        filenames = helpers.get_filenames(self.exp_dir, file_prefix="ReportHIVByAgeAndGender", file_extension=".csv")
+        expected = [os.path.getsize(fn) + 1 for fn in filenames]
+        self.assertEqual(expected, helpers.map_files(get_size, filenames, offset=1))
+        self.assertEqual(expected, helpers.map_files(get_size, filenames, workers=2, offset=1))
+        self.assertEqual([], helpers.map_files(get_size, [], workers=None))
+
+    def test_for_dir_extractors_with_workers(self):
+        for show_avg_per_run in [False, True]:
+            args = dict(dir_or_filename=self.exp_dir, node_id=2, gender="Female", age_bin_list=[15, 25, 30],
+                        start_column_name=" IP_Key:Risk", show_avg_per_run=show_avg_per_run)
+            expected_df, expected_prefixes = pang.extract_population_data_by_stratification_for_dir(**args)
+            actual_df, actual_prefixes = pang.extract_population_data_by_stratification_for_dir(**args, workers=3)
+            pd.testing.assert_frame_equal(expected_df, actual_df)
+            self.assertEqual(expected_prefixes, actual_prefixes)
+
+            args = dict(dir_or_filename=self.exp_dir, gender="Male", age_bin_list=[15, 25, 30],
+                        show_avg_per_run=show_avg_per_run, other_strat_column_name=" IsCircumcised",
+                        other_strat_value_a=1, other_strat_value_b=0)
+            expected = pang.extract_population_data_multiple_ages_for_dir(**args)
+            actual = pang.extract_population_data_multiple_ages_for_dir(**args, workers=2)
+            pd.testing.assert_frame_equal(expected[0], actual[0])
+            self.assertEqual(expected[1:], actual[1:])
+
+    def test_calculate_mean_with_workers(self):
+        input_dir = os.path.join(parent, "testdata", "InsetChart_data")
+        expected_cr, expected_raw = picmc.calculate_mean(input_dir)
+        actual_cr, actual_raw = picmc.calculate_mean(input_dir, workers=2)
+        self.assertEqual(expected_raw, actual_raw)
+        self.assertEqual(expected_cr, actual_cr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import pytest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+manifest_directory = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(manifest_directory))
+from helpers import create_report_hiv_by_age_and_gender
+
+import emodpy_hiv.plotting.plot_hiv_by_age_and_gender as pang
+from emodpy_hiv.plotting.report_hiv_by_age_and_gender import read_report_hiv_by_age_and_gender
+
+
+@pytest.mark.unit
+class TestReadReportHIVByAgeAndGender(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.temp_dir.name, "ReportHIVByAgeAndGender.csv")
+        self.df_full = create_report_hiv_by_age_and_gender(self.filename)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_dtypes_and_columns(self):
+        df = read_report_hiv_by_age_and_gender(self.filename)
+        self.assertEqual(list(self.df_full.columns), list(df.columns))
+        self.assertEqual("float64", df["Year"].dtype)
+        self.assertEqual("int32",   df[" NodeId"].dtype)          # noqa: E241
+        self.assertEqual("int8",    df[" Gender"].dtype)          # noqa: E241
+        self.assertEqual("float64", df[" Age"].dtype)
+        self.assertEqual("int8",    df[" HasHIV"].dtype)          # noqa: E241
+        self.assertIsInstance(df[" IP_Key:Risk"].dtype, pd.CategoricalDtype)
+        self.assertEqual("float64", df[" Population"].dtype)
+        pd.testing.assert_frame_equal(self.df_full, df, check_dtype=False, check_categorical=False)
+
+        df = read_report_hiv_by_age_and_gender(self.filename, columns=["Year", " Population", " NotAColumn"])
+        self.assertEqual(["Year", " Population"], list(df.columns))
+
+    def test_filters_match_full_read(self):
+        df = read_report_hiv_by_age_and_gender(self.filename,
+                                               columns=["Year", " Age", " Population"],
+                                               node_ids=[1, 3],
+                                               genders=[1],
+                                               min_year=1991.0,
+                                               max_year=1991.5,
+                                               chunksize=17)
+        keep = (self.df_full[" NodeId"].isin([1, 3]) & (self.df_full[" Gender"] == 1)
+                & (self.df_full["Year"] >= 1991.0) & (self.df_full["Year"] <= 1991.5))
+        expected = self.df_full.loc[keep, ["Year", " NodeId", " Gender", " Age", " Population"]].reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, df, check_dtype=False)
+
+        df = read_report_hiv_by_age_and_gender(self.filename, node_ids=[99], chunksize=17)
+        self.assertEqual(0, len(df))
+        self.assertIsInstance(df[" IP_Key:Risk"].dtype, pd.CategoricalDtype)
+
+    def test_missing_filter_column(self):
+        self.df_full.drop(columns=[" Gender"]).to_csv(self.filename, index=False)
+        with self.assertRaisesRegex(ValueError, "' Gender' column does not exist"):
+            read_report_hiv_by_age_and_gender(self.filename, genders=[0])
+
+    def test_extract_population_data_multiple_ages(self):
+        df, is_hiv_neg = pang.extract_population_data_multiple_ages(filename=self.filename,
+                                                                    node_id=2,
+                                                                    gender="Male",
+                                                                    age_bin_list=[15, 25, 30],
+                                                                    filter_by_hiv_negative=True,
+                                                                    other_strat_column_name=" IP_Key:Risk",
+                                                                    other_strat_value="HIGH",
+                                                                    other_data_column_names=[" On_ART"])
+        self.assertTrue(is_hiv_neg)
+        full = self.df_full
+        for col_name in [" Population", " On_ART"]:
+            for age_min, age_max in [(15, 25), (25, 30)]:
+                keep = ((full[" NodeId"] == 2) & (full[" Gender"] == 0) & (full[" HasHIV"] == 0)
+                        & (full[" IP_Key:Risk"] == "HIGH") & (full[" Age"] >= age_min) & (full[" Age"] < age_max))
+                expected = full[keep].groupby("Year")[col_name].sum()
+                actual = df[f"{col_name}:{age_min} - {age_max}"]
+                np.testing.assert_array_equal(expected.to_numpy(), actual.to_numpy())
+
+    def test_age_on_bin_edge(self):
+        # an age that is not exact in float32 still starts its age bin
+        self.df_full[" Age"] = self.df_full[" Age"].replace(15.0, 14.99)
+        self.df_full.to_csv(self.filename, index=False)
+        df = read_report_hiv_by_age_and_gender(self.filename, columns=[" Age"])
+        self.assertIn(14.99, df[" Age"].tolist())
+
+        df, _ = pang.extract_population_data_multiple_ages(filename=self.filename,
+                                                           node_id=1,
+                                                           gender="Female",
+                                                           age_bin_list=[14.99, 20])
+        full = self.df_full
+        keep = (full[" NodeId"] == 1) & (full[" Gender"] == 1) & (full[" Age"] == 14.99)
+        expected = full[keep].groupby("Year")[" Population"].sum()
+        self.assertGreater(expected.sum(), 0)
+        np.testing.assert_array_equal(expected.to_numpy(), df[" Population:14.99 - 20"].to_numpy())
+
+    def test_extract_population_data_by_stratification(self):
+        df = pang.extract_population_data_by_stratification(filename=self.filename,
+                                                            node_id=3,
+                                                            gender="Female",
+                                                            start_column_name=" IP_Key:Risk")
+        full = self.df_full
+        self.assertEqual(sorted(["LOW", "MEDIUM", "HIGH"]), sorted(df.columns))
+        for risk in ["LOW", "MEDIUM", "HIGH"]:
+            keep = (full[" NodeId"] == 3) & (full[" Gender"] == 1) & (full[" IP_Key:Risk"] == risk)
+            expected = full[keep].groupby("Year")[" Population"].sum()
+            np.testing.assert_array_equal(expected.to_numpy(), df[risk].to_numpy())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import pytest
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+manifest_directory = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(manifest_directory))
+from helpers import create_report_hiv_by_age_and_gender
+
+import emodpy_hiv.plotting.report_store as report_store
+import emodpy_hiv.plotting.plot_hiv_by_age_and_gender as pang
+import emodpy_hiv.plotting.plot_relationship_end as pre
+from emodpy_hiv.plotting.report_hiv_by_age_and_gender import read_report_hiv_by_age_and_gender
+
+
+def create_relationship_end(filename: str):
+    df = pd.DataFrame({
+        "Rel_ID": [1, 2, 3, 4],
+        "Rel_start_time": [10.0, 20.0, 30.0, 40.0],
+        "Rel_actual_end_time": [100.0, 50.0, 130.0, 41.0],
+        pre.COL_NAME_REL_TYPE: [0, 1, 0, 0],
+        "Termination_Reason": ["BROKEUP", "BROKEUP", "PARTNER_DIED", "BROKEUP"]
+    })
+    df.to_csv(filename, index=False)
+
+
+@pytest.mark.unit
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is required to write parquet files")
+class TestReportStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.exp_dir = self.temp_dir.name
+        self.filenames = []
+        for sim_index in range(2):
+            sim_dir = os.path.join(self.exp_dir, f"sim_{sim_index}")
+            os.makedirs(os.path.join(sim_dir, "output"))
+            with open(os.path.join(sim_dir, "tags.json"), "w") as file:
+                json.dump({"Run_Number": sim_index}, file)
+            filename = os.path.join(sim_dir, "output", "ReportHIVByAgeAndGender.csv")
+            create_report_hiv_by_age_and_gender(filename, seed=sim_index)
+            create_relationship_end(os.path.join(sim_dir, "output", "RelationshipEnd.csv"))
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_convert(self):
+        store_dir = report_store.convert_reports_to_parquet(self.exp_dir)
+        manifest = report_store.read_manifest(store_dir)
+        self.assertEqual(4, len(manifest))
+
+        entry = manifest[os.path.join("sim_1", "output", "ReportHIVByAgeAndGender.csv")]
+        self.assertEqual("sim_1__output", entry["sim_id"])
+        self.assertEqual({"Run_Number": 1}, entry["tags"])
+        self.assertEqual(os.path.join("report=ReportHIVByAgeAndGender", "sim=sim_1__output", "ReportHIVByAgeAndGender.parquet"),
+                         entry["parquet"])
+        self.assertEqual(report_store._hash_file(self.filenames[1]), entry["sha256"])
+        self.assertTrue(os.path.isfile(os.path.join(store_dir, entry["parquet"])))
+
+        # unchanged files are not converted again, changed files are
+        parquet_filenames = [os.path.join(store_dir, entry["parquet"]) for entry in manifest.values()]
+        mtimes = [os.stat(fn).st_mtime_ns for fn in parquet_filenames]
+        create_report_hiv_by_age_and_gender(self.filenames[0], seed=99)
+        self.assertIsNone(report_store.find_stored_report(self.filenames[0]))
+        report_store.convert_reports_to_parquet(self.exp_dir, sim_tags={"sim_0__output": {"Run_Number": 7}})
+        new_mtimes = [os.stat(fn).st_mtime_ns for fn in parquet_filenames]
+        changed = [fn for fn, old, new in zip(parquet_filenames, mtimes, new_mtimes) if old != new]
+        self.assertEqual([os.path.join(store_dir, "report=ReportHIVByAgeAndGender", "sim=sim_0__output",
+                                       "ReportHIVByAgeAndGender.parquet")], changed)
+        self.assertEqual({"Run_Number": 7}, report_store.find_stored_report(self.filenames[0])["tags"])
+
+    def test_hash_only_changed_files(self):
+        store_dir = report_store.convert_reports_to_parquet(self.exp_dir)
+        manifest = report_store.read_manifest(store_dir)
+        with mock.patch.object(report_store, "_hash_file", wraps=report_store._hash_file) as hash_file:
+            report_store.convert_reports_to_parquet(self.exp_dir)
+            self.assertEqual(0, hash_file.call_count)
+
+            # a file with a new modification time is hashed but not converted again if it is the same
+            parquet_filename = report_store.find_stored_report(self.filenames[0])["parquet"]
+            parquet_mtime = os.stat(parquet_filename).st_mtime_ns
+            stat = os.stat(self.filenames[0])
+            os.utime(self.filenames[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            report_store.convert_reports_to_parquet(self.exp_dir)
+            self.assertEqual([mock.call(self.filenames[0])], hash_file.call_args_list)
+            self.assertEqual(parquet_mtime, os.stat(parquet_filename).st_mtime_ns)
+
+        new_manifest = report_store.read_manifest(store_dir)
+        for relative_filename, entry in manifest.items():
+            self.assertEqual(entry["sha256"], new_manifest[relative_filename]["sha256"])
+
+    def test_store_has_declared_types(self):
+        store_dir = report_store.convert_reports_to_parquet(self.exp_dir)
+        entry = report_store.read_manifest(store_dir)[os.path.join("sim_0", "output", "ReportHIVByAgeAndGender.csv")]
+        df = pd.read_parquet(os.path.join(store_dir, entry["parquet"]))
+        self.assertEqual("int32", entry["dtypes"][" NodeId"])
+        self.assertEqual("category", entry["dtypes"][" IP_Key:Risk"])
+        for col_name, dtype in entry["dtypes"].items():
+            self.assertEqual(dtype, str(df[col_name].dtype), col_name)
+
+    def test_readers_use_store(self):
+        expected_full = read_report_hiv_by_age_and_gender(self.filenames[1])
+        expected = read_report_hiv_by_age_and_gender(self.filenames[1], columns=["Year", " Population"],
+                                                     node_ids=[2], genders=[0], min_year=1991.0)
+        expected_strat = pang.extract_population_data_by_stratification(filename=self.filenames[1],
+                                                                         node_id=1,
+                                                                         gender="Male",
+                                                                         age_bin_list=[15, 30],
+                                                                         start_column_name=" IP_Key:Risk")
+        rel_filename = os.path.join(self.exp_dir, "sim_0", "output", "RelationshipEnd.csv")
+        expected_rel = pre.extract_data_for_relationship(rel_filename, relationship_type=0)
+
+        report_store.convert_reports_to_parquet(self.exp_dir)
+        self.assertIsNotNone(report_store.find_stored_report(self.filenames[1]))
+
+        pd.testing.assert_frame_equal(expected_full, read_report_hiv_by_age_and_gender(self.filenames[1]))
+        actual = read_report_hiv_by_age_and_gender(self.filenames[1], columns=["Year", " Population"],
+                                                   node_ids=[2], genders=[0], min_year=1991.0)
+        pd.testing.assert_frame_equal(expected, actual)
+        actual_strat = pang.extract_population_data_by_stratification(filename=self.filenames[1],
+                                                                      node_id=1,
+                                                                      gender="Male",
+                                                                      age_bin_list=[15, 30],
+                                                                      start_column_name=" IP_Key:Risk")
+        pd.testing.assert_frame_equal(expected_strat, actual_strat)
+        pd.testing.assert_frame_equal(expected_rel, pre.extract_data_for_relationship(rel_filename, relationship_type=0))
+
+    def test_missing_pyarrow(self):
+        report_store.convert_reports_to_parquet(self.exp_dir)
+        with mock.patch.object(report_store.importlib.util, "find_spec", return_value=None):
+            message = "pip install emodpy-hiv\\[parquet\\]"
+            with self.assertRaisesRegex(ImportError, message):
+                report_store.convert_reports_to_parquet(self.exp_dir)
+            with self.assertRaisesRegex(ImportError, message):
+                report_store.read_report(self.filenames[0])
+            with self.assertRaisesRegex(ImportError, message):
+                read_report_hiv_by_age_and_gender(self.filenames[0])
+
+    def test_same_report_of_a_simulation(self):
+        create_report_hiv_by_age_and_gender(os.path.join(self.exp_dir, "sim_0", "output", "ReportHIVByAgeAndGender_.csv"))
+        with self.assertRaisesRegex(ValueError, "are both the 'ReportHIVByAgeAndGender' report"):
+            report_store.convert_reports_to_parquet(self.exp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,12 +4,14 @@ from pathlib import Path
 import json
 import sys
 import os
+import numpy as np
+import pandas as pd
 from emod_api import schema_to_class as s2c
 from emod_api import campaign
 
 from emodpy_hiv.campaign.common import (TargetGender, TargetDemographicsConfig, MAX_AGE_YEARS,
                                         RepetitionConfig, PropertyRestrictions, NChooserTargetedDistributionHIV, ValueMap,
-                                        CommonInterventionParameters)
+                                        CommonInterventionParameters, NChooserTargetedDistributionTableHIV)
 from emodpy_hiv.utils.emod_enum import TargetDiseaseState
 
 manifest_directory = Path(__file__).resolve().parent.parent
@@ -393,6 +395,79 @@ class TestNChooserTargetedDistributionHIV(unittest.TestCase):
         self.assertTrue("should be less than end_year" in str(context.exception))
 
 
+@pytest.mark.unit
+class TestNChooserTargetedDistributionTableHIV(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.campaign_obj = campaign
+        cls.campaign_obj.set_schema(manifest.schema_path)
+
+    def setUp(self):
+        self.campaign_obj.reset()
+        print(f"running test: {self._testMethodName}:")
+
+    @staticmethod
+    def create_monthly_df(num_years: int = 40, num_age_bins: int = 10) -> pd.DataFrame:
+        years = 1990.0 + np.arange(num_years * 12) / 12.0
+        min_ages = 5.0 * np.arange(num_age_bins)
+        year_grid, age_grid = np.meshgrid(years, min_ages, indexing="ij")
+        df = pd.DataFrame({'year': year_grid.ravel(),
+                           'min_age': age_grid.ravel(),
+                           'max_age': age_grid.ravel() + 4.9999,
+                           'num_targeted_male': np.random.default_rng(42).integers(0, 1000, year_grid.size)})
+        # the rows of a year do not need to be in order
+        return df.sample(frac=1.0, random_state=42).sort_values(by='year', kind='stable')
+
+    def test_same_as_distribution_per_year(self):
+        table = NChooserTargetedDistributionTableHIV(
+            self.create_monthly_df(),
+            target_disease_state=[[TargetDiseaseState.HIV_NEGATIVE, TargetDiseaseState.NOT_HAVE_INTERVENTION]],
+            target_disease_state_has_intervention_name="MaleCircumcision")
+        self.assertEqual(480, len(table))
+        self.assertEqual(1990.0, table.start_year)
+
+        expected = [table.get_distribution(year_index).to_schema_dict(self.campaign_obj)
+                    for year_index in range(len(table))]
+        actual = table.to_schema_dicts(self.campaign_obj)
+        self.assertEqual(json.dumps(expected, sort_keys=True), json.dumps(actual, sort_keys=True))
+        self.assertListEqual([0] * 10, actual[-1].Num_Targeted_Females)
+        self.assertListEqual([5.0 * age_bin for age_bin in range(10)],
+                             [age_range["Min"] for age_range in actual[1]["Age_Ranges_Years"]])
+
+    def test_num_targeted(self):
+        df = pd.DataFrame({'year': [2011, 2011, 2010], 'min_age': [15, 1, 1], 'max_age': [49.999, 14.999, 14.999],
+                           'num_targeted': [10, 20, 30]})
+        distributions = NChooserTargetedDistributionTableHIV(df).to_schema_dicts(self.campaign_obj)
+        self.assertListEqual([2011.0, 2010.0], [distribution.Start_Year for distribution in distributions])
+        self.assertListEqual([20, 10], distributions[0].Num_Targeted)
+        self.assertListEqual([30], distributions[1].Num_Targeted)
+        self.assertListEqual([], distributions[1].Num_Targeted_Males)
+
+    def test_exception_overlapping_age_ranges(self):
+        df = pd.DataFrame({'year': [2010, 2010, 2011, 2011], 'min_age': [1, 15, 1, 10],
+                           'max_age': [14.999, 49.999, 14.999, 49.999], 'num_targeted': [1, 2, 3, 4]})
+        with self.assertRaises(ValueError) as context:
+            NChooserTargetedDistributionTableHIV(df)
+        self.assertTrue("Your age ranges are overlapping" in str(context.exception))
+        self.assertTrue("in year 2011" in str(context.exception))
+
+    def test_exception_invalid_age_max(self):
+        df = pd.DataFrame({'year': [2010, 2010], 'min_age': [1, 15], 'max_age': [14.999, 10],
+                           'num_targeted': [1, 2]})
+        with self.assertRaises(ValueError) as context:
+            NChooserTargetedDistributionTableHIV(df)
+        self.assertTrue("should be larger than min age" in str(context.exception))
+
+    def test_exception_invalid_year(self):
+        df = pd.DataFrame({'year': [2010, 2250], 'min_age': [1, 1], 'max_age': [14.999, 14.999],
+                           'num_targeted': [1, 2]})
+        table = NChooserTargetedDistributionTableHIV(df)
+        with self.assertRaises(ValueError) as context:
+            table.to_schema_dicts(self.campaign_obj)
+        self.assertTrue("above maximum" in str(context.exception))
+
+
 @pytest.mark.unit
 class TestValueMap(unittest.TestCase):
     def setUp(self):
@@ -3,10 +3,13 @@ import pytest
 import pandas as pd
 import json
 import os
+from unittest import mock
 from emod_api import campaign as api_campaign
-from emodpy_hiv.campaign.individual_intervention import MaleCircumcision
+import emodpy_hiv.campaign.distributor as distributor
+from emodpy_hiv.campaign.individual_intervention import MaleCircumcision, HIVRapidHIVDiagnostic
 from emodpy_hiv.campaign.distributor import (add_intervention_nchooser_df, _add_intervention_nchooser,
-                                             add_intervention_reference_tracking)
+                                             add_intervention_reference_tracking, add_intervention_triggered,
+                                             add_interventions_triggered, TriggeredInterventionSpec)
 from emodpy_hiv.campaign.common import (PropertyRestrictions, NChooserTargetedDistributionHIV, ValueMap,
                                         CommonInterventionParameters as CIP,
                                         TargetDemographicsConfig as TDC, TargetGender)
@@ -285,5 +288,53 @@ class TestDistributor(unittest.TestCase):
         self.assertTrue("The end_year should be greater than the start_year" in str(context.exception))
 
 
+    def test_add_interventions_triggered(self):
+        def create_specs():
+            hiv_test = HIVRapidHIVDiagnostic(self.campaign, positive_diagnosis_event="Tested_Positive",
+                                             negative_diagnosis_event="Tested_Negative", base_sensitivity=1.0)
+            other_test = HIVRapidHIVDiagnostic(self.campaign, positive_diagnosis_event="Tested_Positive",
+                                               negative_diagnosis_event="Tested_Negative", base_sensitivity=0.9)
+            same_test = HIVRapidHIVDiagnostic(self.campaign, positive_diagnosis_event="Tested_Positive",
+                                              negative_diagnosis_event="Tested_Negative", base_sensitivity=1.0)
+            specs = [TriggeredInterventionSpec(intervention_list=[hiv_test], triggers_list=["Test"],
+                                               start_year=2000, node_ids=[node_id], event_name=f"Test {node_id}")
+                     for node_id in [1, 2, 3]]
+            specs.append(TriggeredInterventionSpec(intervention_list=[same_test], triggers_list=["Test"],
+                                                   start_year=2000, node_ids=[4], event_name="Test 4"))
+            specs.append(TriggeredInterventionSpec(intervention_list=[other_test], triggers_list=["Test"],
+                                                   start_year=2001, event_name="Other test"))
+            return specs
+
+        for spec in create_specs():
+            add_intervention_triggered(self.campaign,
+                                       intervention_list=spec.intervention_list,
+                                       triggers_list=spec.triggers_list,
+                                       start_year=spec.start_year,
+                                       node_ids=spec.node_ids,
+                                       event_name=spec.event_name)
+        campaign_file = os.path.join(self.output_folder, "add_interventions_triggered_single.json")
+        self.campaign.save(campaign_file)
+        with open(campaign_file, 'r') as f:
+            expected = json.load(f)
+        helpers.delete_existing_file(campaign_file)
+
+        self.campaign.set_schema(manifest.schema_path)
+        with mock.patch.object(distributor, "_emodpy_add_intervention_triggered",
+                               wraps=distributor._emodpy_add_intervention_triggered) as build_coordinator:
+            add_interventions_triggered(self.campaign, create_specs())
+        # an equal intervention in a different object shares the coordinator
+        self.assertEqual(2, build_coordinator.call_count)
+        events = self.campaign.campaign_dict["Events"]
+        self.assertEqual(events[0]["Event_Coordinator_Config"], events[3]["Event_Coordinator_Config"])
+        self.assertIsNot(events[0]["Event_Coordinator_Config"], events[3]["Event_Coordinator_Config"])
+        self.assertNotEqual(events[0]["Event_Coordinator_Config"], events[4]["Event_Coordinator_Config"])
+
+        campaign_file = os.path.join(self.output_folder, "add_interventions_triggered_bulk.json")
+        self.campaign.save(campaign_file)
+        with open(campaign_file, 'r') as f:
+            output = json.load(f)
+        helpers.delete_existing_file(campaign_file)
+        self.assertDictEqual(expected, output)
+
 if __name__ == '__main__':
     unittest.main()
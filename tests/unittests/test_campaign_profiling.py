@@ -0,0 +1,87 @@
+import unittest
+import pytest
+from pathlib import Path
+import sys
+import json
+
+from emod_api import campaign as api_campaign
+from emod_api import schema_to_class as s2c
+
+from emodpy_hiv.countries.zambia import Zambia
+from emodpy_hiv.campaign.profiling import CampaignProfiler, get_active_profiler, profiled
+from emodpy_hiv.campaign.schema_templates import get_schema_template_cache
+
+manifest_directory = Path(__file__).resolve().parent.parent
+sys.path.append(str(manifest_directory))
+import manifest
+import helpers
+
+
+class MockCampaign:
+    def __init__(self):
+        self.campaign_dict = {"Events": []}
+
+
+@profiled
+def add_two_events(campaign):
+    campaign.campaign_dict["Events"].extend([{}, {}])
+    add_one_event(campaign=campaign)
+
+
+@profiled
+def add_one_event(campaign):
+    campaign.campaign_dict["Events"].append({})
+
+
+@pytest.mark.unit
+class TestCampaignProfiling(unittest.TestCase):
+    def setUp(self):
+        print(f"running test: {self._testMethodName}")
+
+    def test_nested_records(self):
+        campaign = MockCampaign()
+        add_one_event(campaign)  # not recorded
+        with CampaignProfiler() as profiler:
+            self.assertIs(profiler, get_active_profiler())
+            add_two_events(campaign)
+        self.assertIsNone(get_active_profiler())
+
+        records = profiler.to_records()
+        self.assertEqual(["add_two_events", "add_one_event"], [record["name"] for record in records])
+        self.assertEqual([0, 1], [record["depth"] for record in records])
+        self.assertEqual([3, 1], [record["events_added"] for record in records])
+        self.assertEqual([0, 0], [record["schema_lookups"] for record in records])
+        self.assertGreaterEqual(records[0]["wall_time"], records[1]["wall_time"])
+
+    def test_only_one_active_profiler(self):
+        with CampaignProfiler():
+            with self.assertRaises(RuntimeError):
+                with CampaignProfiler():
+                    pass
+
+    def test_zambia_build_campaign(self):
+        get_class_with_defaults = s2c.get_class_with_defaults
+        filename = Path(__file__).parent.joinpath("outputs", "test_zambia_build_campaign_profile.json")
+
+        # the lookups answered by the schema template cache are not counted
+        get_schema_template_cache().clear()
+        api_campaign.schema_path = manifest.schema_path
+        with CampaignProfiler() as profiler:
+            campaign = Zambia.build_campaign(campaign=api_campaign)
+        self.assertIs(get_class_with_defaults, s2c.get_class_with_defaults)
+
+        df = profiler.to_dataframe()
+        calls = df[df["kind"] == "ParameterizedCall"]
+        self.assertTrue((calls["depth"] == 0).all())
+        self.assertEqual(len(campaign.campaign_dict["Events"]), calls["events_added"].sum())
+        self.assertGreater(calls["schema_lookups"].sum(), 0)
+        self.assertIn("add_state_OnART", df["name"].values)
+
+        profiler.to_json(filename)
+        with open(filename, "r") as file:
+            self.assertEqual(len(df), len(json.load(file)))
+        helpers.delete_existing_file(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import importlib.util
 import unittest
 import pytest
+from pathlib import Path
 from typing import List
+import numpy as np
+import pandas as pd
 
 from emodpy_hiv.country_model import Country
 from emodpy_hiv.demographics.hiv_demographics import HIVDemographics
@@ -94,6 +98,46 @@ class MockCountry(Country):
         return parameterized_calls
 
 
+class MockCampaign:
+    def __init__(self):
+        self.schema_path = "mock_schema.json"
+        self.base_year = None
+        self.campaign_dict = {"Events": []}
+        self.individual_events_broadcast = []
+
+    def get_schema(self):
+        return {}
+
+
+class MockCampaignCountry(Country):
+    country_name = "MockCampaignCountry"
+    executed = []
+    duration = 10
+
+    @classmethod
+    def initialize_campaign(cls, schema_path) -> MockCampaign:
+        campaign = MockCampaign()
+        campaign.base_year = cls.base_year
+        return campaign
+
+    @staticmethod
+    def add_event(campaign, name: str, duration: int, coverage: float = 1.0):
+        MockCampaignCountry.executed.append(name)
+        campaign.campaign_dict["Events"].append({"Name": name, "Coverage": coverage, "Year": campaign.base_year})
+        campaign.individual_events_broadcast.append(name)
+
+    @classmethod
+    def get_campaign_parameterized_calls(cls, campaign: MockCampaign) -> List[ParameterizedCall]:
+        parameterized_calls = []
+        for name in ["A", "B", "C"]:
+            pc = ParameterizedCall(func=cls.add_event,
+                                   non_hyperparameters={'name': name, 'duration': cls.duration},
+                                   hyperparameters={'coverage': None},
+                                   label=name)
+            parameterized_calls.append(pc)
+        return parameterized_calls
+
+
 @pytest.mark.unit
 class TestParameterizedCall(unittest.TestCase):
 
@@ -111,5 +155,134 @@ class TestParameterizedCall(unittest.TestCase):
         self.assertEqual(66, demographics.test_parameter6)
 
 
+@pytest.mark.unit
+class TestBuildCampaignIncrementally(unittest.TestCase):
+
+    def setUp(self):
+        MockCampaignCountry._campaign_build_cache = None
+        MockCampaignCountry.executed = []
+
+    def tearDown(self):
+        MockCampaignCountry.duration = 10
+        MockCampaignCountry.base_year = Country.base_year
+
+    def test_only_changed_calls_are_executed(self):
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=MockCampaign())
+        self.assertEqual(["A", "B", "C"], MockCampaignCountry.executed)
+
+        MockCampaignCountry.executed = []
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign,
+                                                                    hyperparameters={'coverage--B': 0.5})
+        self.assertEqual(["B"], MockCampaignCountry.executed)
+        year = MockCampaignCountry.base_year
+        self.assertEqual([{"Name": "A", "Coverage": 1.0, "Year": year},
+                          {"Name": "B", "Coverage": 0.5, "Year": year},
+                          {"Name": "C", "Coverage": 1.0, "Year": year}], campaign.campaign_dict["Events"])
+        self.assertEqual(["A", "B", "C"], campaign.individual_events_broadcast)
+        self.assertEqual(MockCampaignCountry.base_year, campaign.base_year)
+
+        # going back to the defaults re-executes B again
+        MockCampaignCountry.executed = []
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign)
+        self.assertEqual(["B"], MockCampaignCountry.executed)
+        self.assertEqual(3, len(campaign.campaign_dict["Events"]))
+
+    def test_changed_arguments_and_base_year_are_executed(self):
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=MockCampaign())
+
+        MockCampaignCountry.duration = 20
+        MockCampaignCountry.executed = []
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign)
+        self.assertEqual(["A", "B", "C"], MockCampaignCountry.executed)
+
+        MockCampaignCountry.base_year = 2000.5
+        MockCampaignCountry.executed = []
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign)
+        self.assertEqual(["A", "B", "C"], MockCampaignCountry.executed)
+        self.assertEqual([2000.5] * 3, [event["Year"] for event in campaign.campaign_dict["Events"]])
+
+    def test_replayed_events_are_copies(self):
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=MockCampaign())
+        campaign.campaign_dict["Events"][0]["Coverage"] = 0.0
+
+        MockCampaignCountry.executed = []
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign)
+        self.assertEqual([], MockCampaignCountry.executed)
+        self.assertEqual(1.0, campaign.campaign_dict["Events"][0]["Coverage"])
+
+        campaign.campaign_dict["Events"][1]["Coverage"] = 0.0
+        campaign = MockCampaignCountry.build_campaign_incrementally(campaign=campaign)
+        self.assertEqual(1.0, campaign.campaign_dict["Events"][1]["Coverage"])
+
+    def test_cache_is_not_shared_with_subclasses(self):
+        class MockCampaignSubCountry(MockCampaignCountry):
+            pass
+
+        MockCampaignCountry.build_campaign_incrementally(campaign=MockCampaign())
+        MockCampaignCountry.executed = []
+        MockCampaignSubCountry.build_campaign_incrementally(campaign=MockCampaign())
+        self.assertEqual(["A", "B", "C"], MockCampaignCountry.executed)
+
+    def test_unknown_hyperparameter(self):
+        with self.assertRaises(ValueError) as context:
+            MockCampaignCountry.build_campaign_incrementally(campaign=MockCampaign(),
+                                                             hyperparameters={'coverage--D': 0.5})
+        self.assertIn("coverage--D", str(context.exception))
+
+
+@pytest.mark.unit
+class TestLoadNChooserDistributionData(unittest.TestCase):
+    """
+    The node_set values and the years are in the order they first appear, the rows within a year are in
+    the order of the file, and the age_bin '[min_age:max_age)' excludes max_age by subtracting 0.00001.
+    """
+
+    def setUp(self):
+        self.output_dir = Path(__file__).parent.joinpath("outputs")
+        self.output_dir.mkdir(exist_ok=True)
+        self.data = pd.DataFrame({
+            'node_set':        [2, 1, 2, 1, 2, 2, 1, 1],                                              # noqa: E241
+            'year':            [2011.0, 2010.0, 2010.0, 2010.0, 2011.0, 2010.0, 2012.0, 2012.0],      # noqa: E241
+            'age_bin':         ['[15:50)', '[1:15)', '[15:50)', '[15:50)', '[1:15)', '[0.5:1)', '15:50', '[ 50 : 100 )'],
+            'n_circumcisions': [10.5, 20.2, 30.0, 40.9, 50.1, 60.0, 70.0, 80.0]})
+        self.expected = {
+            2: pd.DataFrame({'year':            [2011.0, 2011.0, 2010.0, 2010.0],                     # noqa: E241
+                             'min_age':         [15.0, 1.0, 15.0, 0.5],                               # noqa: E241
+                             'max_age':         np.array([50.0, 15.0, 50.0, 1.0]) - 0.00001,          # noqa: E241
+                             'n_circumcisions': [10, 50, 30, 60]}),
+            1: pd.DataFrame({'year':            [2010.0, 2010.0, 2012.0, 2012.0],                     # noqa: E241
+                             'min_age':         [1.0, 15.0, 15.0, 50.0],                              # noqa: E241
+                             'max_age':         np.array([15.0, 50.0, 50.0, 100.0]) - 0.00001,        # noqa: E241
+                             'n_circumcisions': [20, 40, 70, 80]})
+        }
+
+    def assert_expected_data(self, actual: dict):
+        self.assertEqual(list(self.expected.keys()), list(actual.keys()))
+        for node_id in self.expected:
+            pd.testing.assert_frame_equal(self.expected[node_id], actual[node_id], check_exact=True)
+
+    def test_csv(self):
+        filename = self.output_dir.joinpath("test_nchooser_distribution.csv")
+        self.data.to_csv(filename, index=False)
+        self.assert_expected_data(Country.load_nchooser_distribution_data(filename))
+        filename.unlink()
+
+    def test_invalid_age_bin(self):
+        filename = self.output_dir.joinpath("test_invalid_age_bin.csv")
+        pd.DataFrame({'node_set': [1, 1], 'year': [2010.0, 2010.0], 'age_bin': ['[1:15)', '15-50'],
+                      'n_circumcisions': [1, 2]}).to_csv(filename, index=False)
+        with self.assertRaises(ValueError) as context:
+            Country.load_nchooser_distribution_data(filename)
+        self.assertIn("15-50", str(context.exception))
+        filename.unlink()
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is required to write parquet files")
+    def test_parquet(self):
+        filename = self.output_dir.joinpath("test_nchooser_distribution.parquet")
+        self.data.to_parquet(filename)
+        self.assert_expected_data(Country.load_nchooser_distribution_data(filename))
+        filename.unlink()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import pytest
+from pathlib import Path
+import sys
+import json
+
+from emodpy_hiv.countries.zambia import Zambia
+from emodpy_hiv.country_sweep import materialize_samples
+from emodpy_hiv.country_sweep import CONFIG_FILENAME, CAMPAIGN_FILENAME, DEMOGRAPHICS_FILENAME
+
+manifest_directory = Path(__file__).resolve().parent.parent
+sys.path.append(str(manifest_directory))
+import manifest
+import helpers
+
+
+@pytest.mark.unit
+class TestCountrySweep(unittest.TestCase):
+    def setUp(self):
+        print(f"running test: {self._testMethodName}")
+        self.output_dir = Path(__file__).parent.joinpath("outputs", self._testMethodName)
+        helpers.delete_existing_folder(self.output_dir)
+
+    def tearDown(self):
+        helpers.delete_existing_folder(self.output_dir)
+
+    def test_materialize_samples_matches_build(self):
+        samples = [{'Run_Number': 1}, {'Run_Number': 2}]
+        sample_dirs = materialize_samples(country=Zambia,
+                                          schema_path=manifest.schema_path,
+                                          samples=samples,
+                                          output_dir=self.output_dir,
+                                          processes=2)
+        self.assertEqual(2, len(sample_dirs))
+
+        for sample, sample_dir in zip(samples, sample_dirs):
+            for filename in [CONFIG_FILENAME, CAMPAIGN_FILENAME, DEMOGRAPHICS_FILENAME]:
+                self.assertTrue(Path(sample_dir, filename).exists())
+            with open(Path(sample_dir, CONFIG_FILENAME), "r") as file:
+                config_json = json.load(file)
+            self.assertEqual(sample['Run_Number'], config_json['Run_Number'])
+
+        # The samples share everything except for the hyperparameters
+        with open(Path(sample_dirs[0], CAMPAIGN_FILENAME), "r") as file:
+            campaign_json_1 = json.load(file)
+        with open(Path(sample_dirs[1], CAMPAIGN_FILENAME), "r") as file:
+            campaign_json_2 = json.load(file)
+        self.assertDictEqual(campaign_json_1, campaign_json_2)
+
+    def test_materialize_samples_unknown_hyperparameter(self):
+        with self.assertRaises(ValueError) as context:
+            materialize_samples(country=Zambia,
+                                schema_path=manifest.schema_path,
+                                samples=[{'not_a_hyperparameter': 1}],
+                                output_dir=self.output_dir,
+                                processes=1)
+        self.assertIn("not_a_hyperparameter", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,19 @@
+import subprocess
+import sys
 import unittest
 import pytest
 
+# The maximum time, in seconds, that importing a country model can take in a new process.
+# It is generous so that slow machines pass, but loading an ML stack would exceed it.
+COUNTRY_IMPORT_TIME_BUDGET = 10.0
+
+# The maximum cumulative time, in microseconds, reported by 'python -X importtime' for 'import emodpy_hiv'.
+# The subpackages are imported lazily so the package itself should only take a few milliseconds.
+PACKAGE_IMPORT_TIME_BUDGET_US = 100000
+
+# The machine learning stack should not be loaded when a country model is imported
+HEAVY_PACKAGES = ["sklearn", "scipy", "joblib"]
+
 @pytest.mark.unit
 class HIVTestImports(unittest.TestCase):
     def setUp(self) -> None:
@@ -49,6 +62,55 @@ class HIVTestImports(unittest.TestCase):
 
     # endregion
 
+    def test_package_import_time(self):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import emodpy_hiv"],
+                                capture_output=True, text=True, check=True)
+
+        # -------------------------------------------------------------------------
+        # --- Each line is 'import time: self [us] | cumulative | imported package'
+        # --- and the nesting of the imports is shown by indenting the package name.
+        # -------------------------------------------------------------------------
+        cumulative_us = None
+        imported_packages = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, package = line[len("import time:"):].split("|")
+            imported_packages.append(package.strip())
+            if package == " emodpy_hiv":  # not indented so it is the top level import
+                cumulative_us = int(cumulative)
+
+        self.assertIsNotNone(cumulative_us, "'emodpy_hiv' was not found in the import times.")
+        for heavy_package in ["pandas", "emod_api", "emodpy"]:
+            self.assertNotIn(heavy_package, imported_packages, f"'import emodpy_hiv' imported '{heavy_package}'.")
+        self.assertLess(cumulative_us, PACKAGE_IMPORT_TIME_BUDGET_US,
+                        f"'import emodpy_hiv' took {cumulative_us} microseconds.")
+
+    def test_lazy_subpackages(self):
+        import emodpy_hiv
+
+        self.assertEqual("emodpy_hiv.campaign", emodpy_hiv.campaign.__name__)
+        self.assertEqual("emodpy_hiv.countries", emodpy_hiv.countries.__name__)
+        self.assertIn("reporters", dir(emodpy_hiv))
+        with self.assertRaises(AttributeError):
+            emodpy_hiv.not_a_module
+
+    def test_country_import_is_lightweight(self):
+        code = ("import sys, time\n"
+                "start = time.perf_counter()\n"
+                "import emodpy_hiv.countries.zambia\n"
+                "print(time.perf_counter() - start)\n"
+                f"print(','.join(sorted(m for m in {HEAVY_PACKAGES} if m in sys.modules)))\n")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        # the last line is empty when no heavy packages were loaded, so do not strip it
+        lines = result.stdout.split("\n")
+        import_time = float(lines[-3])
+        loaded_packages = lines[-2]
+
+        self.assertEqual("", loaded_packages, "Importing a country model loaded heavy packages.")
+        self.assertLess(import_time, COUNTRY_IMPORT_TIME_BUDGET,
+                        f"Importing a country model took {import_time:.2f} seconds.")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+from emodpy_hiv.demographics.year_age_rate import YearAgeRate
+import emodpy_hiv.demographics.infer_natural_mortality as infer
+
+parent = Path(__file__).resolve().parent
+sys.path.append(str(parent))
+
+EPSILON = 0.000001
+
+
+@pytest.mark.unit
+class TestInferNaturalMortality(unittest.TestCase):
+    """
+    Verify that the natural mortality is inferred for each node and age by extrapolating
+    the log-linear trend of the data in the reference interval.
+    """
+
+    def _create_yar(self, node_to_slope):
+        # --------------------------------------------------------------------------
+        # --- The log of the rates decline linearly until 1980 and then the rates
+        # --- double to simulate the mortality due to HIV.
+        # --------------------------------------------------------------------------
+        rows = []
+        for node_id, slope in node_to_slope.items():
+            for min_year in np.arange(1950.0, 2101.0, 5.0):
+                for min_age in [0.0, 5.0, 10.0]:
+                    rate = np.exp(-3.0 - 0.1 * min_age + slope * (min_year - 1950.0))
+                    if min_year >= 1980.0:
+                        rate *= 2.0
+                    rows.append([node_id, min_year, min_age, rate])
+        return YearAgeRate(df=pd.DataFrame(rows, columns=YearAgeRate.COL_NAMES))
+
+    def test_trend_is_extrapolated(self):
+        node_to_slope = {1: -0.01, 2: -0.02}
+        raw_yar = self._create_yar(node_to_slope)
+        exp_df = raw_yar.df.copy()
+        exp_df.loc[exp_df[YearAgeRate.COL_NAME_MIN_YEAR] >= 1980.0, YearAgeRate.COL_NAME_RATE] /= 2.0
+
+        act_yar = infer.infer_natural_mortality(raw_yar, interval_fit=(1950, 1975), predict_horizon=2100.0)
+
+        self.assertListEqual([1, 2], act_yar.get_node_ids())
+        self.assertEqual(len(exp_df), len(act_yar.df))
+        for exp_rate, act_rate in zip(exp_df[YearAgeRate.COL_NAME_RATE], act_yar.df[YearAgeRate.COL_NAME_RATE]):
+            self.assertAlmostEqual(exp_rate, act_rate, delta=EPSILON)
+
+    def test_multi_node_is_same_as_single_node(self):
+        raw_yar = self._create_yar({1: -0.01, 2: -0.02, 3: 0.005})
+        multi_yar = infer.infer_natural_mortality(raw_yar, interval_fit=(1960, 1990), predict_horizon=2050.0)
+
+        for node_id in raw_yar.get_node_ids():
+            single_yar = infer.infer_natural_mortality(raw_yar.select(node_ids=[node_id]),
+                                                       interval_fit=(1960, 1990), predict_horizon=2050.0)
+            multi_df = multi_yar.select(node_ids=[node_id]).df
+            # the batched solve can differ from the single node solve in the last bits
+            pd.testing.assert_frame_equal(single_yar.df.reset_index(drop=True), multi_df.reset_index(drop=True),
+                                          check_exact=False, rtol=1e-12)
+
+        # years after the prediction horizon are removed
+        self.assertEqual(2050.0, multi_yar.df[YearAgeRate.COL_NAME_MIN_YEAR].max())
+
+    def test_no_data_in_interval(self):
+        raw_yar = self._create_yar({1: -0.01})
+        with self.assertRaises(ValueError) as context:
+            infer.infer_natural_mortality(raw_yar, interval_fit=(1901, 1904))
+        self.assertTrue("do not have data between 1901 and 1904: [1]" in str(context.exception))
+
+    def test_zero_rate_in_interval(self):
+        raw_df = self._create_yar({1: -0.01, 2: -0.02}).df.copy()
+        is_zero = ((raw_df[YearAgeRate.COL_NAME_NODE_ID] == 2) & (raw_df[YearAgeRate.COL_NAME_MIN_YEAR] == 1960.0)
+                   & (raw_df[YearAgeRate.COL_NAME_MIN_AGE] == 5.0))
+        raw_df.loc[is_zero, YearAgeRate.COL_NAME_RATE] = 0.0
+        with self.assertRaises(ValueError) as context:
+            infer.infer_natural_mortality(YearAgeRate(df=raw_df), interval_fit=(1950, 1975))
+        self.assertTrue("have rates that are not: [(2, 1960.0, 5.0)]" in str(context.exception))
+
+        # a zero rate before the interval is kept
+        inferred_yar = infer.infer_natural_mortality(YearAgeRate(df=raw_df), interval_fit=(1965, 1975))
+        self.assertEqual(0.0, inferred_yar.df.loc[is_zero, YearAgeRate.COL_NAME_RATE].item())
+
+
+if __name__ == '__main__':
+    unittest.main()
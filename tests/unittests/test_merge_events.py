@@ -0,0 +1,97 @@
+import unittest
+import pytest
+
+from emodpy_hiv.campaign.merge_events import merge_events_by_node_set
+
+
+class MockCampaign:
+    def __init__(self, events):
+        self.campaign_dict = {"Events": events}
+
+
+def create_event(node_ids, event_name="HCTTestingLoop", coordinator_class="StandardEventCoordinator",
+                 start_year=1990.0, delay=365):
+    if node_ids is None:
+        nodeset_config = {"class": "NodeSetAll"}
+    else:
+        nodeset_config = {"class": "NodeSetNodeList", "Node_List": node_ids}
+    return {
+        "class": "CampaignEventByYear",
+        "Start_Year": start_year,
+        "Event_Name": event_name,
+        "Nodeset_Config": nodeset_config,
+        "Event_Coordinator_Config": {
+            "class": coordinator_class,
+            "Intervention_Config": {"class": "HIVMuxer", "Delay_Period_Exponential": delay}
+        }
+    }
+
+
+@pytest.mark.unit
+class TestMergeEvents(unittest.TestCase):
+
+    def test_merge_events_with_same_config(self):
+        events = [create_event([1, 2]),
+                  create_event([4]),
+                  create_event([5, 6]),
+                  create_event([3], delay=100),
+                  create_event(None)]
+        campaign = MockCampaign(list(events))
+        self.assertEqual(2, merge_events_by_node_set(campaign))
+
+        merged = campaign.campaign_dict["Events"]
+        self.assertEqual(3, len(merged))
+        self.assertEqual([1, 2, 4, 5, 6], merged[0]["Nodeset_Config"]["Node_List"])
+        self.assertIs(events[3], merged[1])
+        self.assertIs(events[4], merged[2])
+
+        # the original events are not modified
+        self.assertEqual([1, 2], events[0]["Nodeset_Config"]["Node_List"])
+
+    def test_events_in_between_keep_their_order(self):
+        # merging [5, 6] into the first event would move it before the event on node 3
+        events = [create_event([1, 2]),
+                  create_event([4]),
+                  create_event([3], delay=100),
+                  create_event([5, 6]),
+                  create_event([7])]
+        campaign = MockCampaign(list(events))
+        self.assertEqual(2, merge_events_by_node_set(campaign))
+
+        merged = campaign.campaign_dict["Events"]
+        self.assertEqual([[1, 2, 4], [3], [5, 6, 7]], [event["Nodeset_Config"]["Node_List"] for event in merged])
+        self.assertIs(events[2], merged[1])
+
+    def test_overlapping_nodes_are_not_merged(self):
+        campaign = MockCampaign([create_event([1, 2]), create_event([2, 3]), create_event([4])])
+        self.assertEqual(1, merge_events_by_node_set(campaign))
+        node_lists = [event["Nodeset_Config"]["Node_List"] for event in campaign.campaign_dict["Events"]]
+        self.assertEqual([[1, 2], [2, 3, 4]], node_lists)
+
+    def test_only_safe_coordinators_are_merged(self):
+        campaign = MockCampaign([create_event([1], coordinator_class="NChooserEventCoordinatorHIV"),
+                                 create_event([2], coordinator_class="NChooserEventCoordinatorHIV")])
+        self.assertEqual(0, merge_events_by_node_set(campaign))
+
+        campaign = MockCampaign([create_event([1], coordinator_class="NChooserEventCoordinatorHIV"),
+                                 create_event([2], coordinator_class="NChooserEventCoordinatorHIV")])
+        merge_events_by_node_set(campaign, coordinator_classes=["NChooserEventCoordinatorHIV"])
+        self.assertEqual(1, len(campaign.campaign_dict["Events"]))
+
+        event = create_event([1])
+        event["Event_Coordinator_Config"]["Individual_Selection_Type"] = "TARGET_NUM_INDIVIDUALS"
+        other_event = create_event([2])
+        other_event["Event_Coordinator_Config"]["Individual_Selection_Type"] = "TARGET_NUM_INDIVIDUALS"
+        campaign = MockCampaign([event, other_event])
+        self.assertEqual(0, merge_events_by_node_set(campaign))
+
+    def test_merge_event_names(self):
+        campaign = MockCampaign([create_event([1], event_name="Loop: Lusaka"),
+                                 create_event([2], event_name="Loop: Northern")])
+        self.assertEqual(0, merge_events_by_node_set(campaign))
+        self.assertEqual(1, merge_events_by_node_set(campaign, merge_event_names=True))
+        self.assertEqual("Loop: Lusaka, Loop: Northern", campaign.campaign_dict["Events"][0]["Event_Name"])
+
+
+if __name__ == '__main__':
+    unittest.main()
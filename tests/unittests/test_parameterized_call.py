@@ -1,12 +1,55 @@
+import copy
 import unittest
 import pytest
-from emodpy_hiv.parameterized_call import ParameterizedCall
+from emodpy_hiv.parameterized_call import ParameterizedCall, ParameterizedCallMemo, apply_labeled_hyperparameters
 
 
 def dummy_function(a=1, b=2, c=3, d=4):
     return {'a': a, 'b': b, 'c': c, 'd': d}
 
 
+class MockCampaign:
+    def __init__(self):
+        self.campaign_dict = {"Events": []}
+        self.individual_events_broadcast = []
+
+
+class Unfreezable:
+    __hash__ = None
+
+    def __reduce__(self):
+        raise TypeError("cannot pickle")
+
+
+class MockDemographics:
+    birth_rate = None
+
+
+executed_events = []
+
+
+def add_event(campaign, name: str, coverage: float = 1.0):
+    executed_events.append(name)
+    campaign.campaign_dict["Events"].append({"Name": name, "Coverage": coverage})
+    campaign.individual_events_broadcast.append(name)
+
+
+def set_birth_rate(demographics, birth_rate: float = None):
+    demographics.birth_rate = birth_rate
+
+
+def set_run_number(config, Run_Number: int = None):
+    executed_events.append(Run_Number)
+    config["parameters"]["Run_Number"] = Run_Number
+
+
+def edit_parameters(config):
+    executed_events.append("edit")
+    config["parameters"]["Run_Number"] = config["parameters"]["Run_Number"]
+    config["parameters"]["Events"].append("Births")
+    del config["parameters"]["Old_Parameter"]
+
+
 @pytest.mark.unit
 class TestParameterizedCall(unittest.TestCase):
 
@@ -71,6 +114,22 @@ class TestParameterizedCall(unittest.TestCase):
         # known hp, but unknown label
         self.assertRaises(ValueError, pc.set_labeled_hyperparameter, labeled_hyperparameter='a--BADLABEL', value=0)
 
+    def test_apply_labeled_hyperparameters(self):
+        pc1 = ParameterizedCall(func=dummy_function, hyperparameters={'a': 1, 'b': 2}, label=self.label)
+        pc2 = ParameterizedCall(func=dummy_function, hyperparameters={'a': 3})
+        unused = apply_labeled_hyperparameters([pc1, pc2], {f'a--{self.label}': 10, 'a': 30, 'xyz': 0})
+        self.assertEqual(['xyz'], unused)
+        self.assertEqual({f'a--{self.label}': 10, f'b--{self.label}': 2}, pc1.labeled_hyperparameters)
+        self.assertEqual({'a': 30}, pc2.labeled_hyperparameters)
+
+        # a name used by more than one call is only an error when it is set
+        pc3 = ParameterizedCall(func=dummy_function, hyperparameters={'a': 5, 'b': 6}, label=self.label)
+        self.assertEqual([], apply_labeled_hyperparameters([pc1, pc2, pc3], {'a': 31}))
+        with self.assertRaisesRegex(ValueError, f"a--{self.label}: \\['dummy_function--{self.label}', 'dummy_function--{self.label}'\\]"):
+            apply_labeled_hyperparameters([pc1, pc2, pc3], {f'a--{self.label}': 11, 'a': 32})
+        self.assertEqual({f'a--{self.label}': 10, f'b--{self.label}': 2}, pc1.labeled_hyperparameters)
+        self.assertEqual({'a': 31}, pc2.labeled_hyperparameters)
+
     def test_verify_value_overriding_behavior(self):
         # precendence order: 1) value set on the pc, 2) value set on the pc when initializing, 3) func default
         # This is the order of precendence for passing of values to the ParameterizedCall func.
@@ -92,5 +151,108 @@ class TestParameterizedCall(unittest.TestCase):
         self.assertEqual({'a': 100, 'b': 20, 'c': 300, 'd': 4}, result)
 
 
+@pytest.mark.unit
+class TestParameterizedCallMemo(unittest.TestCase):
+
+    def setUp(self):
+        executed_events.clear()
+
+    def test_campaign_calls_are_replayed(self):
+        memo = ParameterizedCallMemo()
+        pc = ParameterizedCall(func=add_event, non_hyperparameters={'name': 'A'}, hyperparameters={'coverage': 0.5})
+        campaign1 = MockCampaign()
+        memo.execute(pc, campaign1)
+        campaign2 = MockCampaign()
+        memo.execute(pc, campaign2)
+
+        self.assertEqual(['A'], executed_events)
+        self.assertEqual(campaign1.campaign_dict, campaign2.campaign_dict)
+        self.assertEqual(['A'], campaign2.individual_events_broadcast)
+        self.assertEqual({"hits": 1, "misses": 1, "bypasses": 0, "evictions": 0, "entries": 1}, memo.get_stats())
+
+        # a different value of a hyperparameter is a different entry
+        pc.set_labeled_hyperparameter('coverage', 0.7)
+        memo.execute(pc, MockCampaign())
+        self.assertEqual(['A', 'A'], executed_events)
+        self.assertEqual(2, memo.misses)
+
+    def test_config_calls_are_replayed(self):
+        memo = ParameterizedCallMemo()
+        pc = ParameterizedCall(func=set_run_number, hyperparameters={'Run_Number': 7})
+        config1 = {"parameters": {"Run_Number": 0, "Base_Year": 1960.5}}
+        config2 = {"parameters": {"Run_Number": 0, "Base_Year": 1960.5}}
+        memo.execute(pc, config1)
+        memo.execute(pc, config2)
+        self.assertEqual([7], executed_events)
+        self.assertEqual(config1, config2)
+        self.assertEqual(1, memo.hits)
+
+    def test_config_writes_and_deletes_are_recorded(self):
+        memo = ParameterizedCallMemo()
+        pc = ParameterizedCall(func=edit_parameters)
+        config1 = {"parameters": {"Run_Number": 3, "Events": [], "Old_Parameter": 1}}
+        config2 = copy.deepcopy(config1)
+        memo.execute(pc, config1)
+        self.assertEqual({"set": {"Run_Number": 3, "Events": ["Births"]}, "deleted": ["Old_Parameter"]},
+                         list(memo._entries.values())[0])
+
+        memo.execute(pc, config2)
+        self.assertEqual(["edit"], executed_events)
+        self.assertEqual({"parameters": {"Run_Number": 3, "Events": ["Births"]}}, config2)
+        self.assertEqual(config1, config2)
+        self.assertIsNot(config1["parameters"]["Events"], config2["parameters"]["Events"])
+
+    def test_state_is_part_of_key(self):
+        memo = ParameterizedCallMemo()
+        pc = ParameterizedCall(func=set_run_number, hyperparameters={'Run_Number': 7})
+        memo.execute(pc, {"parameters": {"Run_Number": 0, "Base_Year": 1960.5}})
+        memo.execute(pc, {"parameters": {"Run_Number": 0, "Base_Year": 1970.5}})
+        self.assertEqual([7, 7], executed_events)
+
+        pc = ParameterizedCall(func=add_event, non_hyperparameters={'name': 'A'})
+        campaign = MockCampaign()
+        campaign.base_year = 1960.5
+        memo.execute(pc, campaign)
+        campaign = MockCampaign()
+        campaign.base_year = 1970.5
+        memo.execute(pc, campaign)
+        self.assertEqual([7, 7, 'A', 'A'], executed_events)
+        self.assertEqual(0, memo.hits)
+
+    def test_identity_hashed_values_are_bypassed(self):
+        pc = ParameterizedCall(func=add_event, non_hyperparameters={'name': MockDemographics()})
+        self.assertIsNone(pc.get_memo_key())
+        pc = ParameterizedCall(func=add_event, non_hyperparameters={'name': dummy_function})
+        self.assertIsNotNone(pc.get_memo_key())
+
+    def test_lru_eviction(self):
+        memo = ParameterizedCallMemo(max_entries=2)
+        calls = [ParameterizedCall(func=add_event, non_hyperparameters={'name': name}) for name in ['A', 'B', 'C']]
+        campaign = MockCampaign()
+        memo.execute(calls[0], campaign)
+        memo.execute(calls[1], campaign)
+        memo.execute(calls[0], campaign)  # A is now the most recently used
+        memo.execute(calls[2], campaign)  # evicts B
+        self.assertEqual(2, len(memo))
+        self.assertEqual(1, memo.evictions)
+
+        memo.execute(calls[0], campaign)
+        memo.execute(calls[1], campaign)
+        self.assertEqual(['A', 'B', 'C', 'B'], executed_events)
+        self.assertEqual(['A', 'B', 'A', 'C', 'A', 'B'], [event["Name"] for event in campaign.campaign_dict["Events"]])
+
+    def test_unsupported_targets_are_bypassed(self):
+        memo = ParameterizedCallMemo()
+        pc = ParameterizedCall(func=set_birth_rate, hyperparameters={'birth_rate': 0.01})
+        demographics = MockDemographics()
+        memo.execute(pc, demographics)
+        self.assertEqual(0.01, demographics.birth_rate)
+        pc = ParameterizedCall(func=add_event, non_hyperparameters={'name': Unfreezable()})
+        self.assertIsNone(pc.get_memo_key())
+        self.assertEqual(1, memo.bypasses)
+        self.assertEqual(0, len(memo))
+        self.assertRaises(ValueError, ParameterizedCallMemo, max_entries=0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,132 @@
+import json
+import statistics
+import time
+import unittest
+import pytest
+from pathlib import Path
+import sys
+
+from emod_api import campaign as api_campaign
+from emod_api import schema_to_class as s2c
+
+from emodpy_hiv.countries.zambia import Zambia
+from emodpy_hiv.campaign.profiling import CampaignProfiler
+from emodpy_hiv.campaign.schema_templates import get_schema_template_cache, schema_template_cache
+
+manifest_directory = Path(__file__).resolve().parent.parent
+sys.path.append(str(manifest_directory))
+import manifest
+import helpers
+
+
+def build_zambia_campaign_json(filename: Path, use_schema_template_cache: bool) -> dict:
+    class ZambiaForTest(Zambia):
+        pass
+    ZambiaForTest.use_schema_template_cache = use_schema_template_cache
+
+    api_campaign.schema_path = manifest.schema_path
+    campaign = ZambiaForTest.build_campaign(campaign=api_campaign)
+    campaign.save(filename)
+    with open(filename, "r") as file:
+        return json.load(file)
+
+
+@pytest.mark.unit
+class TestSchemaTemplateCache(unittest.TestCase):
+    def setUp(self):
+        print(f"running test: {self._testMethodName}")
+        get_schema_template_cache().clear()
+        api_campaign.set_schema(manifest.schema_path)
+
+    def tearDown(self):
+        api_campaign.schema_path = manifest.schema_path
+
+    def test_clones_are_independent(self):
+        get_class_with_defaults = s2c.get_class_with_defaults
+        with schema_template_cache() as cache:
+            first = s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+            misses = cache.misses
+            second = s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+            self.assertEqual(misses, cache.misses)
+            self.assertEqual(1, cache.hits)
+        self.assertIs(get_class_with_defaults, s2c.get_class_with_defaults)
+
+        expected = get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+        self.assertIsInstance(second, s2c.ReadOnlyDict)
+        self.assertIs(first["schema"], second["schema"])
+
+        second.Muxer_Name = "changed"
+        self.assertNotEqual(first["Muxer_Name"], second["Muxer_Name"])
+        self.assertNotIn("explicits", first)
+
+    def test_schema_path_change_drops_templates(self):
+        with schema_template_cache() as cache:
+            s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+            self.assertGreater(len(cache), 0)
+            api_campaign.schema_path = "another_schema.json"
+            s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+            self.assertEqual(0, cache.hits)
+
+    def test_other_schemas_are_passed_through(self):
+        with open(manifest.schema_path, "r") as file:
+            other_schema = json.load(file)
+        with schema_template_cache() as cache:
+            s2c.get_class_with_defaults("HIVMuxer", schema_json=other_schema)
+            self.assertEqual(0, len(cache))
+
+    def test_profiler_and_cache_share_one_hook(self):
+        get_class_with_defaults = s2c.get_class_with_defaults
+        profiler = CampaignProfiler()
+        cache_block = schema_template_cache()
+        profiler.__enter__()
+        cache = cache_block.__enter__()
+        s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+        s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+
+        # the blocks do not have to end in the reverse order they started
+        profiler.__exit__(None, None, None)
+        self.assertIsNot(get_class_with_defaults, s2c.get_class_with_defaults)
+        s2c.get_class_with_defaults("HIVMuxer", schema_json=api_campaign.get_schema())
+        cache_block.__exit__(None, None, None)
+        self.assertIs(get_class_with_defaults, s2c.get_class_with_defaults)
+
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(cache.misses, profiler._schema_lookups)
+
+    def test_zambia_campaign_is_unchanged(self):
+        filename_cached = Path(__file__).parent.joinpath("outputs", "zambia_campaign_cached.json")
+        filename_uncached = Path(__file__).parent.joinpath("outputs", "zambia_campaign_uncached.json")
+        self.assertDictEqual(build_zambia_campaign_json(filename_uncached, use_schema_template_cache=False),
+                             build_zambia_campaign_json(filename_cached, use_schema_template_cache=True))
+        helpers.delete_existing_file(filename_cached)
+        helpers.delete_existing_file(filename_uncached)
+
+
+@pytest.mark.benchmark
+class TestSchemaTemplateCacheBenchmark(unittest.TestCase):
+    """
+    Time Zambia.build_campaign with and without the template cache.  The median times are only
+    printed so they can be seen with 'pytest -s -m benchmark'.
+    """
+
+    def time_build(self, filename, use_schema_template_cache, num_repeats=5):
+        times = []
+        for _ in range(num_repeats):
+            get_schema_template_cache().clear()
+            start = time.perf_counter()
+            build_zambia_campaign_json(filename, use_schema_template_cache=use_schema_template_cache)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    def test_zambia_build_campaign(self):
+        filename = Path(__file__).parent.joinpath("outputs", "zambia_campaign_benchmark.json")
+        uncached_time = self.time_build(filename, use_schema_template_cache=False)
+        cached_time = self.time_build(filename, use_schema_template_cache=True)
+        print(f"Zambia.build_campaign: {uncached_time:.3f}s without the template cache, {cached_time:.3f}s with it")
+        helpers.delete_existing_file(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import gzip
+import json
+import unittest
+import pytest
+from pathlib import Path
+import sys
+
+from emodpy_hiv.campaign.streaming_writer import StreamingCampaignWriter
+
+manifest_directory = Path(__file__).resolve().parent.parent
+sys.path.append(str(manifest_directory))
+import helpers
+
+
+class MockCampaign:
+    def __init__(self, campaign_dict=None):
+        self.campaign_dict = {"Events": [], "Use_Defaults": 1} if campaign_dict is None else campaign_dict
+
+    def add(self, event, note=None):
+        if note is not None:
+            event["Note"] = note
+        self.campaign_dict["Events"].append(event)
+
+    def save(self, filename):
+        with open(filename, "w") as file:
+            json.dump(self.campaign_dict, file, sort_keys=True, indent=4)
+
+
+def create_event(index):
+    return {
+        "class": "CampaignEventByYear",
+        "Start_Year": 1990.0 + index,
+        "Nodeset_Config": {"class": "NodeSetNodeList", "Node_List": [index, index + 1]},
+        "Event_Coordinator_Config": {
+            "class": "NChooserEventCoordinatorHIV",
+            "Distributions": [{"Age_Ranges_Years": [{"Min": 15, "Max": 49.999}], "Num_Targeted": []}],
+            "Intervention_Config": {"class": "MaleCircumcision", "Intervention_Name": "VMMC é"}
+        }
+    }
+
+
+@pytest.mark.unit
+class TestStreamingCampaignWriter(unittest.TestCase):
+    def setUp(self):
+        print(f"running test: {self._testMethodName}")
+        self.output_dir = Path(__file__).parent.joinpath("outputs")
+        self.output_dir.mkdir(exist_ok=True)
+
+    def save_and_stream(self, campaign_dict, events, **kwargs):
+        expected_filename = self.output_dir.joinpath(f"{self._testMethodName}_expected.json")
+        expected_campaign = MockCampaign(json.loads(json.dumps(campaign_dict)))
+        for event in events:
+            expected_campaign.add(event)
+        expected_campaign.save(expected_filename)
+        with open(expected_filename, "rb") as file:
+            expected = file.read()
+        helpers.delete_existing_file(expected_filename)
+
+        filename = self.output_dir.joinpath(f"{self._testMethodName}.json")
+        campaign = MockCampaign(campaign_dict)
+        with StreamingCampaignWriter(campaign, filename, **kwargs) as writer:
+            for event in events:
+                campaign.add(event)
+        self.assertEqual(len(events), writer.num_events_written)
+        return expected, campaign, filename
+
+    def test_same_bytes_as_save(self):
+        events = [create_event(index) for index in range(5)]
+        expected, campaign, filename = self.save_and_stream({"Events": [], "Use_Defaults": 1}, events)
+        with open(filename, "rb") as file:
+            self.assertEqual(expected, file.read())
+        self.assertEqual([], campaign.campaign_dict["Events"])
+        helpers.delete_existing_file(filename)
+
+    def test_no_events_and_other_keys(self):
+        campaign_dict = {"Campaign_Name": "Test", "Events": [], "Use_Defaults": 1}
+        expected, _, filename = self.save_and_stream(campaign_dict, [])
+        with open(filename, "rb") as file:
+            self.assertEqual(expected, file.read())
+        helpers.delete_existing_file(filename)
+
+    def test_compressed_and_kept_events(self):
+        events = [create_event(index) for index in range(3)]
+        expected, campaign, filename = self.save_and_stream({"Events": [], "Use_Defaults": 1}, events,
+                                                            compress=True, keep_events=True)
+        with gzip.open(filename, "rb") as file:
+            self.assertEqual(expected, file.read())
+        self.assertEqual(events, campaign.campaign_dict["Events"])
+        self.assertEqual("add", campaign.add.__name__)
+        helpers.delete_existing_file(filename)
+
+    def test_exception_deletes_the_file(self):
+        filename = self.output_dir.joinpath(f"{self._testMethodName}.json")
+        campaign = MockCampaign()
+        with self.assertRaises(RuntimeError):
+            with StreamingCampaignWriter(campaign, filename):
+                campaign.add(create_event(0))
+                raise RuntimeError("building the campaign failed")
+        self.assertFalse(filename.exists())
+        self.assertEqual("add", campaign.add.__name__)
+
+        # the campaign cannot be completed when a key before the events was added
+        with self.assertRaises(ValueError):
+            with StreamingCampaignWriter(campaign, filename):
+                campaign.add(create_event(0))
+                campaign.campaign_dict["Campaign_Name"] = "Test"
+        self.assertFalse(filename.exists())
+        self.assertEqual("add", campaign.add.__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
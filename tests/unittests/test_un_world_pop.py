@@ -257,6 +257,40 @@ class TestUnWorldPop(unittest.TestCase):
         exp_df = pd.read_csv(exp_fn)
         self.assertTrue(all(act_yar.df == exp_df))
 
+    def test_extract_for_countries(self):
+        country = "Zambia"
+        version = "2015"
+        years = [1950, 1960]
+
+        country_to_data = unwp.extract_for_countries([country], version, years=years)
+        self.assertListEqual([country], list(country_to_data.keys()))
+        data = country_to_data[country]
+
+        for year in years:
+            exp_total_pop, exp_yar = unwp.extract_population_by_age_and_distribution(country, version, year=year)
+            act_total_pop, act_yar = data["age_distributions"][year]
+            self.assertEqual(exp_total_pop, act_total_pop)
+            self.assertEqual(exp_yar.df.to_csv(index=False), act_yar.df.to_csv(index=False))
+
+        exp_yar = unwp.extract_fertility(country, version)
+        self.assertEqual(exp_yar.df.to_csv(index=False), data["fertility"].df.to_csv(index=False))
+
+        self.assertListEqual(["male", "female"], list(data["mortality"].keys()))
+        for gender in ["male", "female"]:
+            exp_yar = unwp.extract_mortality(country, version, gender=gender)
+            self.assertEqual(exp_yar.df.to_csv(index=False), data["mortality"][gender].df.to_csv(index=False))
+
+    def test_error_handling_extract_for_countries(self):
+        with self.assertRaises(ValueError) as context:
+            unwp.extract_for_countries(["Zambia", "XXXXXXXX"], "2015")
+        self.assertTrue("'country'= 'XXXXXXXX' is not supported." in str(context.exception),
+                        msg=str(context.exception))
+
+        with self.assertRaises(ValueError) as context:
+            unwp.extract_for_countries(["Zambia"], "2015", genders=["XXXXXXXX"])
+        self.assertTrue("'gender'= 'XXXXXXXX' is not supported.\nOnly 'male' and 'female' are supported." in str(context.exception),
+                        msg=str(context.exception))
+
     def test_error_handling_extract_population_by_age(self):
         with self.assertRaises(ValueError) as context:
             df = unwp.extract_population_by_age(country="XXXXXXXX", version="2012", years=[1960, 1961, 1962], filename=None)
@@ -0,0 +1,173 @@
+import json
+import shutil
+import tempfile
+import unittest
+import pytest
+from pathlib import Path
+from unittest import mock
+import sys
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.demographics.un_world_pop as unwp
+import emodpy_hiv.demographics.un_world_pop_bundle as un_bundle
+import emodpy_hiv.demographics.un_world_pop_cache as un_cache
+
+parent = Path(__file__).resolve().parent
+sys.path.append(str(parent))
+
+
+@pytest.mark.unit
+class TestUnWorldPopBundle(unittest.TestCase):
+    """
+    Verify that the data read from the bundle of the packaged UN World Pop files is the same
+    as the data read from the workbooks.  Only the 2015 workbooks are included in the package.
+    """
+
+    def setUp(self):
+        self.orig_cache_dir = un_cache._cache_dir
+        un_cache.set_cache_dir(None)
+        self.data_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        un_cache._cache_dir = self.orig_cache_dir
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_packaged_2015_files_are_bundled(self):
+        self.assertTrue(un_bundle.contains(unwp._get_population_filename(version="2015")))
+        self.assertTrue(un_bundle.contains(unwp._get_fertility_filename(version="2015")))
+        for gender in unwp.KNOWN_GENDERS:
+            self.assertTrue(un_bundle.contains(unwp._get_mortality_filename(version="2015", gender=gender)))
+
+        fert_fn = unwp._get_fertility_filename(version="2015")
+        self.assertTrue(un_bundle.contains(fert_fn, "ESTIMATES"))
+        self.assertFalse(un_bundle.contains(fert_fn, "NOTES"))
+
+    def test_user_file_is_not_bundled(self):
+        src_fn = unwp._get_fertility_filename(version="2015")
+        copy_fn = self.data_dir.joinpath(src_fn.name)
+        shutil.copyfile(src_fn, copy_fn)
+        self.assertFalse(un_bundle.contains(copy_fn))
+        self.assertFalse(un_bundle.contains(copy_fn, "ESTIMATES"))
+
+    def test_sheets_are_the_same_as_excel(self):
+        fert_fn = unwp._get_fertility_filename(version="2015")
+        mort_fn = unwp._get_mortality_filename(version="2015", gender="female")
+        for filename, sheet in [(fert_fn, "ESTIMATES"), (mort_fn, "MEDIUM 2050-2100")]:
+            exp_df = pd.read_excel(filename, sheet_name=sheet, skiprows=16, engine="calamine")
+            cols = exp_df.columns.tolist()
+
+            act_df = un_bundle.read_sheet(filename, sheet, cols)
+            pd.testing.assert_frame_equal(exp_df, act_df, check_exact=True)
+
+            # a subset of the columns for one country keeps the index of the rows in the sheet
+            country_col = cols[2]
+            sub_cols = [country_col] + cols[5:]
+            act_df = un_bundle.read_sheet(filename, sheet, sub_cols, countries=["Zambia"])
+            exp_df = exp_df[exp_df[country_col] == "Zambia"][sub_cols]
+            pd.testing.assert_frame_equal(exp_df, act_df, check_exact=True)
+
+    def test_missing_column(self):
+        fert_fn = unwp._get_fertility_filename(version="2015")
+        with self.assertRaises(ValueError) as context:
+            un_bundle.read_sheet(fert_fn, "ESTIMATES", ["not_a_column"])
+        self.assertTrue("does not have the columns" in str(context.exception))
+
+    def test_extraction_does_not_read_excel(self):
+        with mock.patch.object(un_cache, "read_excel", side_effect=AssertionError("Excel was read")):
+            fert_yar = unwp.extract_fertility(country="Zambia", version="2015")
+            mort_yar = unwp.extract_mortality(country="Zambia", version="2015", gender="male")
+            pop_df = unwp.extract_population_by_age(country="Zambia", version="2015", years=[1960, 2020])
+
+        # ---------------------------------------------------------------------------
+        # --- Copies of the workbooks are read from Excel and must give the same data
+        # ---------------------------------------------------------------------------
+        copy_fns = {}
+        for src_fn in [unwp._get_fertility_filename(version="2015"),
+                       unwp._get_mortality_filename(version="2015", gender="male"),
+                       unwp._get_population_filename(version="2015")]:
+            copy_fns[src_fn.name] = self.data_dir.joinpath(src_fn.name)
+            shutil.copyfile(src_fn, copy_fns[src_fn.name])
+        exp_fert_yar = unwp.extract_fertility(country="Zambia", version="2015",
+                                              filename=copy_fns[unwp.FERTILITY_FILES["2015"]])
+        exp_mort_yar = unwp.extract_mortality(country="Zambia", version="2015", gender="male",
+                                              filename=copy_fns[unwp.MORTALITY_FILES["2015"]["male"]])
+        exp_pop_df = unwp.extract_population_by_age(country="Zambia", version="2015", years=[1960, 2020],
+                                                    filename=copy_fns[unwp.POPULATION_FILES["2015"]])
+
+        pd.testing.assert_frame_equal(exp_fert_yar.df, fert_yar.df, check_exact=True)
+        pd.testing.assert_frame_equal(exp_mort_yar.df, mort_yar.df, check_exact=True)
+        pd.testing.assert_frame_equal(exp_pop_df, pop_df, check_exact=True)
+
+    def test_unknown_country(self):
+        with self.assertRaises(ValueError) as context:
+            unwp.extract_fertility(country="Narnia", version="2015")
+        self.assertTrue("'country'= 'Narnia' is not supported." in str(context.exception))
+
+    def _copy_packaged_data(self):
+        # A copy of the bundle and of the workbooks it was built from that acts as the packaged data
+        shutil.copyfile(un_bundle.get_bundle_filename(), self.data_dir.joinpath(un_bundle.BUNDLE_FILENAME))
+        for version_files in [unwp.FERTILITY_FILES, unwp.POPULATION_FILES]:
+            shutil.copyfile(unwp._get_fertility_filename(version="2015").parent.joinpath(version_files["2015"]),
+                            self.data_dir.joinpath(version_files["2015"]))
+        return self.data_dir.joinpath(unwp.FERTILITY_FILES["2015"]), self.data_dir.joinpath(unwp.POPULATION_FILES["2015"])
+
+    def test_changed_workbook_is_not_read_from_bundle(self):
+        fert_fn, pop_fn = self._copy_packaged_data()
+        bundle_fn = self.data_dir.joinpath(un_bundle.BUNDLE_FILENAME)
+        with mock.patch.object(un_bundle, "get_bundle_filename", return_value=bundle_fn):
+            with mock.patch.object(un_bundle, "_bundle", None):
+                self.assertTrue(un_bundle.contains(fert_fn))
+                self.assertTrue(un_bundle.contains(pop_fn, "ESTIMATES"))
+
+                # same size, different content
+                data = bytearray(fert_fn.read_bytes())
+                data[-1] = (data[-1] + 1) % 256
+                fert_fn.write_bytes(bytes(data))
+                self.assertFalse(un_bundle.contains(fert_fn))
+                self.assertFalse(un_bundle.contains(fert_fn, "ESTIMATES"))
+
+                # a workbook that is not installed can only be read from the bundle
+                pop_fn.unlink()
+                self.assertTrue(un_bundle.contains(pop_fn, "ESTIMATES"))
+
+    def test_columns_are_decompressed_once(self):
+        fert_fn = unwp._get_fertility_filename(version="2015")
+        cols = ["Major area, region, country or area *", "15-19"]
+        exp_df = un_bundle.read_sheet(fert_fn, "ESTIMATES", cols, countries=["Zambia"])
+        _, _, arrays = un_bundle._load_bundle()
+        with mock.patch.object(arrays, "_npz", side_effect=AssertionError("The npz file was read")):
+            act_df = un_bundle.read_sheet(fert_fn, "ESTIMATES", cols[1:], countries=["Zambia"])
+        pd.testing.assert_frame_equal(exp_df[cols[1:]], act_df)
+
+    def test_forked_process_opens_its_own_bundle(self):
+        fert_fn = unwp._get_fertility_filename(version="2015")
+        self.assertTrue(un_bundle.contains(fert_fn))
+        parent_arrays = un_bundle._load_bundle()[2]
+        with mock.patch.object(un_bundle.os, "getpid", return_value=-1):
+            child_arrays = un_bundle._load_bundle()[2]
+            self.assertIsNot(parent_arrays, child_arrays)
+            self.assertIs(child_arrays, un_bundle._load_bundle()[2])
+            self.assertTrue(un_bundle.contains(fert_fn, "ESTIMATES"))
+        un_bundle._bundle = None
+
+    def test_build_bundle(self):
+        bundle_fn = un_bundle.build_bundle(self.data_dir.joinpath("test_bundle.npz"))
+        with np.load(bundle_fn, allow_pickle=False) as npz:
+            index = json.loads(str(npz["index"]))
+            packaged_index = json.loads(str(np.load(un_bundle.get_bundle_filename(), allow_pickle=False)["index"]))
+
+            self.assertEqual(un_bundle.BUNDLE_FORMAT_VERSION, index["format_version"])
+            self.assertEqual(packaged_index, index)
+            self.assertEqual(un_bundle._hash_file(unwp._get_fertility_filename(version="2015")),
+                             index["sources"][unwp.FERTILITY_FILES["2015"]]["sha256"])
+
+            table = index["workbooks"][unwp.FERTILITY_FILES["2015"]]["ESTIMATES"]
+            offsets = table["offsets"]
+            self.assertEqual(len(table["countries"]) + 1, len(offsets))
+            self.assertEqual(len(npz[f"{table['key']}_row_index"]), offsets[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+from unittest import mock
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+import emodpy_hiv.demographics.infer_natural_mortality as infer
+import emodpy_hiv.demographics.un_world_pop as unwp
+import emodpy_hiv.demographics.un_world_pop_cache as un_cache
+
+parent = Path(__file__).resolve().parent
+sys.path.append(str(parent))
+
+
+@pytest.mark.unit
+class TestUnWorldPopCache(unittest.TestCase):
+    """
+    Verify that the sheets parsed from the UN World Pop files are cached on disk and
+    that the cached data is the same as the data read directly from the file.
+    The 2015 files are used because they are included in the package.  They are copied
+    so that they are read as user-supplied files and not from the bundle.
+    """
+
+    def setUp(self):
+        self.orig_cache_dir = un_cache._cache_dir
+        self.cache_dir = Path(tempfile.mkdtemp())
+        un_cache.set_cache_dir(self.cache_dir)
+
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.fert_fn = self._copy(unwp._get_fertility_filename(version="2015"))
+
+    def tearDown(self):
+        un_cache._cache_dir = self.orig_cache_dir
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _copy(self, src_fn):
+        copy_fn = self.data_dir.joinpath(src_fn.name)
+        shutil.copyfile(src_fn, copy_fn)
+        return copy_fn
+
+    def _num_entries(self):
+        return len(list(self.cache_dir.glob("*.npz")))
+
+    def test_cached_extraction_is_the_same(self):
+        un_cache.set_cache_dir(None)
+        exp_yar = unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+
+        un_cache.set_cache_dir(self.cache_dir)
+        first_yar = unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        self.assertEqual(2, self._num_entries())  # estimates and medium variant sheets
+
+        second_yar = unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        self.assertEqual(2, self._num_entries())
+
+        self.assertEqual(exp_yar.df.to_csv(index=False), first_yar.df.to_csv(index=False))
+        self.assertEqual(exp_yar.df.to_csv(index=False), second_yar.df.to_csv(index=False))
+
+    def test_entry_shared_across_functions(self):
+        pop_fn = self._copy(unwp._get_population_filename(version="2015"))
+        unwp.extract_population_by_age_and_distribution(country="Zambia", version="2015", year=1960, filename=pop_fn)
+        self.assertEqual(1, self._num_entries())
+
+        # reuses the estimates entry and adds one for the medium variant sheet
+        unwp.extract_population_by_age(country="Zambia", version="2015", years=[1960, 2020], filename=pop_fn)
+        self.assertEqual(2, self._num_entries())
+
+    def test_modified_file_creates_new_entry(self):
+        copy_fn = self._copy(unwp._get_mortality_filename(version="2015", gender="male"))
+
+        unwp.extract_mortality(country="Zambia", version="2015", filename=copy_fn)
+        num_entries = self._num_entries()
+        self.assertEqual(3, num_entries)
+
+        stat = copy_fn.stat()
+        os.utime(copy_fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        unwp.extract_mortality(country="Zambia", version="2015", filename=copy_fn)
+        self.assertEqual(2 * num_entries, self._num_entries())
+
+    def test_corrupt_entry_is_replaced(self):
+        exp_yar = unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        for entry in self.cache_dir.glob("*.npz"):
+            entry.write_bytes(b"not an npz file")
+
+        act_yar = unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        self.assertEqual(exp_yar.df.to_csv(index=False), act_yar.df.to_csv(index=False))
+
+    def test_clear_cache(self):
+        unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        self.assertEqual(2, un_cache.clear_cache())
+        self.assertEqual(0, self._num_entries())
+
+    def test_disabled_cache(self):
+        un_cache.set_cache_dir(None)
+        self.assertIsNone(un_cache.get_cache_dir())
+        unwp.extract_fertility(country="Zambia", version="2015", filename=self.fert_fn)
+        self.assertEqual(0, self._num_entries())
+
+    def test_cache_is_opt_in(self):
+        un_cache._cache_dir = un_cache._NOT_SET
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertIsNone(un_cache.get_cache_dir())
+        with mock.patch.dict(os.environ, {un_cache.CACHE_DIR_ENV_VAR: str(self.cache_dir)}):
+            self.assertEqual(self.cache_dir.joinpath(un_cache.CACHE_SUB_DIR), un_cache.get_cache_dir())
+
+    def test_entries_are_not_pickled(self):
+        pop_fn = self._copy(unwp._get_population_filename(version="2015"))
+        unwp.extract_population_by_age(country="Zambia", version="2015", years=[1960, 2020], filename=pop_fn)
+        self.assertEqual(2, self._num_entries())
+        for entry in self.cache_dir.glob("*.npz"):
+            # the sheets have columns with numbers and strings like '…'
+            self.assertIsNotNone(un_cache._read_entry(entry))
+            with np.load(entry, allow_pickle=False) as npz:
+                self.assertTrue(all(npz[name].dtype != object for name in npz.files))
+
+        usecols = ["Major area, region, country or area *", "Reference date (as of 1 July)", "80+"]
+        un_cache.set_cache_dir(None)
+        exp_df = un_cache.read_excel(pop_fn, "ESTIMATES", skiprows=16, usecols=usecols)
+        un_cache.set_cache_dir(self.cache_dir)
+        un_cache.read_excel(pop_fn, "ESTIMATES", skiprows=16, usecols=usecols)
+        act_df = un_cache.read_excel(pop_fn, "ESTIMATES", skiprows=16, usecols=usecols)
+        pd.testing.assert_frame_equal(exp_df, act_df)
+        self.assertEqual([type(v) for v in exp_df["80+"]], [type(v) for v in act_df["80+"]])
+
+    def test_source_hash(self):
+        exp_hash = un_cache.get_source_hash([self.fert_fn])
+        self.assertEqual(exp_hash, un_cache.get_source_hash([self.fert_fn]))
+        self.assertNotEqual(exp_hash, un_cache.get_source_hash([unwp._get_fertility_filename(version="2015")]))
+
+        data = bytearray(self.fert_fn.read_bytes())
+        data[-1] = (data[-1] + 1) % 256
+        self.fert_fn.write_bytes(bytes(data))
+        stat = self.fert_fn.stat()
+        os.utime(self.fert_fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertNotEqual(exp_hash, un_cache.get_source_hash([self.fert_fn]))
+
+    def test_save_and_load_entry(self):
+        key_items = ["test_entry", "Zambia", "2015"]
+        self.assertIsNone(un_cache.load_entry(key_items))
+
+        yar = unwp.extract_fertility(country="Zambia", version="2015")
+        un_cache.save_entry(key_items, {"fertility": yar.df})
+        self.assertEqual(1, self._num_entries())
+
+        act_df = un_cache.load_entry(key_items)["fertility"]
+        pd.testing.assert_frame_equal(yar.df, act_df)
+        self.assertIsNone(un_cache.load_entry(key_items + ["other"]))
+
+        for entry in self.cache_dir.glob("*.npz"):
+            entry.write_bytes(b"not an npz file")
+        self.assertIsNone(un_cache.load_entry(key_items))
+
+        # data that cannot be saved without pickling it is not saved
+        un_cache.save_entry(key_items + ["objects"], {"objects": pd.DataFrame({"a": [{"b": 1}]})})
+        self.assertIsNone(un_cache.load_entry(key_items + ["objects"]))
+
+    def test_zambia_demographics_inputs_are_shared(self):
+        from emodpy_hiv.countries.zambia import Zambia
+
+        class ZambiaFirstProcess(Zambia):
+            pass
+
+        class ZambiaSecondProcess(Zambia):
+            pass
+
+        # -------------------------------------------------------------------------------
+        # --- The subclasses have their own in-process cache so the second one acts like
+        # --- another process that loads the inputs from the cache directory.
+        # -------------------------------------------------------------------------------
+        ZambiaFirstProcess._initial_demog_inputs = None
+        ZambiaSecondProcess._initial_demog_inputs = None
+        exp_inputs = ZambiaFirstProcess._get_demographics_inputs()
+        num_entries = self._num_entries()
+        self.assertGreater(num_entries, 0)
+
+        with mock.patch.object(ZambiaSecondProcess, "_read_demographics_inputs",
+                               side_effect=AssertionError("The inputs were read again")):
+            act_inputs = ZambiaSecondProcess._get_demographics_inputs()
+        self.assertEqual(num_entries, self._num_entries())
+        for name, exp_yar in exp_inputs.items():
+            self.assertEqual(exp_yar.df.to_csv(index=False), act_inputs[name].df.to_csv(index=False))
+
+        # a change to the WPP data or to the inference algorithm gives a new entry
+        ZambiaSecondProcess._initial_demog_inputs = None
+        with mock.patch.object(un_cache, "get_source_hash", return_value="other data"):
+            ZambiaSecondProcess._get_demographics_inputs()
+        self.assertEqual(num_entries + 1, self._num_entries())
+        ZambiaSecondProcess._initial_demog_inputs = None
+        with mock.patch.object(infer, "ALGORITHM_VERSION", infer.ALGORITHM_VERSION + 1):
+            ZambiaSecondProcess._get_demographics_inputs()
+        self.assertEqual(num_entries + 2, self._num_entries())
+
+        # each call creates a new demographics object
+        demog_1 = ZambiaSecondProcess.initialize_demographics()
+        demog_2 = ZambiaSecondProcess.initialize_demographics()
+        self.assertIsNot(demog_1, demog_2)
+        self.assertEqual(demog_1.to_dict(), demog_2.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
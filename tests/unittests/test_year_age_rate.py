@@ -3,6 +3,8 @@ import pytest
 from pathlib import Path
 import sys
 
+import pandas as pd
+
 from emodpy_hiv.demographics.year_age_rate import YearAgeRate
 
 parent = Path(__file__).resolve().parent
@@ -320,6 +322,121 @@ class TestYearAgeRate(unittest.TestCase):
         self.assertEqual(44, len(mort_dist_2.mortality_rate_matrix)) # one for each age
         self.assertEqual(302, len(mort_dist_2.mortality_rate_matrix[0])) # one for each year - count year 2100-2101
 
+    def _create_df(self, node_ids, min_years, min_ages):
+        rows = [[node_id, min_year, min_age, 0.1] for node_id in node_ids for min_year in min_years for min_age in min_ages]
+        return pd.DataFrame(rows, columns=YearAgeRate.COL_NAMES)
+
+    def test_validate_duplicate_min_ages(self):
+        df = self._create_df([1, 2], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        df = pd.concat([df, df[(df[YearAgeRate.COL_NAME_NODE_ID] == 2) & (df[YearAgeRate.COL_NAME_MIN_YEAR] == 1955.0)].head(1)])
+        with self.assertRaises(ValueError) as context:
+            YearAgeRate(df=df)
+        self.assertEqual("Invalid duplicate number of entries for min_age for node_id=2 and min_year=1955.0.\n"
+                         "min_ages=[0.0, 5.0, 10.0, 0.0]", str(context.exception))
+
+    def test_validate_number_of_min_ages(self):
+        df = self._create_df([1, 2], [1950.0, 1955.0, 1960.0], [0.0, 5.0, 10.0])
+        df = df[~((df[YearAgeRate.COL_NAME_NODE_ID] == 1) &
+                  (df[YearAgeRate.COL_NAME_MIN_YEAR] == 1960.0) &
+                  (df[YearAgeRate.COL_NAME_MIN_AGE] == 5.0))]
+        with self.assertRaises(ValueError) as context:
+            YearAgeRate(df=df)
+        self.assertEqual("Invalid number of min_ages for min_year=1960.0.\n"
+                         "Number of min_ages=3 for min_year=1950.0.\n"
+                         "Number of min_ages=2 for min_year=1960.0.", str(context.exception))
+
+    def test_validate_set_of_min_ages(self):
+        df = self._create_df([1, 2], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        df.loc[(df[YearAgeRate.COL_NAME_NODE_ID] == 2) &
+               (df[YearAgeRate.COL_NAME_MIN_YEAR] == 1955.0) &
+               (df[YearAgeRate.COL_NAME_MIN_AGE] == 10.0), YearAgeRate.COL_NAME_MIN_AGE] = 15.0
+        with self.assertRaises(ValueError) as context:
+            YearAgeRate(df=df)
+        self.assertTrue("Inconsistent set of min_ages for min_year=1955.0." in str(context.exception))
+
+    def test_validate_nodes_with_different_years_and_ages(self):
+        df_1 = self._create_df([1], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        df_2 = self._create_df([2], [1960.0, 1970.0, 1980.0], [0.0, 15.0])
+        yar = YearAgeRate(df=pd.concat([df_2, df_1]))
+        self.assertEqual(len(df_1) + len(df_2), len(yar.df))
+
+    def test_select(self):
+        df_1 = self._create_df([1], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        df_2 = self._create_df([2], [1955.0, 1960.0], [0.0, 15.0])
+        yar = YearAgeRate(df=pd.concat([df_1, df_2]))
+        self.assertListEqual([1, 2], yar.get_node_ids())
+
+        node_yar = yar.select(node_ids=[2])
+        self.assertListEqual([2], node_yar.get_node_ids())
+        self.assertEqual(df_2.to_csv(index=False), node_yar.df.to_csv(index=False))
+
+        year_yar = yar.select(min_years=[1950.0])
+        self.assertListEqual([1], year_yar.get_node_ids())
+        self.assertEqual(1, len(year_yar.to_age_distributions()))
+
+        year_yar = yar.select(min_years=[1955.0])
+        self.assertListEqual([1, 2], year_yar.get_node_ids())
+        self.assertListEqual([1955.0], year_yar.df[YearAgeRate.COL_NAME_MIN_YEAR].unique().tolist())
+        self.assertEqual(5, len(year_yar.df))
+
+        with self.assertRaises(ValueError) as context:
+            yar.select(node_ids=[3])
+        self.assertTrue("node_ids are not in the YearAgeRate data: [3]" in str(context.exception))
+
+    def test_scale_and_blend(self):
+        df = self._create_df([1, 2], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        yar = YearAgeRate(df=df)
+
+        scaled_yar = yar.scale(4.0)
+        self.assertListEqual([0.4] * len(df), scaled_yar.df[YearAgeRate.COL_NAME_RATE].tolist())
+        self.assertListEqual([0.1] * len(df), yar.df[YearAgeRate.COL_NAME_RATE].tolist())
+
+        blended_yar = yar.blend(scaled_yar, 0.5)
+        for rate in blended_yar.df[YearAgeRate.COL_NAME_RATE].tolist():
+            self.assertAlmostEqual(0.25, rate, delta=EPSILON)
+
+        with self.assertRaises(ValueError) as context:
+            yar.blend(yar.select(node_ids=[1]), 0.5)
+        self.assertTrue("cannot be blended" in str(context.exception))
+
+    def test_df_changes(self):
+        df = self._create_df([1, 2], [1950.0, 1955.0], [0.0, 5.0, 10.0])
+        yar = YearAgeRate(df=df)
+
+        # changing the returned dataframe raises an error and does not change the object
+        with self.assertRaises(TypeError):
+            yar.df[YearAgeRate.COL_NAME_RATE] = 0.5
+        with self.assertRaises(TypeError):
+            yar.df.loc[0, YearAgeRate.COL_NAME_RATE] = 0.7
+        with self.assertRaises(TypeError):
+            yar.df.iat[0, 3] = 0.7
+        with self.assertRaises(TypeError):
+            del yar.df[YearAgeRate.COL_NAME_RATE]
+        self.assertEqual(0.1, yar.df.loc[0, YearAgeRate.COL_NAME_RATE])
+        self.assertListEqual([0.1] * len(df), yar.df[YearAgeRate.COL_NAME_RATE].tolist())
+        self.assertListEqual([0.2] * len(df), yar.scale(2.0).df[YearAgeRate.COL_NAME_RATE].tolist())
+
+        # assigning a changed copy validates it and updates the arrays
+        new_df = yar.df.copy()
+        new_df[YearAgeRate.COL_NAME_RATE] = 0.5
+        yar.df = new_df[new_df[YearAgeRate.COL_NAME_NODE_ID] == 2]
+        self.assertListEqual([2], yar.get_node_ids())
+        self.assertListEqual([1.0] * (len(df) // 2), yar.scale(2.0).df[YearAgeRate.COL_NAME_RATE].tolist())
+
+        with self.assertRaises(ValueError):
+            yar.df = pd.concat([df, df])
+        self.assertListEqual([2], yar.get_node_ids())
+
+    def test_distributions_of_derived_data(self):
+        csv_filename = Path(__file__).parent.joinpath('inputs/test_year_age_rate/test_to_mortality_distributions.csv')
+        yar = YearAgeRate(df=None, csv_filename=csv_filename)
+
+        exp_dists = yar.to_mortality_distributions()
+        act_dists = yar.scale(1.0).select(node_ids=[2]).to_mortality_distributions()
+        self.assertListEqual([2], list(act_dists.keys()))
+        self.assertListEqual(exp_dists[2]._population_groups, act_dists[2]._population_groups)
+        self.assertListEqual(exp_dists[2].mortality_rate_matrix, act_dists[2].mortality_rate_matrix)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import json
+import unittest
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+from emodpy_hiv.demographics.year_age_rate import YearAgeRate
+
+manifest_directory = Path(__file__).resolve().parent.parent
+sys.path.append(str(manifest_directory))
+from helpers import time_it
+
+NUM_YEARS = 150
+NUM_AGES  = 21   # noqa: E221
+
+
+def create_multi_node_df(num_nodes: int) -> pd.DataFrame:
+    """
+    Create a YearAgeRate dataframe with the size of UN World Pop data for each node.
+    """
+    node_ids  = np.arange(1, num_nodes + 1)            # noqa: E221
+    min_years = 1950.0 + np.arange(NUM_YEARS)
+    min_ages  = 5.0 * np.arange(NUM_AGES)              # noqa: E221
+    node_grid, year_grid, age_grid = np.meshgrid(node_ids, min_years, min_ages, indexing="ij")
+    return pd.DataFrame({
+        YearAgeRate.COL_NAME_NODE_ID:  node_grid.ravel(),
+        YearAgeRate.COL_NAME_MIN_YEAR: year_grid.ravel(),
+        YearAgeRate.COL_NAME_MIN_AGE:  age_grid.ravel(),   # noqa: E241
+        YearAgeRate.COL_NAME_RATE:     np.random.default_rng(42).random(node_grid.size)  # noqa: E241
+    })
+
+
+def to_distribution_jsons(yar: YearAgeRate, stepwise_for_year: bool = True) -> list:
+    return [YearAgeRate._node_to_distribution_json(*yar._get_node_arrays(node_index), stepwise_for_year=stepwise_for_year)
+            for node_index in range(len(yar.get_node_ids()))]
+
+
+@pytest.mark.benchmark
+class TestYearAgeRateBenchmark(unittest.TestCase):
+    """
+    Time the processing of YearAgeRate data for a growing number of nodes.  The times are only
+    printed so they can be seen with 'pytest -s -m benchmark'; the results are verified by the
+    unit tests.
+    """
+
+    def print_times(self, name, func_of_num_nodes, node_counts):
+        for num_nodes in node_counts:
+            seconds = time_it(lambda: func_of_num_nodes(num_nodes))
+            print(f"{name}: {num_nodes:5d} nodes = {seconds:.4f} seconds")
+
+    def test_validate_df(self):
+        dfs = {num_nodes: create_multi_node_df(num_nodes) for num_nodes in [50, 200, 800]}
+        self.print_times("_validate_df", lambda num_nodes: YearAgeRate._validate_df(dfs[num_nodes]), list(dfs.keys()))
+
+    def test_distribution_json(self):
+        yars = {num_nodes: YearAgeRate(df=create_multi_node_df(num_nodes)) for num_nodes in [1, 10, 1000]}
+        self.print_times("_node_to_distribution_json",
+                         lambda num_nodes: to_distribution_jsons(yars[num_nodes]),
+                         list(yars.keys()))
+
+
+@pytest.mark.unit
+class TestDistributionJson(unittest.TestCase):
+    """
+    Verify that the distribution dictionaries are identical to the ones in
+    inputs/test_year_age_rate/test_distribution_json_expected.json, which were created by the
+    group-by-group implementation of the method that the array implementation replaced.
+    """
+
+    def test_distribution_json_is_identical(self):
+        input_dir = Path(__file__).parent.joinpath('inputs/test_year_age_rate')
+        yar = YearAgeRate(csv_filename=input_dir.joinpath('test_distribution_json.csv'))
+        with open(input_dir.joinpath('test_distribution_json_expected.json')) as expected_file:
+            expected = json.load(expected_file)
+        for stepwise_for_year in [True, False]:
+            exp_jsons = expected[f"stepwise_for_year_{stepwise_for_year}"]
+            act_jsons = to_distribution_jsons(yar, stepwise_for_year)
+            self.assertEqual(exp_jsons, act_jsons)
+
+
+if __name__ == '__main__':
+    unittest.main()